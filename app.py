@@ -1,74 +1,146 @@
 # app.py
 
-from flask import Flask
-from flask_cors import CORS
-from flask_login import LoginManager
-from forms import LoginForm
-from models.user import User
-from routes import init_routes
-from config import DevelopmentConfig, ProductionConfig
-from dotenv import load_dotenv
 import os
-from models import db
 import logging
 from logging.handlers import RotatingFileHandler
 
-app = Flask(__name__)
-CORS(app)
+import click
+from dotenv import load_dotenv
+from flask import Flask
+from config import DevelopmentConfig, ProductionConfig
 
 # Set up logging
-def setup_logging():
+def setup_logging(config):
+    """Write the scheduler's log to SCHEDULER_LOG_FILE; without one it goes to the root logger"""
+    # Create a specific logger for scheduler
+    scheduler_logger = logging.getLogger('scheduler')
+    if scheduler_logger.handlers:
+        return  # Already configured by an earlier create_app()
+    scheduler_logger.setLevel(logging.INFO)
+
+    path = config.get('SCHEDULER_LOG_FILE')
+    if not path:
+        return
     # Create logs directory if it doesn't exist
-    if not os.path.exists('logs'):
-        os.makedirs('logs')
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
 
     # Set up file handler for scheduler logs only
     scheduler_handler = RotatingFileHandler(
-        'logs/scheduler.log',
+        path,
         maxBytes=10240000,  # 10MB
         backupCount=5
     )
     scheduler_handler.setFormatter(logging.Formatter(
         '[%(asctime)s] SCHEDULER: %(message)s'
     ))
-
-    # Create a specific logger for scheduler
-    scheduler_logger = logging.getLogger('scheduler')
-    scheduler_logger.setLevel(logging.INFO)
     scheduler_logger.addHandler(scheduler_handler)
-    
+
     # Prevent scheduler logs from propagating to root logger
     scheduler_logger.propagate = False
 
-setup_logging()
+def default_config():
+    """Configuration based on the environment"""
+    if os.environ.get('FLASK_ENV') == 'production':
+        return ProductionConfig
+    return DevelopmentConfig
+
+def create_app(config_object=None):
+    """
+    Build the application.
+
+    Blueprints and the services behind them are imported here rather than at
+    module import, and heavy client libraries (pandas, simple_salesforce,
+    requests) only when a route that needs them runs. The schema is not
+    created on startup; run `flask --app app init-db`.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+
+    from flask_cors import CORS
+    from flask_login import LoginManager
+    from models import db
+    from routes import init_routes
+    from services.commit_order import init_commit_order
+    from services.compression import init_compression
+    from services.db_pool import init_pool_metrics
+    from services.db_routing import init_db_routing
+    from services.live_updates import init_live_updates
+    from services.metrics import init_metrics
+    from services.sqlite_tuning import init_sqlite_tuning
+    from services.scheduler import scheduler_cli
+    from services.query_inspector import init_n1_detection
+    from services.slow_query_log import init_slow_query_log
+    from services.user_cache import load_principal
+
+    app = Flask(__name__)
+    CORS(app)
+    app.config.from_object(config_object or default_config())
+    setup_logging(app.config)
+
+    # Initialize extensions
+    db.init_app(app)
+    init_sqlite_tuning(app, db)
+    init_db_routing(app)
+    init_commit_order(app)
+    init_pool_metrics(app, db)
+    init_metrics(app)
+    init_live_updates(app)
+    init_compression(app)
+    if app.config.get('N1_DETECTION'):
+        init_n1_detection(app)
+    init_slow_query_log(app)
+    login_manager = LoginManager()
+    login_manager.init_app(app)
+    login_manager.login_view = 'auth.login'
+    login_manager.login_message_category = 'info'
+
+    # User loader callback for Flask-Login
+    # Returns a cached principal; the full User is loaded only when a route needs it
+    @login_manager.user_loader
+    def load_user(user_id):
+        return load_principal(user_id)
+
+    # Initialize routes
+    init_routes(app)
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(backfill_events_command)
+    app.cli.add_command(scheduler_cli)
+
+    return app
 
-# Load configuration based on the environment
-if os.environ.get('FLASK_ENV') == 'production':
-    app.config.from_object(ProductionConfig)
-else:
-    app.config.from_object(DevelopmentConfig)
+@click.command('init-db')
+def init_db_command():
+    """Create missing tables, columns and indexes."""
+    from models import db
+    from models.schema import ensure_schema
 
-# Initialize extensions
-db.init_app(app)
-login_manager = LoginManager()
-login_manager.init_app(app)
-login_manager.login_view = 'auth.login'
-login_manager.login_message_category = 'info'
+    changes = ensure_schema(db.engine, db.metadata)
+    for kind, items in changes.items():
+        for item in items:
+            click.echo(f'{kind}: {item}')
+    click.echo('Database schema is up to date.')
 
-# Create the database tables
-with app.app_context():
-    db.create_all()
+@click.command('backfill-events')
+@click.option('--all', 'recompute', is_flag=True,
+              help='Recompute every event, not only those missing times or a category')
+@click.option('--batch-size', default=500, show_default=True)
+def backfill_events_command(recompute, batch_size):
+    """Fill starts_at/ends_at and category from each event's upstream fields."""
+    from models.upcoming_event import UpcomingEvent
 
-# User loader callback for Flask-Login
-@login_manager.user_loader
-def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    updated = UpcomingEvent.backfill_derived(batch_size=batch_size, only_missing=not recompute)
+    click.echo(f'Updated {updated} events.')
 
-# Initialize routes
-init_routes(app)
+_default_app = None
 
-# Load environment variables from .env file
-load_dotenv()
+def __getattr__(name):
+    # `from app import app` (gunicorn app:app, scripts) builds the default app on first use
+    global _default_app
+    if name == 'app':
+        if _default_app is None:
+            _default_app = create_app()
+        return _default_app
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -1,26 +1,146 @@
 # config.py
+import json
 import os
 from dotenv import load_dotenv
+from services.db_pool import engine_options
+from services.event_categories import DEFAULT_RULES as DEFAULT_CATEGORY_RULES
+from services.sqlite_tuning import SQLITE_MEMORY_URI
 
 load_dotenv()  # This line is crucial for loading the .env file
 
+def database_engine_options(uri):
+    """Pool sizing, recycling, pre-ping and statement timeout for an engine (services.db_pool)"""
+    return engine_options(
+        uri,
+        pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+        # Recycle before server-side idle timeouts and maintenance windows drop connections
+        pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+        pre_ping=os.getenv('DB_POOL_PRE_PING', '1') == '1',
+        statement_timeout_ms=int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 0)),
+    )
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your_secret_key')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Read replica for the anonymous feeds (services.db_routing); its own engine and pool.
+    # Reads return to the primary for REPLICA_STICKY_SECONDS after a write
+    SQLALCHEMY_BINDS = {'replica': os.getenv('REPLICA_DATABASE_URL').replace('postgres://', 'postgresql://', 1)} \
+        if os.getenv('REPLICA_DATABASE_URL') else {}
+    REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 10))
+    # SQLite tuning profile (services.sqlite_tuning): WAL, synchronous=NORMAL, busy_timeout,
+    # mmap, a larger page cache and in-memory temp tables on every SQLite connection
+    SQLITE_TUNING = os.getenv('SQLITE_TUNING', '0') == '1'
+    SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000))  # ms
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # bytes
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024))  # pages, or KiB when negative
     SESSION_COOKIE_SAMESITE = 'Lax'
     SF_USERNAME = os.getenv('SF_USERNAME')
     SF_PASSWORD = os.getenv('SF_PASSWORD')
     SF_SECURITY_TOKEN = os.getenv('SF_SECURITY_TOKEN')
+    # Upstream overrides for local stand-ins (scripts/fake_upstreams.py); unset means the real services
+    SALESFORCE_BASE_URL = os.getenv('SALESFORCE_BASE_URL')
+    GOOGLE_SHEETS_BASE_URL = os.getenv('GOOGLE_SHEETS_BASE_URL', 'https://docs.google.com')
+    # Seconds a logged-in user's principal is cached per process (0 disables)
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', 60))
+    # Seconds the public event feeds and school directory are reused per process (0 disables);
+    # commits in the same process invalidate them immediately
+    FEED_CACHE_TTL = int(os.getenv('FEED_CACHE_TTL', 30))
+    # Polaris user sync
+    POLARIS_BASE_URL = os.getenv('POLARIS_BASE_URL', 'https://polaris-prepkc.pythonanywhere.com')
+    SYNC_USERNAME = os.getenv('SYNC_USERNAME')
+    SYNC_PASSWORD = os.getenv('SYNC_PASSWORD')
+    USER_SYNC_CHUNK_SIZE = int(os.getenv('USER_SYNC_CHUNK_SIZE', 500))
+    # Seconds the incremental user sync re-reads before its stored watermark
+    USER_SYNC_WATERMARK_OVERLAP = int(os.getenv('USER_SYNC_WATERMARK_OVERLAP', 300))
+    # Default chunk size for POST /api/v1/users/update in bulk mode
+    USER_BULK_CHUNK_SIZE = int(os.getenv('USER_BULK_CHUNK_SIZE', 1000))
+    # Metrics: shared snapshot directory for multi-worker aggregation, and the
+    # bearer token required to scrape /metrics (without it only local requests are answered)
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    # Slow-query log: statements above the threshold are logged with their plan
+    # and listed at /admin/slow-queries (unset disables the recorder)
+    SLOW_QUERY_THRESHOLD_MS = float(os.environ['SLOW_QUERY_THRESHOLD_MS']) if os.getenv('SLOW_QUERY_THRESHOLD_MS') else None
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', '1') == '1'
+    # Fraction of slow SELECTs explained with EXPLAIN ANALYZE (re-runs the query)
+    SLOW_QUERY_ANALYZE_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_ANALYZE_SAMPLE_RATE', 0))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv('SLOW_QUERY_LOG_SIZE', 100))
+    SLOW_QUERY_SHAPE_INTERVAL = float(os.getenv('SLOW_QUERY_SHAPE_INTERVAL', 60))
+    SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv('SLOW_QUERY_MAX_PER_MINUTE', 30))
+    # Scheduler log (rotated at 10 MB); empty sends it to the root logger instead
+    SCHEDULER_LOG_FILE = os.getenv('SCHEDULER_LOG_FILE', 'logs/scheduler.log')
+    # Scheduler (`flask --app app scheduler run`): seconds between runs per job (0 disables a job)
+    SCHEDULER_SALESFORCE_INTERVAL = float(os.getenv('SCHEDULER_SALESFORCE_INTERVAL', 3600))
+    SCHEDULER_VIRTUAL_SHEETS_INTERVAL = float(os.getenv('SCHEDULER_VIRTUAL_SHEETS_INTERVAL', 3600))
+    SCHEDULER_POLARIS_USERS_INTERVAL = float(os.getenv('SCHEDULER_POLARIS_USERS_INTERVAL', 3600))
+    SCHEDULER_SCHOOL_MAPPINGS_INTERVAL = float(os.getenv('SCHEDULER_SCHOOL_MAPPINGS_INTERVAL', 86400))
+    # Random +/- fraction applied to every delay, and the ceiling for failure backoff
+    SCHEDULER_JITTER = float(os.getenv('SCHEDULER_JITTER', 0.1))
+    SCHEDULER_MAX_BACKOFF = float(os.getenv('SCHEDULER_MAX_BACKOFF', 6 * 3600))
+    # A job lease not released within this many seconds (crashed holder) can be taken over
+    SCHEDULER_LEASE_TTL = float(os.getenv('SCHEDULER_LEASE_TTL', 1800))
+    SCHEDULER_HISTORY_LIMIT = int(os.getenv('SCHEDULER_HISTORY_LIMIT', 500))
+    # Longest a sync request with ?wait=1 waits for an in-flight run of the same job
+    SYNC_WAIT_TIMEOUT = float(os.getenv('SYNC_WAIT_TIMEOUT', 300))
+    # Event change log (/api/v1/events/changes): entries older than this many seconds
+    # are compacted to the latest per event, dropping deletes; the scheduler's
+    # event_changes_compaction job runs it (0 disables the job)
+    EVENT_CHANGES_RETENTION = float(os.getenv('EVENT_CHANGES_RETENTION', 30 * 86400))
+    SCHEDULER_EVENT_CHANGES_COMPACTION_INTERVAL = float(os.getenv('SCHEDULER_EVENT_CHANGES_COMPACTION_INTERVAL', 86400))
+    # The Salesforce sync moves past events, and events archived longer than this many
+    # seconds, from upcoming_events to event_history (/api/v1/events/history), this many per transaction
+    EVENT_HISTORY_ARCHIVED_AFTER = float(os.getenv('EVENT_HISTORY_ARCHIVED_AFTER', 30 * 86400))
+    EVENT_HISTORY_BATCH_SIZE = int(os.getenv('EVENT_HISTORY_BATCH_SIZE', 500))
+    # Local time zone of the free-text event times (calendar feeds)
+    EVENT_TIMEZONE = os.getenv('EVENT_TIMEZONE', 'America/Chicago')
+    # Event categories (services.event_categories): JSON list of [regex, category]
+    # pairs matched against the session type in order, e.g. [["\\bDIA\\b", "dia"]]
+    EVENT_CATEGORY_RULES = json.loads(os.getenv('EVENT_CATEGORY_RULES', 'null')) or DEFAULT_CATEGORY_RULES
+    # Response compression for JSON and HTML (brotli when installed, else gzip). Bodies
+    # under COMPRESS_MIN_SIZE bytes are sent as is; snapshot feeds are compressed once,
+    # when built, at the COMPRESS_SNAPSHOT_* levels
+    COMPRESS = os.getenv('COMPRESS', '1') == '1'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+    COMPRESS_BR_QUALITY = int(os.getenv('COMPRESS_BR_QUALITY', 4))
+    COMPRESS_SNAPSHOT_LEVEL = int(os.getenv('COMPRESS_SNAPSHOT_LEVEL', 9))
+    COMPRESS_SNAPSHOT_BR_QUALITY = int(os.getenv('COMPRESS_SNAPSHOT_BR_QUALITY', 5))
+    # Static feeds: after each event sync the public feeds are written as JSON (+ .gz/.br)
+    # to STATIC_FEEDS_DIR (default static/feeds), served at /feeds/<name> or by a proxy;
+    # the scheduler's static_feeds job republishes after admin edits
+    STATIC_FEEDS = os.getenv('STATIC_FEEDS', '1') == '1'
+    STATIC_FEEDS_DIR = os.getenv('STATIC_FEEDS_DIR')
+    STATIC_FEEDS_MAX_AGE = int(os.getenv('STATIC_FEEDS_MAX_AGE', 60))
+    SCHEDULER_STATIC_FEEDS_INTERVAL = float(os.getenv('SCHEDULER_STATIC_FEEDS_INTERVAL', 120))
+    # Live updates (/events/stream): seconds between each worker's polls for new
+    # notifications, how long they are kept for reconnect replay, and how long one
+    # stream stays open before the browser reconnects
+    LIVE_UPDATES_POLL_INTERVAL = float(os.getenv('LIVE_UPDATES_POLL_INTERVAL', 1))
+    LIVE_UPDATES_RETENTION = float(os.getenv('LIVE_UPDATES_RETENTION', 86400))
+    LIVE_STREAM_MAX_SECONDS = float(os.getenv('LIVE_STREAM_MAX_SECONDS', 300))
 
 class DevelopmentConfig(Config):
     DEBUG = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///your_database.db'
+    # Log inline warnings when a request repeats a SELECT shape (N+1 queries)
+    N1_DETECTION = os.getenv('N1_DETECTION', '0') == '1'
+    N1_DETECTION_THRESHOLD = int(os.getenv('N1_DETECTION_THRESHOLD', 5))
+    # DEV_DATABASE_URL points local tools (benchmarks, synthetic data) at another database
+    SQLALCHEMY_DATABASE_URI = os.getenv('DEV_DATABASE_URL', 'sqlite:///your_database.db').replace('postgres://', 'postgresql://', 1)
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(SQLALCHEMY_DATABASE_URI)
 
 class TestingConfig(Config):
     TESTING = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///test_database.db'
+    # TEST_SQLITE_MEMORY=1 runs the suite on a shared-cache in-memory database
+    SQLALCHEMY_DATABASE_URI = SQLITE_MEMORY_URI if os.getenv('TEST_SQLITE_MEMORY') == '1' \
+        else 'sqlite:///test_database.db'
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(SQLALCHEMY_DATABASE_URI)
     WTF_CSRF_ENABLED = False
     SESSION_COOKIE_SECURE = False
+    STATIC_FEEDS = False  # tests that publish point STATIC_FEEDS_DIR at a temporary directory
+    SCHEDULER_LOG_FILE = None  # never write to the real logs/
 
 class ProductionConfig(Config):
     DEBUG = False
@@ -28,4 +148,5 @@ class ProductionConfig(Config):
     if uri and uri.startswith('postgres://'):
         uri = uri.replace('postgres://', 'postgresql://', 1)
     SQLALCHEMY_DATABASE_URI = uri
+    SQLALCHEMY_ENGINE_OPTIONS = database_engine_options(uri)
     SESSION_COOKIE_SECURE = True
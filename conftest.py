@@ -1,19 +1,31 @@
 # conftest.py
 
-import pytest
-from app import app as flask_app
-from models import db
-from config import TestingConfig
+import os
 
-@pytest.fixture
-def app():
-    # Configure the app for testing
-    flask_app.config.from_object(TestingConfig)
+# Before config is imported: the scripts/ tests build the default (development) app,
+# which must not write to the real logs/ either
+os.environ['SCHEDULER_LOG_FILE'] = ''
+
+import pytest  # noqa: E402
+from app import create_app  # noqa: E402
+from models import db  # noqa: E402
+from config import TestingConfig  # noqa: E402
+from services.feed_cache import snapshot_cache  # noqa: E402
+from services.query_inspector import QueryRecorder, assert_max_queries as _assert_max_queries  # noqa: E402
 
-    with flask_app.app_context():
+@pytest.fixture(scope='session')
+def _app():
+    # One application for the whole run; each test gets fresh tables
+    return create_app(TestingConfig)
+
+@pytest.fixture
+def app(_app):
+    with _app.app_context():
         # Create all tables
         db.create_all()
-        yield flask_app
+        # Snapshots outlive drop_all(); never serve the previous test's data
+        snapshot_cache.clear()
+        yield _app
         # Drop all tables
         db.session.remove()
         db.drop_all()
@@ -25,3 +37,18 @@ def client(app):
 @pytest.fixture
 def runner(app):
     return app.test_cli_runner()
+
+@pytest.fixture
+def query_recorder(app):
+    """Record SQL statements: `with query_recorder() as recorder: ...`"""
+    def _recorder():
+        return QueryRecorder(db.engine)
+    return _recorder
+
+@pytest.fixture
+def assert_max_queries(app):
+    """Fail with a grouped report of repeated statements when a block exceeds its budget:
+    `with assert_max_queries(3): client.get(...)`"""
+    def _assert(budget, label='block'):
+        return _assert_max_queries(budget, engine=db.engine, label=label)
+    return _assert
@@ -0,0 +1,30 @@
+# gunicorn.conf.py
+#
+# gunicorn app:app
+#
+# The app is loaded and warmed up once in the master (templates compiled,
+# feed snapshots and the school directory built) and workers are forked
+# from it, sharing that memory copy-on-write.
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+# Each open /events/stream holds a thread for up to LIVE_STREAM_MAX_SECONDS
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+preload_app = os.getenv('GUNICORN_PRELOAD', '1') == '1'
+# Set WARMUP=0 to skip the pre-fork warm-up (e.g. to compare first-request latency)
+warmup = os.getenv('WARMUP', '1') == '1'
+
+
+def when_ready(server):
+    if preload_app and warmup:
+        from services.warmup import warm_up
+        timings = warm_up(server.app.wsgi())
+        server.log.info('Warm-up finished in %.1f ms', sum(timings.values()))
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from services.warmup import reset_after_fork
+        reset_after_fork(server.app.wsgi())
@@ -1,3 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
+from services.db_routing import RoutingSession
 
-db = SQLAlchemy()
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Re-exported for convenience; imported after db to avoid a circular import
+from models.user import User  # noqa: E402
@@ -0,0 +1,93 @@
+import json
+from datetime import datetime, timedelta, timezone
+from models import db
+from models.sync_state import SyncState
+
+HORIZON_KEY = 'event_changes_horizon'
+
+
+class EventChange(db.Model):
+    """
+    Append-only log of event inserts, updates and deletes for mirrors
+    (/api/v1/events/changes). The id is the cursor consumers pass back.
+
+    Entries are written in the same transaction as the change. Update and
+    insert entries carry the event as the feeds serialize it; delete
+    entries only its ids. Ids become visible in commit order
+    (services.commit_order), so a reader never skips past an entry that
+    commits later.
+    """
+
+    __tablename__ = 'event_changes'
+    __commit_ordered__ = True
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False, index=True)
+    salesforce_id = db.Column(db.String(18))
+    op = db.Column(db.String(10), nullable=False)  # 'insert', 'update' or 'delete'
+    payload = db.Column(db.Text)  # JSON event, None for deletes
+    changed_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self):
+        return {
+            'cursor': self.id,
+            'op': self.op,
+            'event_id': self.event_id,
+            'salesforce_id': self.salesforce_id,
+            'changed_at': self.changed_at.isoformat(),
+            'event': json.loads(self.payload) if self.payload else None,
+        }
+
+    @classmethod
+    def record(cls, op, event_dicts):
+        """Log serialized events (UpcomingEvent.to_dict) as inserts or updates. The caller commits."""
+        db.session.add_all([
+            cls(event_id=event['id'], salesforce_id=event['Id'], op=op, payload=json.dumps(event, default=str))
+            for event in event_dicts
+        ])
+
+    @classmethod
+    def record_deletes(cls, rows):
+        """Log deletes for (event id, salesforce id) pairs. The caller commits."""
+        db.session.add_all([cls(event_id=event_id, salesforce_id=salesforce_id, op='delete')
+                            for event_id, salesforce_id in rows])
+
+    @classmethod
+    def latest_cursor(cls):
+        return db.session.query(db.func.max(cls.id)).scalar() or 0
+
+    @classmethod
+    def horizon(cls):
+        """Cursors below this may have missed a compacted delete and must resync"""
+        return int(SyncState.get_value(HORIZON_KEY, 0))
+
+    @classmethod
+    def page(cls, since, limit):
+        """Up to limit changes after the cursor, oldest first, and whether more follow"""
+        rows = cls.query.filter(cls.id > since).order_by(cls.id).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
+
+    @classmethod
+    def compact(cls, retention):
+        """
+        Compact entries older than retention seconds: drop those superseded by a
+        newer entry for the same event, then the remaining deletes. Dropping a
+        delete moves the horizon. Commits.
+
+        Returns:
+            dict: superseded and deletes removed, and the horizon
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=retention)
+        latest = db.session.query(db.func.max(cls.id)).group_by(cls.event_id)
+        superseded = cls.query.filter(cls.changed_at < cutoff, cls.id.notin_(latest))\
+            .delete(synchronize_session=False)
+
+        expired = cls.query.filter(cls.op == 'delete', cls.changed_at < cutoff)
+        last_delete = expired.with_entities(db.func.max(cls.id)).scalar()
+        deletes = expired.delete(synchronize_session=False)
+        horizon = cls.horizon()
+        if last_delete is not None and last_delete > horizon:
+            horizon = last_delete
+            SyncState.set_value(HORIZON_KEY, str(horizon))
+        db.session.commit()
+        return {'superseded': superseded, 'deletes': deletes, 'horizon': horizon}
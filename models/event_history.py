@@ -0,0 +1,83 @@
+import json
+from datetime import datetime, timezone
+from models import db
+from models.event_row import DICT_FIELDS, event_dict
+
+# Columns copied from upcoming_events when an event is moved here
+COPIED_COLUMNS = tuple(dict.fromkeys(column for _, column in DICT_FIELDS if column != 'id')) + (
+    'session_status', 'created_at', 'updated_at')
+
+
+class EventHistory(db.Model):
+    """
+    Events moved out of upcoming_events: past events, events archived (full)
+    for longer than EVENT_HISTORY_ARCHIVED_AFTER, and sessions Salesforce no
+    longer returns. upcoming_events then only holds live events.
+
+    Rows are written once by UpcomingEvent.move_to_history() and read through
+    /api/v1/events/history. event_id is the id the event had while live; the
+    same Salesforce session can appear more than once if it came back after
+    being moved. districts is the JSON list of district names it was linked to.
+    """
+
+    __tablename__ = 'event_history'
+    __table_args__ = (
+        # History is queried by start time range, optionally within a category or source
+        db.Index('ix_event_history_category_starts_at', 'category', 'starts_at'),
+        db.Index('ix_event_history_source_starts_at', 'source', 'starts_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, nullable=False, index=True)
+    salesforce_id = db.Column(db.String(18), index=True)
+    name = db.Column(db.String(255), nullable=False)
+    available_slots = db.Column(db.Integer)
+    filled_volunteer_jobs = db.Column(db.Integer)
+    date_and_time = db.Column(db.String(100))
+    event_type = db.Column(db.String(50))
+    category = db.Column(db.String(20))
+    registration_link = db.Column(db.Text)
+    display_on_website = db.Column(db.Boolean)
+    start_date = db.Column(db.DateTime)
+    starts_at = db.Column(db.DateTime(timezone=True), index=True)
+    ends_at = db.Column(db.DateTime(timezone=True))
+    status = db.Column(db.String(20))  # the status it had when moved
+    session_status = db.Column(db.String(50))
+    note = db.Column(db.Text)
+    source = db.Column(db.String(20))
+    spreadsheet_id = db.Column(db.String(255))
+    presenter_name = db.Column(db.String(255))
+    presenter_organization = db.Column(db.String(255))
+    presenter_location = db.Column(db.String(100))
+    topic_theme = db.Column(db.String(255))
+    teacher_name = db.Column(db.String(255))
+    school_name = db.Column(db.String(255))
+    school_level = db.Column(db.String(50))
+    district = db.Column(db.String(255))
+    districts = db.Column(db.Text)  # JSON list of district names
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    reason = db.Column(db.String(20), nullable=False)  # 'past', 'archived' or 'removed'
+    moved_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
+
+    def to_dict(self):
+        """The event as the feeds serialized it while live, plus when and why it was moved"""
+        data = event_dict(self, json.loads(self.districts or '[]'))
+        data.update(id=self.event_id, history_id=self.id, reason=self.reason,
+                    moved_at=self.moved_at.isoformat())
+        return data
+
+    @classmethod
+    def values_for(cls, event, districts, reason, moved_at):
+        """Insert values for a live event being moved"""
+        values = {column: getattr(event, column) for column in COPIED_COLUMNS}
+        values.update(event_id=event.id, districts=json.dumps(districts), reason=reason, moved_at=moved_at)
+        return values
+
+    @classmethod
+    def page(cls, query, before, limit):
+        """Up to limit entries of a query with an id below before (newest first), and whether more follow"""
+        if before is not None:
+            query = query.filter(cls.id < before)
+        rows = query.order_by(cls.id.desc()).limit(limit + 1).all()
+        return rows[:limit], len(rows) > limit
@@ -0,0 +1,89 @@
+"""
+Read-only event rows for list endpoints.
+
+UpcomingEvent.rows() selects only a fieldset's columns and maps each result
+tuple to a slotted, frozen row class. No ORM objects are created, so there
+is no identity-map bookkeeping, no change tracking and no unloaded TEXT
+columns. event_dict() builds the feed JSON from an ORM event or a row alike,
+so both paths produce the same dictionaries.
+
+Fieldsets:
+- full: every column the feeds expose, for the same JSON as to_dict()
+- summary: what a list or count view needs; leaves out note, the registration
+  link and the virtual-sheet details
+"""
+
+from dataclasses import make_dataclass
+from datetime import datetime, timezone
+
+# (JSON key, column) in feed order; the Salesforce-style keys are kept for older clients
+DICT_FIELDS = (
+    ('id', 'id'),
+    ('Id', 'salesforce_id'),
+    ('Name', 'name'),
+    ('name', 'name'),
+    ('Available_Slots__c', 'available_slots'),
+    ('available_slots', 'available_slots'),
+    ('Filled_Volunteer_Jobs__c', 'filled_volunteer_jobs'),
+    ('filled_volunteer_jobs', 'filled_volunteer_jobs'),
+    ('Date_and_Time_for_Cal__c', 'date_and_time'),
+    ('date_and_time', 'date_and_time'),
+    ('Session_Type__c', 'event_type'),
+    ('event_type', 'event_type'),
+    ('category', 'category'),
+    ('Registration_Link__c', 'registration_link'),
+    ('registration_link', 'registration_link'),
+    ('Display_on_Website__c', 'display_on_website'),
+    ('display_on_website', 'display_on_website'),
+    ('Start_Date__c', 'start_date'),
+    ('start_date', 'start_date'),
+    ('starts_at', 'starts_at'),
+    ('ends_at', 'ends_at'),
+    ('note', 'note'),
+    ('status', 'status'),
+    ('source', 'source'),
+    ('spreadsheet_id', 'spreadsheet_id'),
+    ('presenter_name', 'presenter_name'),
+    ('presenter_organization', 'presenter_organization'),
+    ('presenter_location', 'presenter_location'),
+    ('topic_theme', 'topic_theme'),
+    ('teacher_name', 'teacher_name'),
+    ('school_name', 'school_name'),
+    ('school_level', 'school_level'),
+    ('district', 'district'),
+)
+# Sent as UTC with a Z suffix; start_date keeps whatever timezone it was stored with
+UTC_COLUMNS = {'starts_at', 'ends_at'}
+
+FIELDSETS = {
+    'full': tuple(dict.fromkeys(column for _, column in DICT_FIELDS)),
+    'summary': ('id', 'salesforce_id', 'name', 'available_slots', 'filled_volunteer_jobs', 'date_and_time',
+                'event_type', 'category', 'display_on_website', 'start_date', 'starts_at', 'ends_at',
+                'status', 'source'),
+}
+
+ROW_CLASSES = {
+    name: make_dataclass(f'Event{name.title()}Row', columns, frozen=True, slots=True)
+    for name, columns in FIELDSETS.items()
+}
+
+
+def naive_utc(value):
+    # SQLite hands back naive datetimes for the aware ones we store
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def event_dict(event, districts, columns=FIELDSETS['full']):
+    """The feed JSON of an UpcomingEvent or an event row, limited to columns"""
+    data = {}
+    for key, column in DICT_FIELDS:
+        if column not in columns:
+            continue
+        value = getattr(event, column)
+        if isinstance(value, datetime):
+            value = f'{naive_utc(value).isoformat()}Z' if column in UTC_COLUMNS else value.isoformat()
+        data[key] = value
+    data['districts'] = districts
+    return data
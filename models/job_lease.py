@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db
+
+class JobLease(db.Model):
+    """
+    Time-limited lease on a named job, so only one process runs it at a time.
+
+    A lease that is not released (the holder crashed) expires after its TTL
+    and can then be taken over. Lease changes run in their own short
+    transaction on a separate connection, never inside the caller's session.
+    """
+
+    __tablename__ = 'job_leases'
+
+    name = db.Column(db.String(64), primary_key=True)
+    owner = db.Column(db.String(128), nullable=False)
+    acquired_at = db.Column(db.DateTime, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    @classmethod
+    def acquire(cls, name, owner, ttl):
+        """Take or renew the lease for ttl seconds. Returns True when owner holds it."""
+        # Naive UTC: compared in SQL against a timezone-less column on every backend
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        values = {'owner': owner, 'acquired_at': now, 'expires_at': now + timedelta(seconds=ttl)}
+        table = cls.__table__
+        with db.engine.begin() as conn:
+            taken = conn.execute(
+                update(table)
+                .where(table.c.name == name, or_(table.c.expires_at < now, table.c.owner == owner))
+                .values(**values)
+            ).rowcount
+            if taken:
+                return True
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(insert(table).values(name=name, **values))
+            return True
+        except IntegrityError:
+            # Held by someone else and not expired
+            return False
+
+    @classmethod
+    def release(cls, name, owner):
+        """Give the lease up early. Returns False if owner no longer held it."""
+        table = cls.__table__
+        with db.engine.begin() as conn:
+            return bool(conn.execute(
+                delete(table).where(table.c.name == name, table.c.owner == owner)
+            ).rowcount)
@@ -0,0 +1,55 @@
+import json
+from datetime import datetime, timezone
+from models import db
+
+class JobRun(db.Model):
+    """One run of a sync job (scheduled or manual): outcome, duration and what it changed"""
+
+    __tablename__ = 'job_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_name = db.Column(db.String(64), nullable=False)
+    started_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    finished_at = db.Column(db.DateTime)
+    # 'running' until it finishes, then 'success' or 'failed'; 'abandoned' if its holder died
+    status = db.Column(db.String(20), nullable=False)
+    trigger = db.Column(db.String(20))  # 'scheduled' or 'manual'
+    duration_ms = db.Column(db.Float)
+    changed_count = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text)
+    result = db.Column(db.Text)  # JSON summary returned by the job
+    # Seconds until the scheduler planned the next run (after backoff/adaptation)
+    next_interval = db.Column(db.Float)
+
+    __table_args__ = (
+        db.Index('ix_job_runs_job_name_started_at', 'job_name', 'started_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'job_name': self.job_name,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'status': self.status,
+            'trigger': self.trigger,
+            'duration_ms': self.duration_ms,
+            'changed_count': self.changed_count,
+            'error': self.error,
+            'result': json.loads(self.result) if self.result else None,
+            'next_interval': self.next_interval,
+        }
+
+    @classmethod
+    def latest(cls, job_name):
+        """Most recent run of a job, or None"""
+        return cls.query.filter_by(job_name=job_name).order_by(cls.started_at.desc(), cls.id.desc()).first()
+
+    @classmethod
+    def prune(cls, job_name, keep):
+        """Delete all but the newest keep runs of a job. The caller commits."""
+        cutoff = cls.query.with_entities(cls.id).filter_by(job_name=job_name)\
+            .order_by(cls.id.desc()).offset(keep).limit(1).scalar()
+        if cutoff is None:
+            return 0
+        return cls.query.filter(cls.job_name == job_name, cls.id <= cutoff).delete(synchronize_session=False)
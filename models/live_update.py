@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from models import db
+
+class LiveUpdate(db.Model):
+    """
+    A change notification for live pages (services.live_updates).
+
+    Rows are written in the same transaction as the change they describe, so
+    a notification is never published for a change that rolls back. The
+    autoincrement id doubles as the generation counter every worker polls;
+    writers are serialized until they commit (services.commit_order), so ids
+    become visible in order and a poller that moved past an id has seen every
+    lower one.
+    """
+
+    __tablename__ = 'live_updates'
+    __commit_ordered__ = True
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)  # 'event_updated', 'event_removed', 'sync_completed'
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc), index=True)
@@ -0,0 +1,77 @@
+"""
+Explicit schema management for `flask init-db`.
+
+create_all() only creates missing tables. ensure_schema() also brings
+existing tables up to date with the models by adding missing columns and
+indexes, which is all the migrations this project has needed so far.
+"""
+
+import logging
+from typing import Dict, List
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+
+def load_models():
+    """Import every model module so its table is registered on the metadata"""
+    import models.event_change  # noqa: F401
+    import models.event_district_mapping  # noqa: F401
+    import models.event_history  # noqa: F401
+    import models.event_school_mapping  # noqa: F401
+    import models.job_lease  # noqa: F401
+    import models.job_run  # noqa: F401
+    import models.live_update  # noqa: F401
+    import models.school_mapping  # noqa: F401
+    import models.sync_state  # noqa: F401
+    import models.upcoming_event  # noqa: F401
+    import models.user  # noqa: F401
+
+
+def ensure_schema(engine, metadata) -> Dict[str, List[str]]:
+    """
+    Create missing tables, then add missing columns and indexes to existing ones.
+
+    Added columns are created nullable unless they carry a server default,
+    since existing rows have no value for them.
+
+    Returns:
+        dict: Names of the created tables, added columns and added indexes
+    """
+    load_models()
+    changes = {'created_tables': [], 'added_columns': [], 'added_indexes': []}
+    existing_tables = set(inspect(engine).get_table_names())
+
+    metadata.create_all(engine)
+    changes['created_tables'] = [table.name for table in metadata.sorted_tables
+                                 if table.name not in existing_tables]
+
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+
+            columns = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                definition = str(CreateColumn(column).compile(dialect=engine.dialect))
+                if column.server_default is None:
+                    definition = definition.replace(' NOT NULL', '')
+                conn.execute(text(f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {definition}'))
+                changes['added_columns'].append(f'{table.name}.{column.name}')
+                logger.info(f'Added column {table.name}.{column.name}')
+
+            indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                index.create(conn)
+                changes['added_indexes'].append(index.name)
+                logger.info(f'Added index {index.name} on {table.name}')
+
+    return changes
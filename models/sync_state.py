@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+from models import db
+
+class SyncState(db.Model):
+    """
+    Small key/value store for sync bookkeeping that must survive restarts,
+    such as the watermark of the last incremental user sync.
+    """
+
+    __tablename__ = 'sync_state'
+
+    key = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+
+    @classmethod
+    def get_value(cls, key, default=None):
+        """Return the stored value for key, or default"""
+        state = db.session.get(cls, key)
+        return state.value if state and state.value is not None else default
+
+    @classmethod
+    def set_value(cls, key, value):
+        """Store a value for key. The caller commits."""
+        state = db.session.get(cls, key)
+        if state is None:
+            state = cls(key=key)
+            db.session.add(state)
+        state.value = value
+        return state
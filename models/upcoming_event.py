@@ -1,8 +1,51 @@
 from datetime import datetime, timezone
 import re
+from flask import current_app
 from models import db
+from sqlalchemy import inspect
 from sqlalchemy.orm import validates
+from models.event_change import EventChange
 from models.event_district_mapping import EventDistrictMapping
+from models.event_history import EventHistory
+from models.event_row import FIELDSETS, ROW_CLASSES, event_dict, naive_utc
+from services.event_categories import DEFAULT_RULES as DEFAULT_CATEGORY_RULES, classify
+from services.event_times import DEFAULT_TIMEZONE, parse_event_times
+
+
+def _has_changes(obj):
+    """Whether any column attribute really changed since load, ignoring tz-only differences"""
+    state = inspect(obj)
+    for attr in state.mapper.column_attrs:
+        history = state.attrs[attr.key].history
+        if not history.has_changes():
+            continue
+        old = history.deleted[0] if history.deleted else None
+        new = history.added[0] if history.added else None
+        if naive_utc(old) != naive_utc(new):
+            return True
+    return False
+
+
+def _default_category(context):
+    # Events created outside the upserts (admin tools, tests) are classified on insert too
+    params = context.get_current_parameters()
+    return classify(params.get('event_type'), params.get('source'),
+                    current_app.config.get('EVENT_CATEGORY_RULES', DEFAULT_CATEGORY_RULES))
+
+
+def _default_times(context):
+    # Likewise parsed on insert, so every dated event can be found by the starts_at/ends_at filters
+    params = context.get_current_parameters()
+    return UpcomingEvent.parse_times(params.get('date_and_time'), params.get('start_date'))
+
+
+def _default_starts_at(context):
+    return _default_times(context)[0]
+
+
+def _default_ends_at(context):
+    return _default_times(context)[1]
+
 
 class UpcomingEvent(db.Model):
     """
@@ -11,6 +54,12 @@ class UpcomingEvent(db.Model):
     """
     
     __tablename__ = 'upcoming_events'
+    __table_args__ = (
+        # The category feeds (DIA) only ever list upcoming events with open slots
+        db.Index('ix_upcoming_events_open_category_starts_at', 'category', 'starts_at',
+                 sqlite_where=db.text('available_slots > 0'),
+                 postgresql_where=db.text('available_slots > 0')),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     salesforce_id = db.Column(db.String(18), unique=True, nullable=True)  # Made nullable for virtual events
@@ -19,11 +68,17 @@ class UpcomingEvent(db.Model):
     filled_volunteer_jobs = db.Column(db.Integer)
     date_and_time = db.Column(db.String(100))  # Storing as string since format is "MM/DD/YYYY HH:MM AM/PM to HH:MM AM/PM"
     event_type = db.Column(db.String(50), index=True)
+    category = db.Column(db.String(20), index=True,
+                         default=_default_category)  # classified from event_type (services.event_categories)
     registration_link = db.Column(db.Text)
     display_on_website = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     start_date = db.Column(db.DateTime, index=True)
+    # Parsed from date_and_time in EVENT_TIMEZONE, stored in UTC; all-day events span their local
+    # day. Time filters and ordering use these; start_date is only the upstream value they fall back to
+    starts_at = db.Column(db.DateTime(timezone=True), index=True, default=_default_starts_at)
+    ends_at = db.Column(db.DateTime(timezone=True), index=True, default=_default_ends_at)
     status = db.Column(db.String(20), default='active')
     session_status = db.Column(db.String(50), nullable=True)  # Stores Session_Status__c from Salesforce
     note = db.Column(db.Text)
@@ -45,43 +100,179 @@ class UpcomingEvent(db.Model):
                               backref=db.backref('event'),
                               lazy='dynamic')
 
-    def to_dict(self):
-        """Convert event to dictionary for JSON serialization"""
-        data = {
-            'id': self.id,
-            'Id': self.salesforce_id,
-            'Name': self.name,
-            'name': self.name,  # Add lowercase version for frontend compatibility
-            'Available_Slots__c': self.available_slots,
-            'available_slots': self.available_slots,  # Add lowercase version
-            'Filled_Volunteer_Jobs__c': self.filled_volunteer_jobs,
-            'filled_volunteer_jobs': self.filled_volunteer_jobs,  # Add lowercase version
-            'Date_and_Time_for_Cal__c': self.date_and_time,
-            'date_and_time': self.date_and_time,  # Add lowercase version
-            'Session_Type__c': self.event_type,
-            'event_type': self.event_type,  # Add lowercase version
-            'Registration_Link__c': self.registration_link,
-            'registration_link': self.registration_link,  # Add lowercase version
-            'Display_on_Website__c': self.display_on_website,
-            'display_on_website': self.display_on_website,  # Add lowercase version
-            'Start_Date__c': self.start_date.isoformat() if self.start_date else None,
-            'start_date': self.start_date.isoformat() if self.start_date else None,  # Add lowercase version
-            'note': self.note,
-            'status': self.status,
-            'source': self.source,
-            'spreadsheet_id': self.spreadsheet_id,
-            'presenter_name': self.presenter_name,
-            'presenter_organization': self.presenter_organization,
-            'presenter_location': self.presenter_location,
-            'topic_theme': self.topic_theme,
-            'teacher_name': self.teacher_name,
-            'school_name': self.school_name,
-            'school_level': self.school_level,
-            'district': self.district
-        }
-        # Replace schools with districts in the dictionary
-        data['districts'] = [mapping.district for mapping in self.districts]
-        return data
+    def to_dict(self, districts=None):
+        """
+        Convert event to dictionary for JSON serialization.
+
+        Args:
+            districts (list, optional): Pre-fetched district names for this event.
+                When omitted they are loaded with one query; use to_dict_list()
+                to serialize many events without a query per event.
+        """
+        if districts is None:
+            districts = [mapping.district for mapping in self.districts]
+        return event_dict(self, districts)
+
+    @classmethod
+    def districts_by_event(cls, event_ids):
+        """Map event id -> list of district names with a single query"""
+        districts = {event_id: [] for event_id in event_ids}
+        ids = list(districts)
+        # Chunk the IN list to stay under database bind-parameter limits
+        for start in range(0, len(ids), 1000):
+            rows = db.session.query(EventDistrictMapping.event_id, EventDistrictMapping.district).filter(
+                EventDistrictMapping.event_id.in_(ids[start:start + 1000])
+            ).order_by(EventDistrictMapping.event_id, EventDistrictMapping.created_at)
+            for event_id, district in rows:
+                districts[event_id].append(district)
+        return districts
+
+    @classmethod
+    def to_dict_list(cls, events):
+        """Serialize many events, loading all their districts in one query"""
+        events = list(events)
+        districts = cls.districts_by_event([event.id for event in events])
+        return [event.to_dict(districts=districts[event.id]) for event in events]
+
+    @classmethod
+    def rows(cls, query, fieldset='full'):
+        """
+        The events a query matches as read-only rows (models.event_row) of a fieldset's columns.
+
+        Raises:
+            KeyError: If fieldset is not one of FIELDSETS
+        """
+        row_class = ROW_CLASSES[fieldset]
+        columns = [getattr(cls, column) for column in FIELDSETS[fieldset]]
+        return [row_class(*row) for row in query.with_entities(*columns)]
+
+    @classmethod
+    def list_dicts(cls, query, fieldset='full'):
+        """
+        Serialize the events a query matches without loading ORM objects.
+
+        Same dictionaries as to_dict_list() for the 'full' fieldset; list
+        endpoints use this, writes keep using ORM objects.
+        """
+        rows = cls.rows(query, fieldset)
+        districts = cls.districts_by_event([row.id for row in rows])
+        return [event_dict(row, districts[row.id], FIELDSETS[fieldset]) for row in rows]
+
+    @classmethod
+    def chronological(cls):
+        """ORDER BY for event lists: by start time, undated events last"""
+        return cls.starts_at.asc().nulls_last(), cls.id
+
+    @staticmethod
+    def parse_times(date_and_time, start_date):
+        """(starts_at, ends_at) for an event's date_and_time, or (None, None) when it has no date"""
+        times = parse_event_times(date_and_time, start_date,
+                                  current_app.config.get('EVENT_TIMEZONE', DEFAULT_TIMEZONE))
+        return (times.starts_at, times.ends_at) if times else (None, None)
+
+    @classmethod
+    def derived_fields(cls, date_and_time, start_date, event_type, source):
+        """Columns computed from the upstream fields during upserts and backfills"""
+        starts_at, ends_at = cls.parse_times(date_and_time, start_date)
+        category = classify(event_type, source,
+                            current_app.config.get('EVENT_CATEGORY_RULES', DEFAULT_CATEGORY_RULES))
+        return {'starts_at': starts_at, 'ends_at': ends_at, 'category': category}
+
+    @classmethod
+    def backfill_derived(cls, batch_size=500, only_missing=True):
+        """
+        Fill starts_at/ends_at and category from the upstream fields, committing per batch.
+
+        Args:
+            batch_size (int): Events loaded and committed at a time
+            only_missing (bool): Skip events that already have a category and times
+
+        Returns:
+            int: Number of events that changed
+        """
+        updated, last_id = 0, 0
+        while True:
+            query = cls.query.filter(cls.id > last_id)
+            if only_missing:
+                query = query.filter(db.or_(cls.starts_at.is_(None), cls.category.is_(None)))
+            batch = query.order_by(cls.id).limit(batch_size).all()
+            if not batch:
+                return updated
+            changed = []
+            for event in batch:
+                derived = cls.derived_fields(event.date_and_time, event.start_date, event.event_type, event.source)
+                for key, value in derived.items():
+                    setattr(event, key, value)
+                if _has_changes(event):
+                    changed.append(event)
+            db.session.flush()
+            cls.log_changes('update', changed)
+            db.session.commit()
+            updated += len(changed)
+            last_id = batch[-1].id
+
+    @classmethod
+    def log_changes(cls, op, events):
+        """Append events to the change log as 'insert' or 'update'. The caller commits."""
+        if events:
+            EventChange.record(op, cls.to_dict_list(events))
+
+    @classmethod
+    def _matching_ids(cls, query):
+        return query.with_entities(cls.id, cls.salesforce_id).all()
+
+    @classmethod
+    def delete_logged(cls, query):
+        """Delete the events a query matches and log each delete. The caller commits."""
+        rows = cls._matching_ids(query)
+        ids = [event_id for event_id, _ in rows]
+        for start in range(0, len(ids), 1000):
+            cls.query.filter(cls.id.in_(ids[start:start + 1000])).delete()
+        EventChange.record_deletes(rows)
+        return len(rows)
+
+    @classmethod
+    def update_logged(cls, query, values):
+        """Bulk-update the events a query matches and log them. The caller commits."""
+        ids = [event_id for event_id, _ in cls._matching_ids(query)]
+        for start in range(0, len(ids), 1000):
+            cls.query.filter(cls.id.in_(ids[start:start + 1000])).update(values)
+        for start in range(0, len(ids), 1000):
+            cls.log_changes('update', cls.query.filter(cls.id.in_(ids[start:start + 1000])).all())
+        return len(ids)
+
+    @classmethod
+    def move_to_history(cls, query, reason, batch_size=500):
+        """
+        Move the events a query matches to event_history with their district
+        names, and log each as a delete. Commits per batch, so a large move
+        never holds the tables locked for long.
+
+        Args:
+            query: Events to move
+            reason (str): Recorded with each entry ('past', 'archived' or 'removed')
+            batch_size (int): Events moved per transaction
+
+        Returns:
+            int: Number of events moved
+        """
+        moved = 0
+        while True:
+            # Moved events no longer match, so each pass picks up the next batch
+            batch = query.order_by(cls.id).limit(batch_size).all()
+            if not batch:
+                return moved
+            ids = [event.id for event in batch]
+            districts = cls.districts_by_event(ids)
+            moved_at = datetime.now(timezone.utc)
+            db.session.execute(db.insert(EventHistory), [
+                EventHistory.values_for(event, districts[event.id], reason, moved_at) for event in batch
+            ])
+            EventDistrictMapping.query.filter(EventDistrictMapping.event_id.in_(ids)).delete(synchronize_session=False)
+            cls.query.filter(cls.id.in_(ids)).delete(synchronize_session=False)
+            EventChange.record_deletes([(event.id, event.salesforce_id) for event in batch])
+            db.session.commit()
+            moved += len(batch)
 
     @validates('available_slots', 'filled_volunteer_jobs')
     def validate_slots(self, key, value):
@@ -138,6 +329,7 @@ class UpcomingEvent(db.Model):
         """
         new_count = 0
         updated_count = 0
+        inserted, changed = [], []
         
         for record in sf_data:
             existing = cls.query.filter_by(salesforce_id=record['Id']).first()
@@ -162,6 +354,8 @@ class UpcomingEvent(db.Model):
                 'start_date': start_date,
                 'session_status': record.get('Session_Status__c')
             }
+            event_data.update(cls.derived_fields(event_data['date_and_time'], start_date,
+                                                 event_data['event_type'], 'salesforce'))
             
             if existing:
                 # Don't include display_on_website in the update
@@ -175,6 +369,8 @@ class UpcomingEvent(db.Model):
                 
                 # Explicitly preserve display_on_website
                 updated_count += 1
+                if _has_changes(existing):
+                    changed.append(existing)
             else:
                 # Only set display_on_website for new records
                 if record.get('Display_on_Website__c') == 'Yes':
@@ -183,8 +379,12 @@ class UpcomingEvent(db.Model):
                     event_data['display_on_website'] = False
                 new_event = cls(**event_data)
                 db.session.add(new_event)
+                inserted.append(new_event)
                 new_count += 1
         
+        db.session.flush()
+        cls.log_changes('insert', inserted)
+        cls.log_changes('update', changed)
         db.session.commit()
         return (new_count, updated_count)
 
@@ -206,6 +406,7 @@ class UpcomingEvent(db.Model):
         new_count = 0
         updated_count = 0
         skipped_count = 0
+        inserted, changed = [], []
         
         for record in sheet_data:
             # Skip header rows
@@ -277,18 +478,25 @@ class UpcomingEvent(db.Model):
                 'filled_volunteer_jobs': 0,  # Default for virtual events
                 'note': None  # No note needed for virtual events
             }
+            event_data.update(cls.derived_fields(date_and_time, start_date, event_data['event_type'], 'virtual'))
             
             if existing:
                 # Update existing virtual event
                 for key, value in event_data.items():
                     setattr(existing, key, value)
                 updated_count += 1
+                if _has_changes(existing):
+                    changed.append(existing)
             else:
                 # Create new virtual event
                 new_event = cls(**event_data)
                 db.session.add(new_event)
+                inserted.append(new_event)
                 new_count += 1
         
+        db.session.flush()
+        cls.log_changes('insert', inserted)
+        cls.log_changes('update', changed)
         db.session.commit()
         return (new_count, updated_count, skipped_count)
 
@@ -33,6 +33,11 @@ class User(db.Model, UserMixin):
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), 
                            onupdate=lambda: datetime.now(timezone.utc), nullable=False)
 
+    # Keyset pagination order for the incremental sync export
+    __table_args__ = (
+        db.Index('ix_users_updated_at_id', 'updated_at', 'id'),
+    )
+
     def __init__(self, **kwargs):
         """
         Initialize a new user instance.
@@ -94,11 +99,13 @@ class User(db.Model, UserMixin):
         if self.api_token != token:
             return False
             
-        # Convert token_expiry to UTC if it's naive
-        if self.token_expiry.tzinfo is None:
-            self.token_expiry = self.token_expiry.replace(tzinfo=timezone.utc)
+        # Treat a naive token_expiry as UTC without dirtying the row (which
+        # would bump updated_at and make the user reappear in every sync delta)
+        token_expiry = self.token_expiry
+        if token_expiry.tzinfo is None:
+            token_expiry = token_expiry.replace(tzinfo=timezone.utc)
 
-        if datetime.now(timezone.utc) > self.token_expiry:
+        if datetime.now(timezone.utc) > token_expiry:
             return False
             
         return True
@@ -1,17 +1,21 @@
-from .auth import auth_bp
-from .main import main_bp
-from .dashboard import dashboard_bp
-from .upcoming_events import upcoming_events_bp
-from .dia import dia_events_bp
-from .school_mappings import bp as school_mappings_bp
-from .district import bp as district_bp
-from .api import api_bp
-from .sync import sync_bp
-from .virtual_events import virtual_events_bp
-
 __all__ = ['init_routes']
 
 def init_routes(app):
+    # Blueprints are imported here so importing the package stays cheap
+    from .auth import auth_bp
+    from .main import main_bp
+    from .dashboard import dashboard_bp
+    from .upcoming_events import upcoming_events_bp
+    from .dia import dia_events_bp
+    from .school_mappings import bp as school_mappings_bp
+    from .district import bp as district_bp
+    from .api import api_bp
+    from .sync import sync_bp
+    from .virtual_events import virtual_events_bp
+    from .metrics import metrics_bp
+    from .feeds import feeds_bp
+    from .calendar import calendar_bp
+
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(dashboard_bp)
@@ -21,4 +25,7 @@ def init_routes(app):
     app.register_blueprint(district_bp)
     app.register_blueprint(api_bp)
     app.register_blueprint(sync_bp)
-    app.register_blueprint(virtual_events_bp)
\ No newline at end of file
+    app.register_blueprint(virtual_events_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(feeds_bp)
+    app.register_blueprint(calendar_bp, url_prefix='/events')
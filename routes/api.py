@@ -1,8 +1,13 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 from flask_login import current_user, login_required
 from models import db
+from models.event_change import EventChange
+from models.event_history import EventHistory
 from models.user import User, SecurityLevel
+from services.user_bulk_update import BulkUserUpdater, DEFAULT_CHUNK_SIZE as BULK_CHUNK_SIZE
 from functools import wraps
+import base64
+import json
 import logging
 from datetime import datetime, timezone, timedelta
 
@@ -12,6 +17,15 @@ api_bp = Blueprint('api', __name__, url_prefix='/api/v1')
 # Create a logger for API actions
 logger = logging.getLogger('api')
 
+NDJSON_MIMETYPE = 'application/x-ndjson'
+SYNC_PAGE_SIZE = 1000
+SYNC_MAX_PAGE_SIZE = 5000
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
+HISTORY_PAGE_SIZE = 100
+HISTORY_MAX_PAGE_SIZE = 1000
+HISTORY_REASONS = ('past', 'archived', 'removed')
+
 def token_required(f):
     """Decorator to check if API token is valid"""
     @wraps(f)
@@ -85,17 +99,115 @@ def refresh_token(user):
 @token_required
 def sync_users(user):
     """
-    Get all users for synchronization.
+    Get users for synchronization.
     Only admin users can access all user data.
+
+    Query parameters:
+    - updated_since: ISO timestamp; only users updated at or after it are returned
+    - after: Keyset cursor from a previous page (next_cursor)
+    - limit: Page size for paged JSON responses, or the fetch size when streaming
+    - format: 'ndjson' to stream one user per line (also via Accept: application/x-ndjson)
+
+    Without any of these, returns every user in one JSON document as before.
     """
     if not user.has_permission_level(SecurityLevel.ADMIN):
         return jsonify({'error': 'Insufficient permissions'}), 403
-    
-    users = User.query.all()
+
+    try:
+        updated_since = _parse_timestamp(request.args.get('updated_since'))
+        cursor = _decode_cursor(request.args.get('after'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    limit = request.args.get('limit', type=int)
+    page_size = min(limit or SYNC_PAGE_SIZE, SYNC_MAX_PAGE_SIZE)
+    wants_ndjson = (request.args.get('format') == 'ndjson'
+                    or request.accept_mimetypes.best == NDJSON_MIMETYPE)
+
+    if wants_ndjson:
+        return Response(
+            stream_with_context(_stream_sync_users(updated_since, cursor, page_size)),
+            mimetype=NDJSON_MIMETYPE
+        )
+
+    if updated_since is None and cursor is None and limit is None:
+        users = User.query.all()
+        return jsonify({
+            'users': [user.to_dict() for user in users]
+        }), 200
+
+    page = _sync_users_page(updated_since, cursor, page_size)
+    next_cursor = _encode_cursor(page[-1]) if len(page) == page_size else None
     return jsonify({
-        'users': [user.to_dict() for user in users]
+        'users': [user.to_dict() for user in page],
+        'next_cursor': next_cursor,
+        'watermark': _watermark(page[-1]) if page else None
     }), 200
 
+def _sync_users_page(updated_since, cursor, page_size):
+    """Fetch one keyset page of users ordered by (updated_at, id)"""
+    query = User.query
+    if updated_since is not None:
+        query = query.filter(User.updated_at >= updated_since)
+    if cursor is not None:
+        cursor_updated_at, cursor_id = cursor
+        query = query.filter(db.or_(
+            User.updated_at > cursor_updated_at,
+            db.and_(User.updated_at == cursor_updated_at, User.id > cursor_id)
+        ))
+    return query.order_by(User.updated_at, User.id).limit(page_size).all()
+
+def _stream_sync_users(updated_since, cursor, page_size):
+    """
+    Yield users as NDJSON lines, one keyset page at a time, so memory stays
+    flat regardless of how many users match. The last line is a trailer
+    holding the watermark to pass as updated_since on the next sync.
+    """
+    count = 0
+    watermark = None
+    while True:
+        page = _sync_users_page(updated_since, cursor, page_size)
+        for row in page:
+            yield json.dumps(row.to_dict()) + '\n'
+        count += len(page)
+        if page:
+            cursor = (page[-1].updated_at, page[-1].id)
+            watermark = _watermark(page[-1])
+        # Drop the page from the identity map before fetching the next one
+        for row in page:
+            db.session.expunge(row)
+        if len(page) < page_size:
+            break
+    yield json.dumps({'_sync': {'count': count, 'watermark': watermark}}) + '\n'
+
+def _watermark(row):
+    return row.updated_at.isoformat()
+
+def _parse_timestamp(value):
+    """Parse an ISO 8601 timestamp into the naive UTC form stored in the database"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid timestamp: {value}")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _encode_cursor(row):
+    raw = f"{row.updated_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(value):
+    if not value:
+        return None
+    try:
+        updated_at, user_id = base64.urlsafe_b64decode(value.encode()).decode().rsplit('|', 1)
+        return _parse_timestamp(updated_at), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
 @api_bp.route('/users/<int:user_id>', methods=['GET'])
 @token_required
 def get_user(user, user_id):
@@ -119,6 +231,11 @@ def update_users(user):
     """
     Update or create users from sync data.
     Only admins can perform this operation.
+
+    Send "mode": "bulk" (optionally with "chunk_size") to resolve usernames
+    in chunked IN queries, write with bulk statements, commit per chunk and
+    get a per-row "results" list back. Bulk rows write the user columns
+    listed in services.user_bulk_update, including is_admin.
     """
     if not user.has_permission_level(SecurityLevel.ADMIN):
         return jsonify({'error': 'Insufficient permissions'}), 403
@@ -128,6 +245,15 @@ def update_users(user):
         return jsonify({'error': 'Invalid request format'}), 400
     
     user_data_list = data.get('users')
+
+    if data.get('mode') == 'bulk':
+        chunk_size = data.get('chunk_size', current_app.config.get('USER_BULK_CHUNK_SIZE', BULK_CHUNK_SIZE))
+        if isinstance(chunk_size, bool) or not isinstance(chunk_size, int) or chunk_size < 1:
+            return jsonify({'error': 'chunk_size must be a positive integer'}), 400
+        results = BulkUserUpdater(chunk_size=chunk_size).apply(user_data_list)
+        logger.info(f"Bulk user update: {results['created']} created, {results['updated']} updated, "
+                    f"{results['unchanged']} unchanged, {results['failed']} failed")
+        return jsonify(results), 200
     results = {
         'created': 0,
         'updated': 0,
@@ -165,6 +291,82 @@ def update_users(user):
     db.session.commit()
     return jsonify(results), 200 
 
+@api_bp.route('/events/changes', methods=['GET'])
+@token_required
+def event_changes(user):
+    """
+    Event inserts, updates and deletes in the order they were committed, for mirrors.
+
+    Query parameters:
+    - since: Cursor from a previous response (next_cursor); omit it to get
+      the current cursor without changes, then load the full event list
+    - limit: Page size
+
+    Keep requesting with next_cursor while has_more is true. A cursor older
+    than the compacted log answers 410; load the full list and start over
+    from the current cursor.
+    """
+    since = request.args.get('since', type=int)
+    if since is None:
+        if 'since' in request.args:
+            return jsonify({'error': 'Invalid cursor'}), 400
+        return jsonify({'changes': [], 'next_cursor': EventChange.latest_cursor(), 'has_more': False}), 200
+    if since < EventChange.horizon():
+        return jsonify({
+            'error': 'Cursor is older than the change log; reload the full event list',
+            'next_cursor': EventChange.latest_cursor()
+        }), 410
+
+    limit = min(request.args.get('limit', CHANGES_PAGE_SIZE, type=int) or CHANGES_PAGE_SIZE, CHANGES_MAX_PAGE_SIZE)
+    changes, has_more = EventChange.page(since, limit)
+    return jsonify({
+        'changes': [change.to_dict() for change in changes],
+        'next_cursor': changes[-1].id if changes else since,
+        'has_more': has_more
+    }), 200
+
+@api_bp.route('/events/history', methods=['GET'])
+@token_required
+def event_history(user):
+    """
+    Events moved out of the live list (past, long-archived or removed from
+    Salesforce), newest move first.
+
+    Query parameters:
+    - from, to: ISO dates or timestamps bounding starts_at (inclusive; UTC unless an offset is given)
+    - category, source, salesforce_id, reason: exact filters
+    - before: Cursor from a previous response (next_cursor)
+    - limit: Page size
+    """
+    try:
+        start = _parse_timestamp(request.args.get('from'))
+        end = _parse_timestamp(request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    before = request.args.get('before', type=int)
+    if before is None and 'before' in request.args:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    reason = request.args.get('reason')
+    if reason is not None and reason not in HISTORY_REASONS:
+        return jsonify({'error': f"reason must be one of {', '.join(HISTORY_REASONS)}"}), 400
+
+    query = EventHistory.query
+    if start is not None:
+        query = query.filter(EventHistory.starts_at >= start.replace(tzinfo=timezone.utc))
+    if end is not None:
+        query = query.filter(EventHistory.starts_at <= end.replace(tzinfo=timezone.utc))
+    for key in ('category', 'source', 'salesforce_id', 'reason'):
+        if request.args.get(key):
+            query = query.filter(getattr(EventHistory, key) == request.args[key])
+
+    limit = min(request.args.get('limit', HISTORY_PAGE_SIZE, type=int) or HISTORY_PAGE_SIZE, HISTORY_MAX_PAGE_SIZE)
+    entries, has_more = EventHistory.page(query, before, limit)
+    return jsonify({
+        'events': [entry.to_dict() for entry in entries],
+        'next_cursor': entries[-1].id if has_more else None,
+        'has_more': has_more
+    }), 200
+
 @api_bp.route('/test/events', methods=['GET'])
 def test_events():
     """Test API endpoint with static event data for development/testing"""
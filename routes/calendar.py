@@ -0,0 +1,55 @@
+from flask import Blueprint, Response, request
+from services.db_routing import replica_read
+from services.feed_cache import snapshot_cache
+from services.ical import snapshot_calendar
+
+calendar_bp = Blueprint('calendar', __name__)
+
+CALENDAR_MIMETYPE = 'text/calendar'
+
+def _calendar_response(snapshot_name, key, name, select):
+    """Calendar of a snapshot's selected events; 304 when the client's ETag still matches"""
+    snapshot = snapshot_cache.get(snapshot_name)
+    body, etag = snapshot_calendar(snapshot, key, name, select)
+    response = Response(body, mimetype=CALENDAR_MIMETYPE)
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = 300
+    filename = key[-1] if key[-1] else 'events'
+    response.headers['Content-Disposition'] = f'inline; filename="{filename}.ics"'
+    return response.make_conditional(request)
+
+# Subscribable calendars (accessible via /events/calendar/...)
+@calendar_bp.route('/calendar/events.ics')
+@replica_read
+def all_events_calendar():
+    """Every event shown on the website"""
+    return _calendar_response('displayed_events', ('all', ''), 'PREP-KC Volunteer Events', lambda event: True)
+
+@calendar_bp.route('/calendar/dia.ics')
+@replica_read
+def dia_calendar():
+    """Upcoming DIA events with open slots"""
+    return _calendar_response('dia_events', ('dia', 'dia'), 'PREP-KC DIA Events', lambda event: True)
+
+@calendar_bp.route('/calendar/districts/<string:district>.ics')
+@replica_read
+def district_calendar(district):
+    """Displayed events linked to a district (EventDistrictMapping)"""
+    return _calendar_response('displayed_events', ('district', district), f'PREP-KC Events: {district}',
+                              lambda event: district in event['districts'])
+
+@calendar_bp.route('/calendar/types/<string:event_type>.ics')
+@replica_read
+def event_type_calendar(event_type):
+    """Displayed events of one session type"""
+    wanted = event_type.casefold()
+    return _calendar_response('displayed_events', ('type', wanted), f'PREP-KC {event_type} Events',
+                              lambda event: (event['event_type'] or '').casefold() == wanted)
+
+@calendar_bp.route('/calendar/categories/<string:category>.ics')
+@replica_read
+def category_calendar(category):
+    """Displayed events of one category (services.event_categories), e.g. in_person or virtual"""
+    return _calendar_response('displayed_events', ('category', category), f'PREP-KC Events: {category}',
+                              lambda event: event['category'] == category)
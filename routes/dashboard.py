@@ -1,10 +1,10 @@
 from flask import Blueprint, render_template, jsonify, request
 from flask_login import login_required
 from models.upcoming_event import UpcomingEvent
-from models.school_mapping import SchoolMapping
 from models.event_district_mapping import EventDistrictMapping
 from models import db
-from sqlalchemy import distinct
+from services.live_updates import publish_event
+from services.school_directory import school_directory
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
@@ -12,10 +12,10 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @login_required
 def dashboard():
     # Show active events by default, excluding virtual events
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(
+    events = UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(
         status='active',
         source='salesforce'  # Only show Salesforce events, exclude virtual events
-    ).order_by(UpcomingEvent.start_date).all()]
+    ).order_by(*UpcomingEvent.chronological()))
     return render_template('dashboard.html', initial_events=events)
 
 @dashboard_bp.route('/api/districts/search')
@@ -24,17 +24,8 @@ def search_districts():
     if not query or len(query) < 2:
         return jsonify([])
     
-    # Get unique districts from school mappings that match the query
-    districts = SchoolMapping.query.with_entities(
-        distinct(SchoolMapping.district)
-    ).filter(
-        SchoolMapping.district.ilike(f'%{query}%')
-    ).all()
-    
-    # Extract district names from the result tuples
-    district_names = [district[0] for district in districts]
-    
-    return jsonify(sorted(district_names))
+    # Unique districts from school mappings that match the query (already sorted)
+    return jsonify(school_directory().search_districts(query))
 
 @dashboard_bp.route('/events/api/events/<string:event_id>/districts', methods=['POST'])
 @login_required
@@ -59,6 +50,8 @@ def add_district_to_event(event_id):
             # Create new mapping
             mapping = EventDistrictMapping(event_id=event.id, district=district)
             db.session.add(mapping)
+            UpcomingEvent.log_changes('update', [event])
+            publish_event(event)
             db.session.commit()
         
         # Get all districts for this event
@@ -88,6 +81,8 @@ def remove_district_from_event(event_id, district):
         
         if mapping:
             db.session.delete(mapping)
+            UpcomingEvent.log_changes('update', [event])
+            publish_event(event)
             db.session.commit()
         
         # Get remaining districts for this event
@@ -106,25 +101,25 @@ def remove_district_from_event(event_id, district):
 @login_required
 def dashboard_archive():
     # Show archived events, excluding virtual events
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(
+    events = UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(
         status='archived',
         source='salesforce'  # Only show Salesforce events, exclude virtual events
-    ).order_by(UpcomingEvent.start_date).all()]
+    ).order_by(*UpcomingEvent.chronological()))
     return render_template('dashboard.html', initial_events=events, view_type='archive')
 
 @dashboard_bp.route('/api/events/archive')
 @login_required
 def get_archived_events():
     # API endpoint to get archived events, excluding virtual events
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(
+    events = UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(
         status='archived',
         source='salesforce'  # Only show Salesforce events, exclude virtual events
-    ).order_by(UpcomingEvent.start_date).all()]
+    ).order_by(*UpcomingEvent.chronological()))
     return jsonify(events)
 
 @dashboard_bp.route('/virtual-events')
 @login_required
 def virtual_events_dashboard():
     # Show virtual events
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(source='virtual').order_by(UpcomingEvent.start_date).all()]
+    events = UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(source='virtual').order_by(*UpcomingEvent.chronological()))
     return render_template('virtual_events_dashboard.html', initial_events=events)
\ No newline at end of file
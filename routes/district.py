@@ -1,59 +1,53 @@
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request
 from models.school_mapping import SchoolMapping
 from models.upcoming_event import UpcomingEvent
+from models.event_row import FIELDSETS
 from models.event_district_mapping import EventDistrictMapping
-from sqlalchemy import distinct
+from sqlalchemy import case, func
 from models import db
+from services.db_routing import replica_read
 
 bp = Blueprint('district', __name__)
 
 @bp.route('/districts')
 def list_districts():
     """Show list of all districts with their linked event counts"""
-    # Get unique districts from event district mappings
-    districts = db.session.query(distinct(EventDistrictMapping.district)).order_by(EventDistrictMapping.district).all()
-    districts = [d[0] for d in districts]  # Extract district names from tuples
-    
-    # For each district, get the count of all linked events
-    district_data = []
-    for district in districts:
-        # Get total events count (both visible and non-visible)
-        total_events = EventDistrictMapping.query.join(
-            UpcomingEvent, 
-            EventDistrictMapping.event_id == UpcomingEvent.id
-        ).filter(
-            EventDistrictMapping.district == district
-        ).count()
-        
-        # Get visible events count
-        visible_events = EventDistrictMapping.query.join(
-            UpcomingEvent, 
-            EventDistrictMapping.event_id == UpcomingEvent.id
-        ).filter(
-            EventDistrictMapping.district == district,
-            UpcomingEvent.display_on_website == True
-        ).count()
-        
-        district_data.append({
-            'name': district,
-            'event_count': total_events,
-            'visible_event_count': visible_events
-        })
+    # Count linked events (all and visible) for every district in one grouped query
+    rows = db.session.query(
+        EventDistrictMapping.district,
+        func.count(UpcomingEvent.id),
+        func.sum(case((UpcomingEvent.display_on_website == True, 1), else_=0))
+    ).outerjoin(
+        UpcomingEvent,
+        EventDistrictMapping.event_id == UpcomingEvent.id
+    ).group_by(
+        EventDistrictMapping.district
+    ).order_by(EventDistrictMapping.district).all()
+
+    district_data = [{
+        'name': district,
+        'event_count': total_events,
+        'visible_event_count': int(visible_events or 0)
+    } for district, total_events, visible_events in rows]
     
     return render_template('districts/districts.html', districts=district_data)
 
 @bp.route('/api/districts/<string:district_name>/events')
+@replica_read
 def district_events_api(district_name):
-    """API endpoint to get events for a specific district"""
+    """API endpoint to get events for a specific district (?fields=summary for the lean fieldset)"""
+    fieldset = request.args.get('fields', 'full')
+    if fieldset not in FIELDSETS:
+        return jsonify({'error': f"fields must be one of: {', '.join(FIELDSETS)}"}), 400
     events = UpcomingEvent.query.join(
         EventDistrictMapping,
         UpcomingEvent.id == EventDistrictMapping.event_id
     ).filter(
         EventDistrictMapping.district == district_name
-    ).order_by(UpcomingEvent.start_date).all()
+    ).order_by(*UpcomingEvent.chronological())
     
-    # Convert to dictionary format using the model's to_dict method
-    event_list = [event.to_dict() for event in events]
+    # Selected columns only, as plain rows (models.event_row)
+    event_list = UpcomingEvent.list_dicts(events, fieldset)
     
     return jsonify(event_list)
 
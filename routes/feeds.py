@@ -0,0 +1,25 @@
+from flask import Blueprint, abort, current_app, request, send_from_directory
+from services.static_feeds import feeds_dir
+
+feeds_bp = Blueprint('feeds', __name__)
+
+# Precompressed variant suffix per content coding, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+@feeds_bp.route('/feeds/<path:name>')
+def static_feed(name):
+    """Serve a published feed file, precompressed when the client accepts it"""
+    if not name.endswith('.json'):
+        abort(404)
+    directory = feeds_dir()
+    max_age = current_app.config.get('STATIC_FEEDS_MAX_AGE', 60)
+    for coding, suffix in ENCODINGS:
+        if request.accept_encodings[coding] and (directory / (name + suffix)).is_file():
+            response = send_from_directory(directory, name + suffix, mimetype='application/json',
+                                           max_age=max_age)
+            response.content_encoding = coding
+            break
+    else:
+        response = send_from_directory(directory, name, mimetype='application/json', max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,42 @@
+from datetime import datetime
+from flask import Blueprint, Response, abort, current_app, render_template, request
+from flask_login import current_user, login_required
+from services.metrics import CONTENT_TYPE, default_registry, render_text
+
+metrics_bp = Blueprint('metrics', __name__)
+
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+@metrics_bp.route('/metrics')
+def metrics():
+    """
+    Expose request, SQL and sync metrics in Prometheus text format.
+
+    With METRICS_TOKEN set, scrapers send it as a bearer token; without it,
+    only local requests (a sidecar or an SSH tunnel) are answered.
+    """
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    if not token and request.remote_addr not in LOCAL_ADDRESSES:
+        return Response('Forbidden: set METRICS_TOKEN to scrape remotely\n', status=403, mimetype='text/plain')
+
+    return Response(render_text(default_registry.collect()), content_type=CONTENT_TYPE)
+
+@metrics_bp.route('/admin/slow-queries')
+@login_required
+def slow_queries():
+    """Latest slow statements with their plans (admins only)"""
+    if not current_user.is_admin:
+        abort(403)
+
+    slow_query_log = current_app.extensions.get('slow_query_log')
+    entries, shapes = [], []
+    if slow_query_log is not None:
+        entries = slow_query_log.collect()
+        for entry in entries:
+            entry['recorded_at'] = datetime.fromtimestamp(entry['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+        shapes = slow_query_log.top_shapes()
+
+    return render_template('slow_queries.html', slow_query_log=slow_query_log,
+                           entries=entries, shapes=shapes)
@@ -3,6 +3,8 @@ from pathlib import Path
 from models import db
 from models.school_mapping import SchoolMapping
 from flask_login import login_required
+from services.job_lock import sync_endpoint
+from services.school_directory import school_directory
 import os
 
 bp = Blueprint('school_mappings', __name__)
@@ -17,17 +19,33 @@ MAPPINGS_FILE = Path(os.getenv('SCHOOL_MAPPINGS_PATH', BASE_DIR / 'data' / 'scho
 def get_mappings():
     """Get all school mappings from database"""
     try:
-        mappings = SchoolMapping.query.all()
-        return jsonify([mapping.to_dict() for mapping in mappings])
+        return jsonify(list(school_directory().schools))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/api/school-mappings/sync', methods=['POST'])
 def sync_mappings():
     """Sync mappings from CSV to database"""
+    return sync_endpoint('school_mappings', sync_school_mappings)
+
+def sync_school_mappings():
+    """
+    Replace the school mappings with the CSV contents.
+
+    Shared by the endpoint and the scheduler.
+
+    Returns:
+        tuple: (result dict, HTTP status code)
+    """
     try:
         # Load mappings from CSV
         csv_mappings = SchoolMapping.load_from_csv(MAPPINGS_FILE)
+
+        # Rows added or removed by this sync, so callers can tell whether anything changed
+        previous = set(SchoolMapping.query.with_entities(
+            SchoolMapping.name, SchoolMapping.district, SchoolMapping.parent_salesforce_id
+        ))
+        current = {(m.name, m.district, m.parent_salesforce_id) for m in csv_mappings}
         
         # Clear existing mappings
         SchoolMapping.query.delete()
@@ -40,20 +58,21 @@ def sync_mappings():
         db.session.commit()
         
         # Return the loaded mappings
-        return jsonify({
+        return {
+            'success': True,
             'message': f'Successfully synced {len(csv_mappings)} school mappings to database',
+            'changed_count': len(previous ^ current),
             'data': [mapping.to_dict() for mapping in csv_mappings]
-        })
+        }, 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
+        return {'success': False, 'error': str(e)}, 500
 
 @bp.route('/api/school-mappings/district/<district>', methods=['GET'])
 def get_schools_by_district(district):
     """Get all schools for a specific district from database"""
     try:
-        mappings = SchoolMapping.query.filter_by(district=district).all()
-        return jsonify([mapping.to_dict() for mapping in mappings])
+        return jsonify(school_directory().schools_in(district))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1,10 +1,12 @@
-from flask import Blueprint, jsonify, current_app
+from datetime import datetime, timedelta
+from flask import Blueprint, jsonify, current_app, request
 from flask_login import login_required
 from models import db
-from models.user import User
-import requests
-import logging
-import os
+from models.job_run import JobRun
+from models.sync_state import SyncState
+from services.job_lock import sync_endpoint
+from services.metrics import time_phase
+from services.user_sync import DEFAULT_CHUNK_SIZE, reconcile_users
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,133 +14,70 @@ load_dotenv()
 
 sync_bp = Blueprint('sync', __name__)
 
+USER_SYNC_WATERMARK_KEY = 'polaris_users_watermark'
+
 @sync_bp.route('/sync_users', methods=['POST'])
 @login_required
 def sync_users():
     """
     Sync users from the external source to the local database.
+
+    Only users changed since the last successful sync are requested; pass
+    ?full=1 to pull every user.
+    """
+    full = bool(request.args.get('full', type=int))
+    return sync_endpoint('polaris_users', lambda: sync_polaris_users(full=full))
+
+def sync_polaris_users(full=False):
+    """
+    Pull changed users from Polaris and reconcile them with local users.
+
+    Shared by the endpoint and the scheduler.
+
+    Returns:
+        tuple: (result dict, HTTP status code)
     """
+    # Deferred so requests is not imported at worker startup
+    from services.polaris_client import PolarisAuthError, PolarisClient
+
     try:
-        # Get credentials from environment variables
-        sync_username = os.getenv('SYNC_USERNAME')
-        sync_password = os.getenv('SYNC_PASSWORD')
+        client = PolarisClient.from_config(current_app.config)
 
-        if not sync_username or not sync_password:
+        if not client.username or not client.password:
             error_message = "Sync credentials not found in environment variables"
             current_app.logger.error(error_message)
-            return jsonify({'success': False, 'error': error_message}), 500
-
-        # Step 1: Generate the API token
-        token_response = requests.post(
-            'https://polaris-prepkc.pythonanywhere.com/api/v1/token',
-            headers={'Content-Type': 'application/json'},
-            json={
-                'username': sync_username,
-                'password': sync_password
-            }
-        )
-        token_response.raise_for_status()
-        token_data = token_response.json()
-        api_token = token_data.get('token')
-
-        if not api_token:
-            return jsonify({'success': False, 'error': 'Failed to obtain API token'}), 401
-
-        # Step 2: Fetch users from the external API with the token
-        headers = {
-            'Content-Type': 'application/json',
-            'X-API-Token': api_token
-        }
-        response = requests.get('https://polaris-prepkc.pythonanywhere.com/api/v1/users/sync', headers=headers)
-        response.raise_for_status()
-        external_users = response.json().get('users', [])
-
-        # Track statistics
-        stats = {
-            'created': 0,
-            'updated': 0,
-            'skipped': 0
-        }
-
-        # Process each user
-        for user_data in external_users:
-            try:
-                # Basic validation
-                if not all(key in user_data for key in ['username', 'email', 'password_hash']):
-                    current_app.logger.warning(f"Skipping user {user_data.get('username', 'unknown')}: Missing required fields")
-                    stats['skipped'] += 1
-                    continue
-
-                incoming_username = user_data['username']
-                incoming_email = user_data['email']
-
-                # Find existing user by email and username
-                user_by_email = User.query.filter_by(email=incoming_email).first()
-                user_by_username = User.query.filter_by(username=incoming_username).first()
-
-                if user_by_email:
-                    # User found by email - primary update target
-                    update_username = True
-                    if user_by_username and user_by_email.id != user_by_username.id:
-                        # Username conflict: incoming username belongs to another user
-                        current_app.logger.warning(
-                            f"Updating user {user_by_email.username} (ID: {user_by_email.id}, Email: {incoming_email}). "
-                            f"Incoming username '{incoming_username}' conflicts with existing user ID {user_by_username.id}. "
-                            f"Username will NOT be updated."
-                        )
-                        update_username = False
-                        # Update other fields but skip username
-
-                    # Update existing user found by email
-                    if update_username:
-                        user_by_email.username = incoming_username
-                    # user_by_email.email = incoming_email # Email is the key we found it by, no need to update
-                    user_by_email.first_name = user_data.get('first_name')
-                    user_by_email.last_name = user_data.get('last_name')
-                    user_by_email.security_level = user_data.get('security_level', 0)
-                    user_by_email.password_hash = user_data['password_hash']
-
-                    if update_username:
-                         stats['updated'] += 1
-                         current_app.logger.info(f"Updated user: {user_by_email.username} (found by email: {incoming_email})")
-                    else:
-                         # Increment skipped or add a dedicated 'conflict' counter if needed
-                         stats['skipped'] += 1
-                         current_app.logger.info(f"Partially updated user (due to username conflict): {user_by_email.username} (found by email: {incoming_email})")
-
-                elif user_by_username:
-                    # User not found by email, but username already exists for a different user
-                    current_app.logger.warning(
-                        f"Skipping user creation for email {incoming_email}: "
-                        f"Username '{incoming_username}' already exists for user ID {user_by_username.id} with email {user_by_username.email}."
-                    )
-                    stats['skipped'] += 1
-                    # Do not proceed with creation
-
-                else:
-                    # No existing user found by email or username - safe to create
-                    new_user = User(
-                        username=incoming_username,
-                        email=incoming_email,
-                        password_hash=user_data['password_hash'],
-                        first_name=user_data.get('first_name'),
-                        last_name=user_data.get('last_name'),
-                        security_level=user_data.get('security_level', 0)
-                    )
-                    db.session.add(new_user)
-                    stats['created'] += 1
-                    current_app.logger.info(f"Created new user: {new_user.username}")
-
-            except Exception as user_error:
-                # Rollback changes for this specific user only if absolutely necessary,
-                # otherwise let the main rollback handle it.
-                # db.session.rollback() # Usually avoid rollback inside the loop unless essential
-                current_app.logger.error(f"Error processing user {user_data.get('username', 'unknown')}: {str(user_error)}")
-                stats['skipped'] += 1
-                continue # Continue to the next user
+            return {'success': False, 'error': error_message}, 500
+
+        # Resume from the stored watermark, overlapping a little so rows committed
+        # out of timestamp order upstream are not missed (reconciling is idempotent)
+        stored_watermark = SyncState.get_value(USER_SYNC_WATERMARK_KEY)
+        updated_since = None
+        if not full:
+            updated_since = _overlap_watermark(
+                stored_watermark,
+                current_app.config.get('USER_SYNC_WATERMARK_OVERLAP', 300)
+            )
+
+        # Stream changed users from Polaris over the shared HTTP session, then match
+        # them against local users in memory and write changes in bulk chunks
+        try:
+            with time_phase('polaris_users', 'fetch_and_reconcile'):
+                stats = reconcile_users(
+                    client.iter_users(updated_since=updated_since),
+                    chunk_size=current_app.config.get('USER_SYNC_CHUNK_SIZE', DEFAULT_CHUNK_SIZE),
+                    log=current_app.logger
+                )
+        except PolarisAuthError:
+            return {'success': False, 'error': 'Failed to obtain API token'}, 401
+
+        # Only advance the watermark when the stream completed with changes; an empty
+        # delta keeps the stored one, which updated_since has been stepped back from
+        if client.last_watermark:
+            SyncState.set_value(USER_SYNC_WATERMARK_KEY, client.last_watermark)
 
         # Commit changes to the database
-        db.session.commit()
+        with time_phase('polaris_users', 'commit'):
+            db.session.commit()
 
         success_message = (
             f"Sync completed successfully. "
@@ -148,14 +87,46 @@ def sync_users():
         )
         current_app.logger.info(success_message)
 
-        return jsonify({
+        return {
             'success': True,
             'message': success_message,
-            'stats': stats
-        }), 200
+            'stats': stats,
+            'incremental': updated_since is not None,
+            'watermark': client.last_watermark or stored_watermark
+        }, 200
 
     except Exception as e:
         db.session.rollback()
         error_message = f"Error syncing users: {str(e)}"
         current_app.logger.error(error_message)
-        return jsonify({'success': False, 'error': error_message}), 500
\ No newline at end of file
+        return {'success': False, 'error': error_message}, 500
+
+@sync_bp.route('/sync/jobs', methods=['GET'])
+@login_required
+def job_runs():
+    """Latest runs of every sync job, newest first (?job=<name> to filter, ?limit=N)"""
+    query = JobRun.query
+    if request.args.get('job'):
+        query = query.filter_by(job_name=request.args['job'])
+    limit = min(request.args.get('limit', 20, type=int), 200)
+    runs = query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit).all()
+    return jsonify([run.to_dict() for run in runs])
+
+@sync_bp.route('/sync/jobs/<int:run_id>', methods=['GET'])
+@login_required
+def job_status(run_id):
+    """Status of one sync run, e.g. the handle returned with a 409"""
+    run = db.session.get(JobRun, run_id)
+    if run is None:
+        return jsonify({'success': False, 'error': 'Job run not found'}), 404
+    return jsonify(run.to_dict())
+
+def _overlap_watermark(watermark, overlap_seconds):
+    """Step a stored ISO watermark back by the configured overlap"""
+    if not watermark:
+        return None
+    try:
+        return (datetime.fromisoformat(watermark) - timedelta(seconds=overlap_seconds)).isoformat()
+    except ValueError:
+        current_app.logger.warning(f"Ignoring invalid user sync watermark: {watermark}")
+        return None
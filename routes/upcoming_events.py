@@ -1,12 +1,17 @@
 from datetime import datetime, timedelta, timezone
 from flask import Blueprint, current_app, jsonify, request, render_template
 from flask_login import login_required
-from simple_salesforce import Salesforce, SalesforceAuthenticationFailed
 from sqlalchemy import or_
-from config import Config
 from models import db
 from models.upcoming_event import UpcomingEvent
 from models.school_mapping import SchoolMapping
+from models.event_district_mapping import EventDistrictMapping
+from services.db_routing import replica_read
+from services.feed_cache import register_snapshot, snapshot_data, snapshot_response
+from services.job_lock import sync_endpoint
+from services.live_updates import publish_event, stream_response
+from services.metrics import time_phase
+from services.static_feeds import publish_after_sync
 
 upcoming_events_bp = Blueprint('upcoming_events', __name__)
 
@@ -14,9 +19,9 @@ upcoming_events_bp = Blueprint('upcoming_events', __name__)
 @upcoming_events_bp.route('/sync_upcoming_events', methods=['POST'])
 @login_required
 def sync_upcoming_events_endpoint():
-    """HTTP endpoint for manual sync trigger"""
-    result = sync_upcoming_events()
-    return jsonify(result)
+    """HTTP endpoint for manual sync trigger (409 while a sync runs; ?wait=1 shares its result)"""
+    # The sync reports failures in its body, so it always answers 200
+    return sync_endpoint('salesforce_sessions', lambda: (sync_upcoming_events(), 200))
 
 def sync_upcoming_events():
     """Sync upcoming events from Salesforce"""
@@ -28,54 +33,65 @@ def sync_upcoming_events():
         print("Starting sync process...")
         
         # Archive events that are actually full (have filled jobs but no available slots)
-        archived_count = UpcomingEvent.query.filter(
-            UpcomingEvent.available_slots == 0,
-            UpcomingEvent.filled_volunteer_jobs > 0
-        ).update({'status': 'archived'})
-        
-        # Only delete events that are past their start date
-        deleted_count = UpcomingEvent.query.filter(
-            UpcomingEvent.start_date < yesterday
-        ).delete()
-        
-        db.session.commit()
+        with time_phase('salesforce', 'archive'):
+            archived_count = UpcomingEvent.update_logged(UpcomingEvent.query.filter(
+                UpcomingEvent.available_slots == 0,
+                UpcomingEvent.filled_volunteer_jobs > 0,
+                UpcomingEvent.status != 'archived'
+            ), {'status': 'archived'})
+            db.session.commit()
+
+        # Events that ended over a day ago, and events archived long ago, move to event_history
+        batch_size = current_app.config.get('EVENT_HISTORY_BATCH_SIZE', 500)
+        archived_before = datetime.now(timezone.utc) - timedelta(
+            seconds=current_app.config.get('EVENT_HISTORY_ARCHIVED_AFTER', 30 * 86400))
+        with time_phase('salesforce', 'move_past'):
+            deleted_count = UpcomingEvent.move_to_history(UpcomingEvent.query.filter(
+                UpcomingEvent.ends_at < yesterday
+            ), 'past', batch_size)
+            deleted_count += UpcomingEvent.move_to_history(UpcomingEvent.query.filter(
+                UpcomingEvent.status == 'archived',
+                UpcomingEvent.updated_at < archived_before
+            ), 'archived', batch_size)
         print(f"Archived {archived_count} full events")
-        print(f"Deleted {deleted_count} past events")
+        print(f"Moved {deleted_count} past and long-archived events to history")
 
-        # Salesforce connection
-        print("Connecting to Salesforce...")
-        sf = Salesforce(
-            username=Config.SF_USERNAME,
-            password=Config.SF_PASSWORD,
-            security_token=Config.SF_SECURITY_TOKEN,
-            domain='login'
-        )
+        with time_phase('salesforce', 'salesforce_query'):
+            # Salesforce connection
+            print("Connecting to Salesforce...")
+            # simple_salesforce is heavy; only the sync imports it
+            from services.salesforce_client import connect_salesforce
+            sf = connect_salesforce(current_app.config)
 
-        # Query execution
-        print("Executing Salesforce query...")
-        query = """
-            SELECT Id, Name, Available_slots__c, Filled_Volunteer_Jobs__c, 
-                Date_and_Time_for_Cal__c, Session_Type__c, Registration_Link__c, 
-                Display_on_Website__c, Start_Date__c, Session_Status__c
-                FROM Session__c 
-                WHERE Start_Date__c > TODAY 
-                AND Available_slots__c > 0
-                AND Session_Status__c != 'Draft'
-                ORDER BY Start_Date__c ASC
-        """
-        result = sf.query(query)
-        events = result.get('records', [])
+            # Query execution
+            print("Executing Salesforce query...")
+            query = """
+                SELECT Id, Name, Available_slots__c, Filled_Volunteer_Jobs__c, 
+                    Date_and_Time_for_Cal__c, Session_Type__c, Registration_Link__c, 
+                    Display_on_Website__c, Start_Date__c, Session_Status__c
+                    FROM Session__c 
+                    WHERE Start_Date__c > TODAY 
+                    AND Available_slots__c > 0
+                    AND Session_Status__c != 'Draft'
+                    ORDER BY Start_Date__c ASC
+            """
+            # query_all follows nextRecordsUrl; a single query() stops at the first batch
+            # and the missing sessions would be deleted below
+            result = sf.query_all(query)
+            events = result.get('records', [])
         print(f"Retrieved {len(events)} events from Salesforce")
         
         # Get all salesforce IDs from the query results
         salesforce_ids = {event['Id'] for event in events}
         
-        # Delete events that are no longer in Salesforce results (including Draft sessions)
-        additional_deleted = UpcomingEvent.query.filter(
-            ~UpcomingEvent.salesforce_id.in_(salesforce_ids)
-        ).delete()
-        db.session.commit()
-        print(f"Deleted {additional_deleted} events that are no longer in Salesforce (including Draft sessions)")
+        # Events that are no longer in Salesforce results (including Draft sessions) move to history too.
+        # Archived events are full, so the query above never returns them; they age out as 'archived'
+        with time_phase('salesforce', 'move_missing'):
+            additional_deleted = UpcomingEvent.move_to_history(UpcomingEvent.query.filter(
+                ~UpcomingEvent.salesforce_id.in_(salesforce_ids),
+                UpcomingEvent.status != 'archived'
+            ), 'removed', batch_size)
+        print(f"Moved {additional_deleted} events that are no longer in Salesforce to history")
         
         # Print first event for debugging
         if events:
@@ -83,14 +99,16 @@ def sync_upcoming_events():
 
         # Update database
         print("Updating database...")
-        new_count, updated_count = UpcomingEvent.upsert_from_salesforce(events)
+        with time_phase('salesforce', 'upsert'):
+            new_count, updated_count = UpcomingEvent.upsert_from_salesforce(events)
         
         return {
             'success': True,
             'new_count': new_count,
             'updated_count': updated_count,
-            'deleted_count': deleted_count + additional_deleted,
-            'archived_count': archived_count
+            'deleted_count': deleted_count + additional_deleted,  # moved out of upcoming_events
+            'archived_count': archived_count,
+            'static_feeds': publish_after_sync()
         }
     except Exception as e:
         print(f"Scheduler sync error: {str(e)}")
@@ -99,29 +117,31 @@ def sync_upcoming_events():
             'error': str(e)
         }
 
-@upcoming_events_bp.route('/volunteer_signup')
-def volunteer_signup():
-    # Get initial events from database where display_on_website is True and status is active, ordered by date
+@register_snapshot('volunteer_signup', UpcomingEvent, EventDistrictMapping)
+def volunteer_signup_events():
+    # Events where display_on_website is True and status is active, ordered by date
     # Only return Salesforce events (in-person events) for volunteer signup
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(
+    return UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(
         display_on_website=True, 
         status='active',
         source='salesforce'  # Only Salesforce events for volunteer signup
-    ).order_by(UpcomingEvent.start_date).all()]
-    return render_template('signup.html', initial_events=events)
+    ).order_by(*UpcomingEvent.chronological()))
+
+@upcoming_events_bp.route('/volunteer_signup')
+@replica_read
+def volunteer_signup():
+    return render_template('signup.html', initial_events=snapshot_data('volunteer_signup'))
 
 @upcoming_events_bp.route('/volunteer_signup_api')
+@replica_read
 def volunteer_signup_api():
-    # Get initial events from database where display_on_website is True and status is active, ordered by date
-    # Only return Salesforce events (in-person events) for volunteer signup
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(
-        display_on_website=True, 
-        status='active',
-        source='salesforce'  # Only Salesforce events for volunteer signup
-    ).order_by(UpcomingEvent.start_date).all()]
+    # Pre-serialized feed body, shared until the events change
+    return snapshot_response('volunteer_signup')
 
-    # Return JSON response directly
-    return jsonify(events)
+@upcoming_events_bp.route('/stream')
+def event_stream():
+    # Server-Sent Events: event changes and sync completions as they are committed
+    return stream_response(request.headers.get('Last-Event-ID'))
 
 @upcoming_events_bp.route('/toggle-event-visibility', methods=['POST'])
 @login_required
@@ -145,6 +165,8 @@ def toggle_event_visibility():
         print(f"Before update - Event {event_id} visibility: {event.display_on_website}")
         
         event.display_on_website = visible
+        UpcomingEvent.log_changes('update', [event])
+        publish_event(event)
         db.session.commit()
         
         # Verify the update
@@ -169,7 +191,7 @@ def toggle_event_visibility():
 @login_required
 def upcoming_event_management():
     # Get initial events from database and convert to dict (active events only)
-    events = [event.to_dict() for event in UpcomingEvent.query.filter_by(status='active').order_by(UpcomingEvent.start_date).all()]
+    events = UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(status='active').order_by(*UpcomingEvent.chronological()))
     return render_template('events/upcoming_event_management.html', initial_events=events)
 
 def sync_recent_salesforce_data():
@@ -219,15 +241,18 @@ def sync_recent_salesforce_data_endpoint():
     result = sync_recent_salesforce_data()
     return jsonify(result)
 
+@register_snapshot('displayed_events', UpcomingEvent, EventDistrictMapping)
+def displayed_events():
+    # Get events from database where display_on_website is True, ordered by date
+    events = UpcomingEvent.query.filter_by(display_on_website=True)\
+        .order_by(*UpcomingEvent.chronological())
+    return UpcomingEvent.list_dicts(events)
+
 @upcoming_events_bp.route('/displayed_events_api')
+@replica_read
 def displayed_events_api():
     try:
-        # Get events from database where display_on_website is True, ordered by date
-        events = UpcomingEvent.query.filter_by(display_on_website=True)\
-            .order_by(UpcomingEvent.start_date)\
-            .all()
-
-        return jsonify([event.to_dict() for event in events])
+        return snapshot_response('displayed_events')
     except Exception as e:
         print(f"Error in displayed_events_api: {str(e)}")
         return jsonify({
@@ -311,6 +336,8 @@ def update_event_note(event_id):
         print(f"New note content: {note}")  # Debug log
         
         event.note = note if note else None
+        UpcomingEvent.log_changes('update', [event])
+        publish_event(event)
         db.session.commit()
         
         return jsonify({
@@ -336,6 +363,8 @@ def delete_event_note(event_id):
             return jsonify({'error': 'Event not found'}), 404
             
         event.note = None
+        UpcomingEvent.log_changes('update', [event])
+        publish_event(event)
         db.session.commit()
         
         return jsonify({
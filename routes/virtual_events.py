@@ -8,7 +8,12 @@ from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from models import db
 from models.upcoming_event import UpcomingEvent
-from services.google_sheets_service import GoogleSheetsService
+from models.event_row import FIELDSETS
+from services.db_routing import replica_read
+from services.job_lock import sync_endpoint
+from services.live_updates import publish_event
+from services.metrics import time_phase
+from services.static_feeds import publish_after_sync
 import os
 import logging
 
@@ -28,81 +33,98 @@ def import_virtual_events():
     Returns:
         JSON response with import results
     """
+    # Get sheet ID from request or environment
     try:
-        # Get sheet ID from request or environment
-        try:
-            data = request.get_json() or {}
-        except:
-            data = {}
-        sheet_id = data.get('sheet_id') or os.getenv('VIRTUAL_EVENTS_SHEET_ID')
+        data = request.get_json() or {}
+    except:
+        data = {}
+    return sync_endpoint('virtual_sheets', lambda: import_virtual_sheet(data.get('sheet_id')))
+
+def import_virtual_sheet(sheet_id=None):
+    """
+    Import virtual events from a Google Sheet (the configured one by default).
+
+    Shared by the import endpoint and the scheduler.
+
+    Returns:
+        tuple: (result dict, HTTP status code)
+    """
+    try:
+        sheet_id = sheet_id or os.getenv('VIRTUAL_EVENTS_SHEET_ID')
         
         if not sheet_id:
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'Sheet ID not provided and VIRTUAL_EVENTS_SHEET_ID not configured'
-            }), 400
+            }, 400
         
         logger.info(f"Starting virtual events import from sheet: {sheet_id}")
         
         # Initialize Google Sheets service
-        sheets_service = GoogleSheetsService()
+        # Deferred: GoogleSheetsService pulls in pandas, which only the imports need
+        from services.google_sheets_service import GoogleSheetsService
+        sheets_service = GoogleSheetsService.from_config(current_app.config)
         
         # Read data from Google Sheets
         try:
-            sheet_data = sheets_service.read_sheet_data(sheet_id)
+            with time_phase('virtual_sheets', 'fetch'):
+                sheet_data = sheets_service.read_sheet_data(sheet_id)
         except Exception as e:
             logger.error(f"Failed to read sheet data: {str(e)}")
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Failed to read Google Sheet: {str(e)}'
-            }), 400
+            }, 400
         
         if not sheet_data:
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'No data found in Google Sheet'
-            }), 400
+            }, 400
         
         # Validate sheet structure
         if not sheets_service.validate_sheet_structure(sheet_data):
-            return jsonify({
+            return {
                 'success': False,
                 'error': 'Google Sheet does not have the expected structure for virtual events'
-            }), 400
+            }, 400
         
         # Import data using the model method
         try:
-            new_count, updated_count, skipped_count = UpcomingEvent.upsert_from_virtual_sheet(
-                sheet_data, sheet_id
-            )
+            with time_phase('virtual_sheets', 'upsert'):
+                new_count, updated_count, skipped_count = UpcomingEvent.upsert_from_virtual_sheet(
+                    sheet_data, sheet_id
+                )
             
             logger.info(f"Import completed: {new_count} new, {updated_count} updated, {skipped_count} skipped")
             
-            return jsonify({
+            return {
                 'success': True,
                 'message': 'Virtual events imported successfully',
                 'new_count': new_count,
                 'updated_count': updated_count,
                 'skipped_count': skipped_count,
-                'total_processed': len(sheet_data)
-            })
+                'total_processed': len(sheet_data),
+                'static_feeds': publish_after_sync()
+            }, 200
             
         except Exception as e:
             logger.error(f"Failed to import virtual events: {str(e)}")
             db.session.rollback()
-            return jsonify({
+            return {
                 'success': False,
                 'error': f'Failed to import events: {str(e)}'
-            }), 500
+            }, 500
             
     except Exception as e:
-        logger.error(f"Unexpected error in import_virtual_events: {str(e)}")
-        return jsonify({
+        logger.error(f"Unexpected error in import_virtual_sheet: {str(e)}")
+        return {
             'success': False,
             'error': f'Unexpected error: {str(e)}'
-        }), 500
+        }, 500
 
 @virtual_events_bp.route('/api/virtual-events', methods=['GET'])
+@replica_read
 def get_virtual_events():
     """
     Get all virtual events.
@@ -110,6 +132,7 @@ def get_virtual_events():
     Query parameters:
     - status: Filter by status (active, archived)
     - limit: Limit number of results
+    - fields: full (default) or summary
     
     Returns:
         JSON response with virtual events
@@ -117,18 +140,20 @@ def get_virtual_events():
     try:
         status = request.args.get('status', 'active')
         limit = request.args.get('limit', type=int)
+        fieldset = request.args.get('fields', 'full')
+        if fieldset not in FIELDSETS:
+            return jsonify({'success': False, 'error': f"fields must be one of: {', '.join(FIELDSETS)}"}), 400
         
         query = UpcomingEvent.query.filter_by(source='virtual')
         
         if status:
             query = query.filter_by(status=status)
         
+        query = query.order_by(*UpcomingEvent.chronological())
         if limit:
             query = query.limit(limit)
         
-        events = query.order_by(UpcomingEvent.start_date).all()
-        
-        return jsonify([event.to_dict() for event in events])
+        return jsonify(UpcomingEvent.list_dicts(query, fieldset))
         
     except Exception as e:
         logger.error(f"Error getting virtual events: {str(e)}")
@@ -188,7 +213,8 @@ def get_sheet_info():
                 'error': 'VIRTUAL_EVENTS_SHEET_ID not configured'
             }), 400
         
-        sheets_service = GoogleSheetsService()
+        from services.google_sheets_service import GoogleSheetsService
+        sheets_service = GoogleSheetsService.from_config(current_app.config)
         sheet_info = sheets_service.get_sheet_info(sheet_id)
         
         return jsonify({
@@ -229,6 +255,8 @@ def toggle_virtual_event_visibility(event_id):
         
         # Toggle visibility
         event.display_on_website = not event.display_on_website
+        UpcomingEvent.log_changes('update', [event])
+        publish_event(event)
         db.session.commit()
         
         logger.info(f"Toggled visibility for virtual event {event_id} to {event.display_on_website}")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Response Compression Benchmark for Voluntold
+Measures what compressing the large JSON feeds and pages costs in CPU and
+saves in bytes, per coding and level, and what the snapshot cache saves by
+compressing a feed body once instead of on every request. The first
+request after a snapshot is invalidated rebuilds it, compression included,
+so that request is timed separately.
+
+Usage:
+    python scripts/benchmark_compression.py --scale 1k
+    python scripts/benchmark_compression.py --scale 10k --repeat 50 --output compression.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from synthetic_data import DatasetSpec, populate, use_database  # noqa: E402
+
+DEFAULT_DATABASE_URL = 'sqlite:///benchmark.db'
+
+# (name, path, needs login)
+BODIES = [
+    ('volunteer_signup_api', '/events/volunteer_signup_api', False),
+    ('displayed_events_api', '/events/displayed_events_api', False),
+    ('dia_events_api', '/events/dia_events_api', False),
+    ('volunteer_signup_page', '/events/volunteer_signup', False),
+    ('dashboard_page', '/dashboard', True),
+]
+
+LEVELS = [('gzip', 1), ('gzip', 6), ('gzip', 9), ('br', 4), ('br', 5), ('br', 11)]
+
+
+def _median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def fetch_bodies(app) -> Dict[str, bytes]:
+    """Uncompressed bodies of the benchmarked endpoints"""
+    from flask import g
+    from models import db
+    from models.user import User
+
+    client = app.test_client()
+    user = User.query.first()
+    bodies = {}
+    for name, path, needs_login in BODIES:
+        if needs_login:
+            if user is None:
+                continue
+            with client.session_transaction() as session:
+                session['_user_id'] = str(user.id)
+            # Requests share this app context; forget the anonymous user loaded so far
+            g.pop('_login_user', None)
+        response = client.get(path, headers={'Accept-Encoding': 'identity'})
+        if response.status_code == 200:
+            bodies[name] = response.get_data()
+    db.session.remove()
+    return bodies
+
+
+def measure_levels(bodies: Dict[str, bytes], repeat: int) -> List[Dict]:
+    """CPU time and size per body, coding and level"""
+    from services import compression
+
+    rows = []
+    for name, body in bodies.items():
+        for coding, level in LEVELS:
+            if coding == 'br' and compression.brotli is None:
+                continue
+            compressed = compression.compress(body, coding, level)
+            rows.append({
+                'body': name,
+                'coding': coding,
+                'level': level,
+                'bytes': len(body),
+                'compressed_bytes': len(compressed),
+                'ratio': round(len(body) / len(compressed), 1),
+                'ms': round(_median_ms(lambda: compression.compress(body, coding, level), repeat), 3),
+            })
+    return rows
+
+
+def measure_requests(app, repeat: int) -> Dict[str, float]:
+    """
+    Median request time for the signup feed: identity, per-request gzip,
+    snapshot gzip/brotli, and the first request after the snapshot was
+    invalidated, which rebuilds it and compresses every coding
+    """
+    from services import compression
+    from services.feed_cache import snapshot_cache
+
+    client = app.test_client()
+    path = '/events/volunteer_signup_api'
+    gzip_headers = {'Accept-Encoding': 'gzip'}
+    br_headers = {'Accept-Encoding': 'gzip, br'}
+    client.get(path, headers=gzip_headers)  # build the snapshot and its compressed bodies
+
+    timings = {
+        'identity': _median_ms(lambda: client.get(path, headers={'Accept-Encoding': 'identity'}).get_data(), repeat),
+        'gzip_from_snapshot': _median_ms(lambda: client.get(path, headers=gzip_headers).get_data(), repeat),
+    }
+    if compression.brotli is not None:
+        timings['br_from_snapshot'] = _median_ms(lambda: client.get(path, headers=br_headers).get_data(), repeat)
+
+    def first_after_rebuild():
+        snapshot_cache.clear()
+        client.get(path, headers=br_headers).get_data()
+
+    timings['first_after_rebuild'] = _median_ms(first_after_rebuild, repeat)
+    # What every request would pay without the stored body: the per-request level
+    body = client.get(path, headers={'Accept-Encoding': 'identity'}).get_data()
+    level = app.config.get('COMPRESS_LEVEL', 6)
+    timings['gzip_per_request'] = timings['identity'] + _median_ms(
+        lambda: compression.compress(body, 'gzip', level), repeat)
+    if compression.brotli is not None:
+        # What the rebuilding request would add with brotli at its highest quality instead
+        snapshot_quality = app.config.get('COMPRESS_SNAPSHOT_BR_QUALITY', compression.SNAPSHOT_BR_QUALITY)
+        timings['first_after_rebuild_br11'] = timings['first_after_rebuild'] + _median_ms(
+            lambda: compression.compress(body, 'br', 11), repeat) - _median_ms(
+            lambda: compression.compress(body, 'br', snapshot_quality), repeat)
+    return {key: round(value, 3) for key, value in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure compression CPU cost against bytes saved')
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed repetitions per measurement')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='Database to benchmark against (reset by this script)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    from app import app
+    from services import compression
+
+    with app.app_context():
+        populate(DatasetSpec.for_scale(args.scale, seed=args.seed), reset=True)
+        bodies = fetch_bodies(app)
+        levels = measure_levels(bodies, args.repeat)
+        requests_ms = measure_requests(app, args.repeat)
+
+    if compression.brotli is None:
+        print('brotli is not installed; measuring gzip only')
+    print(f"Compression cost vs size, median of {args.repeat} (scale {args.scale}):")
+    print(f"  {'body':<24} {'coding':>8} {'level':>5} {'bytes':>10} {'compressed':>10} {'ratio':>6} {'ms':>8}")
+    for row in levels:
+        print(f"  {row['body']:<24} {row['coding']:>8} {row['level']:>5} {row['bytes']:>10} "
+              f"{row['compressed_bytes']:>10} {row['ratio']:>5}x {row['ms']:>8}")
+    print('Signup feed request, median ms:')
+    for key, value in requests_ms.items():
+        print(f"  {key:<24} {value:>8}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'scale': args.scale, 'repeat': args.repeat, 'levels': levels,
+                       'requests_ms': requests_ms}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Endpoint and Sync Benchmark Suite for Voluntold
+Generates a synthetic dataset at each requested scale, drives the hot
+endpoints and the sync/upsert paths in-process, and reports p50/p95/p99
+latency and throughput. Results are written to a JSON baseline that a later
+run can be compared against.
+
+The target database is reset for every scale, so it defaults to a dedicated
+SQLite file (instance/benchmark.db); pass --database-url for Postgres.
+
+Usage:
+    python scripts/benchmark_endpoints.py --scales 1k,10k --output baseline.json
+    python scripts/benchmark_endpoints.py --scales 1k,10k --compare baseline.json --fail-on-regression 20
+    python scripts/benchmark_endpoints.py --database-url postgresql://localhost/voluntold_bench --scales 100k
+    python scripts/benchmark_endpoints.py --scales 10k --with-upstreams --upstream-latency-ms 50
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from synthetic_data import (DatasetSpec, district_names, polaris_user_records, populate,  # noqa: E402
+                            salesforce_event_records, use_database, virtual_sheet_rows)
+
+DEFAULT_DATABASE_URL = 'sqlite:///benchmark.db'
+SYNC_BATCH_SIZE = 2000
+
+# (name, path, auth) - auth is None, 'session' (dashboard login) or 'token' (API token)
+ENDPOINTS = [
+    ('volunteer_signup_api', '/events/volunteer_signup_api', None),
+    ('displayed_events_api', '/events/displayed_events_api', None),
+    ('dia_events_api', '/events/dia_events_api', None),
+    ('dia_events_with_districts', '/events/api/dia/events', None),
+    ('districts_page', '/districts', None),
+    ('district_events_api', '/api/districts/{district}/events', None),
+    ('virtual_events_api', '/api/virtual-events', None),
+    ('dashboard', '/dashboard', 'session'),
+    ('archive_api', '/api/events/archive', 'session'),
+    ('users_sync_api', '/api/v1/users/sync?limit=1000', 'token'),
+]
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def summarize(durations: List[float], wall_time: float) -> dict:
+    samples = sorted(d * 1000 for d in durations)
+    return {
+        'samples': len(samples),
+        'mean_ms': round(sum(samples) / len(samples), 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50), 3),
+        'p95_ms': round(percentile(samples, 95), 3),
+        'p99_ms': round(percentile(samples, 99), 3),
+        'throughput_per_sec': round(len(samples) / wall_time, 2) if wall_time else 0.0,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def make_client(app, auth, admin_id, api_token):
+    client = app.test_client()
+    if auth == 'session':
+        with client.session_transaction() as session:
+            session['_user_id'] = str(admin_id)
+            session['_fresh'] = True
+    if auth == 'token':
+        client.environ_base['HTTP_X_API_TOKEN'] = api_token
+    return client
+
+
+def bench_endpoint(app, engine, path, auth, admin_id, api_token, requests_count, concurrency):
+    from services.query_inspector import QueryRecorder
+
+    # One instrumented warm-up request for status and statement count
+    client = make_client(app, auth, admin_id, api_token)
+    with QueryRecorder(engine) as recorder:
+        status = client.get(path).status_code
+
+    def worker(count):
+        worker_client = make_client(app, auth, admin_id, api_token)
+        durations, errors = [], 0
+        for _ in range(count):
+            started = time.perf_counter()
+            response = worker_client.get(path)
+            response.get_data()
+            durations.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+        return durations, errors
+
+    shares = [requests_count // concurrency + (i < requests_count % concurrency) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(worker, shares))
+    wall_time = time.perf_counter() - started
+
+    durations = [d for worker_durations, _ in outcomes for d in worker_durations]
+    result = summarize(durations, wall_time)
+    result.update({'status': status, 'errors': sum(e for _, e in outcomes), 'sql_per_request': recorder.count})
+    return result
+
+
+def bench_sync(iterations: int, rows: int, run: Callable[[], None]) -> dict:
+    durations = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        run()
+        durations.append(time.perf_counter() - started)
+    result = summarize(durations, sum(durations))
+    result['rows'] = rows
+    result['rows_per_sec'] = round(rows * len(durations) / sum(durations), 1) if durations else 0.0
+    return result
+
+
+def sync_paths(spec: DatasetSpec, batch_size: int) -> Dict[str, tuple]:
+    """(row count, callable) for each sync/upsert path; half updates, half inserts where possible"""
+    from models import db
+    from models.upcoming_event import UpcomingEvent
+    from services.user_sync import reconcile_users
+
+    half = batch_size // 2
+    sf_records = (salesforce_event_records(spec, start=0, count=half)
+                  + salesforce_event_records(spec, start=spec.salesforce_events, count=batch_size - half))
+    sheet_rows = (virtual_sheet_rows(spec, start=0, count=half)
+                  + virtual_sheet_rows(spec, start=spec.virtual_events, count=batch_size - half))
+    polaris_users = polaris_user_records(spec, extra=half)[-batch_size:]
+
+    def reconcile():
+        reconcile_users(polaris_users)
+        db.session.commit()
+
+    return {
+        'salesforce_upsert': (len(sf_records), lambda: UpcomingEvent.upsert_from_salesforce(sf_records)),
+        'virtual_sheet_upsert': (len(sheet_rows),
+                                 lambda: UpcomingEvent.upsert_from_virtual_sheet(sheet_rows, 'synthetic-sheet')),
+        'polaris_user_reconcile': (len(polaris_users), reconcile),
+    }
+
+
+def run_scale(app, scale: str, args) -> dict:
+    from models import db
+    from models.user import User
+
+    spec = DatasetSpec.for_scale(scale, seed=args.seed)
+    with app.app_context():
+        started = time.perf_counter()
+        counts = populate(spec, reset=True)
+        print(f"[{scale}] generated {counts} in {time.perf_counter() - started:.1f}s")
+        admin = db.session.get(User, 1)
+        api_token = admin.generate_api_token()
+        admin_id = admin.id
+        engine = db.engine
+    district = district_names(spec)[0]
+
+    results = {'dataset': counts, 'endpoints': {}, 'sync': {}}
+    # Routes print debug output; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, path, auth in ENDPOINTS:
+            results['endpoints'][name] = bench_endpoint(
+                app, engine, path.format(district=district), auth, admin_id, api_token,
+                args.requests, args.concurrency
+            )
+
+    with app.app_context():
+        for name, (rows, run) in sync_paths(spec, min(args.sync_batch, spec.events)).items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                results['sync'][name] = bench_sync(args.sync_iterations, rows, run)
+
+    if args.with_upstreams:
+        results['sync'].update(bench_upstream_syncs(app, spec, admin_id, args))
+
+    return results
+
+
+def bench_upstream_syncs(app, spec: DatasetSpec, admin_id: int, args) -> dict:
+    """Run the full syncs end to end against in-process fake upstream servers"""
+    from fake_upstreams import SHEET_ID, build_upstreams
+    from routes.upcoming_events import sync_upcoming_events
+    from services.fake_upstreams import FakeUpstreamOptions, FakeUpstreamServer
+
+    options = FakeUpstreamOptions(latency_ms=args.upstream_latency_ms, seed=args.seed)
+    client = make_client(app, 'session', admin_id, None)
+
+    def salesforce_sync():
+        with app.app_context():
+            result = sync_upcoming_events()
+        if not result.get('success'):
+            raise RuntimeError(f"Salesforce sync failed: {result.get('error')}")
+
+    def post(path, **kwargs):
+        def run():
+            response = client.post(path, **kwargs)
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} failed: {response.get_data(as_text=True)[:200]}')
+        return run
+
+    runs = {
+        'salesforce_full_sync': (spec.salesforce_events, salesforce_sync),
+        'virtual_sheet_import': (spec.virtual_events, post('/api/virtual-events/import', json={'sheet_id': SHEET_ID})),
+        'polaris_user_sync': (spec.users, post('/sync_users?full=1')),
+    }
+
+    results = {}
+    with FakeUpstreamServer(build_upstreams(spec, options)) as server:
+        saved = {key: app.config.get(key) for key in server.config_overrides()}
+        app.config.update(server.config_overrides())
+        try:
+            for name, (rows, run) in runs.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results[name] = bench_sync(args.sync_iterations, rows, run)
+        finally:
+            app.config.update(saved)
+    return results
+
+
+def print_results(results: dict) -> None:
+    for scale, scale_results in results.items():
+        print(f"\n{scale}: {scale_results['dataset']}")
+        print(f"{'endpoint':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'sql':>6}{'err':>6}")
+        for name, r in scale_results['endpoints'].items():
+            print(f"{name:<28}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+                  f"{r['throughput_per_sec']:>10.1f}{r['sql_per_request']:>6}{r['errors']:>6}")
+        print(f"{'sync path':<28}{'p50 ms':>10}{'p95 ms':>10}{'rows':>10}{'rows/s':>12}")
+        for name, r in scale_results['sync'].items():
+            print(f"{name:<28}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['rows']:>10}{r['rows_per_sec']:>12.1f}")
+
+
+def compare(current: dict, baseline: dict, threshold_pct: float = None) -> List[str]:
+    """Print p50/p95 changes against a baseline; return regressions above threshold_pct"""
+    regressions = []
+    print(f"\nComparison with {baseline['meta'].get('commit', 'baseline')} "
+          f"({baseline['meta'].get('database', '?')}):")
+    print(f"{'scale':<7}{'name':<28}{'p50 old':>10}{'p50 new':>10}{'p95 old':>10}{'p95 new':>10}{'p95 Δ':>9}")
+    for scale, scale_results in current['results'].items():
+        old_scale = baseline['results'].get(scale)
+        if not old_scale:
+            continue
+        for group in ('endpoints', 'sync'):
+            for name, new in scale_results[group].items():
+                old = old_scale.get(group, {}).get(name)
+                if not old or not old['p95_ms']:
+                    continue
+                change = (new['p95_ms'] - old['p95_ms']) / old['p95_ms'] * 100
+                flag = ''
+                if threshold_pct is not None and change > threshold_pct:
+                    flag = '  REGRESSION'
+                    regressions.append(f'{scale} {name}: p95 {old["p95_ms"]} -> {new["p95_ms"]} ms ({change:+.1f}%)')
+                print(f"{scale:<7}{name:<28}{old['p50_ms']:>10.2f}{new['p50_ms']:>10.2f}"
+                      f"{old['p95_ms']:>10.2f}{new['p95_ms']:>10.2f}{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Voluntold endpoints and sync paths')
+    parser.add_argument('--scales', default='1k', help='Comma-separated scales: 1k,10k,100k or event counts')
+    parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='Client threads per endpoint')
+    parser.add_argument('--sync-batch', type=int, default=SYNC_BATCH_SIZE, help='Rows per sync/upsert run')
+    parser.add_argument('--sync-iterations', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--with-upstreams', action='store_true',
+                        help='Also time the full Salesforce, Sheets and Polaris syncs against fake upstream servers')
+    parser.add_argument('--upstream-latency-ms', type=float, default=0.0,
+                        help='Latency the fake upstream servers add to every response')
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='Database to benchmark against (reset for every scale)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help='Exit non-zero when a p95 grows by more than PCT percent over the baseline')
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    from app import app
+    from models import db
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': dialect,
+            'python': platform.python_version(),
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'sync_batch': args.sync_batch,
+            'seed': args.seed,
+            'upstream_latency_ms': args.upstream_latency_ms if args.with_upstreams else None,
+        },
+        'results': {},
+    }
+    for scale in [s.strip() for s in args.scales.split(',') if s.strip()]:
+        report['results'][scale] = run_scale(app, scale, args)
+
+    print_results(report['results'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.fail_on_regression)
+        if regressions and args.fail_on_regression is not None:
+            print('\nRegressions:\n  ' + '\n  '.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+List Query Projection Benchmark for Voluntold
+Compares serializing event lists from full ORM objects (to_dict_list) with
+the column-projected row path (list_dicts) for each fieldset: median time
+and peak Python memory (tracemalloc) per list.
+
+Usage:
+    python scripts/benchmark_projection.py --scale 10k
+    python scripts/benchmark_projection.py --scale 10k --repeat 10 --output projection.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from synthetic_data import DatasetSpec, populate, use_database  # noqa: E402
+
+DEFAULT_DATABASE_URL = 'sqlite:///benchmark.db'
+
+
+def _queries():
+    from models.upcoming_event import UpcomingEvent
+
+    return {
+        'all_events': lambda: UpcomingEvent.query.order_by(*UpcomingEvent.chronological()),
+        'displayed_events': lambda: UpcomingEvent.query.filter_by(display_on_website=True)
+        .order_by(*UpcomingEvent.chronological()),
+    }
+
+
+def _paths() -> Dict[str, Callable]:
+    from models.upcoming_event import UpcomingEvent
+
+    return {
+        'orm': lambda query: UpcomingEvent.to_dict_list(query.all()),
+        'rows_full': lambda query: UpcomingEvent.list_dicts(query, 'full'),
+        'rows_summary': lambda query: UpcomingEvent.list_dicts(query, 'summary'),
+    }
+
+
+def measure(repeat: int) -> List[Dict]:
+    """Median ms and peak KiB per query and read path, each run on a fresh session"""
+    from models import db
+
+    results = []
+    for query_name, build_query in _queries().items():
+        for path_name, serialize in _paths().items():
+            samples = []
+            for _ in range(repeat):
+                db.session.remove()
+                gc.collect()
+                started = time.perf_counter()
+                count = len(serialize(build_query()))
+                samples.append((time.perf_counter() - started) * 1000)
+            # Memory in a separate run: tracing allocations slows everything down
+            db.session.remove()
+            gc.collect()
+            tracemalloc.start()
+            serialize(build_query())
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({
+                'query': query_name,
+                'path': path_name,
+                'rows': count,
+                'ms': round(statistics.median(samples), 2),
+                'peak_kib': round(peak / 1024),
+            })
+    db.session.remove()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ORM and column-projected event list serialization')
+    parser.add_argument('--scale', default='10k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed repetitions per measurement')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='Database to benchmark against (reset by this script)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    use_database(args.database_url)
+    from app import app
+
+    with app.app_context():
+        populate(DatasetSpec.for_scale(args.scale, seed=args.seed), reset=True)
+        results = measure(args.repeat)
+
+    print(f"Event list serialization, median of {args.repeat} (scale {args.scale}):")
+    print(f"  {'query':<18} {'path':<13} {'rows':>7} {'ms':>9} {'peak KiB':>9}")
+    for row in results:
+        print(f"  {row['query']:<18} {row['path']:<13} {row['rows']:>7} {row['ms']:>9} {row['peak_kib']:>9}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'scale': args.scale, 'repeat': args.repeat, 'results': results}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
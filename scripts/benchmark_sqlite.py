@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+SQLite Tuning Benchmark for Voluntold
+Runs the same workload on two SQLite files, with SQLITE_TUNING off and on:
+a Salesforce sync upserting batches in a background thread while the main
+thread reads the displayed event list. Reports sync batch and read latency
+percentiles and how many operations failed with "database is locked".
+
+Usage:
+    python scripts/benchmark_sqlite.py --scale 10k
+    python scripts/benchmark_sqlite.py --scale 10k --batches 20 --output sqlite.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from synthetic_data import DatasetSpec, populate, salesforce_event_records  # noqa: E402
+
+DEFAULT_DIRECTORY = 'instance'
+SYNC_BATCH_SIZE = 500
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _summary(samples: List[float]) -> Dict:
+    return {
+        'count': len(samples),
+        'p50': round(_percentile(samples, 50), 2),
+        'p95': round(_percentile(samples, 95), 2),
+        'max': round(max(samples, default=0), 2),
+        'mean': round(statistics.mean(samples), 2) if samples else 0.0,
+    }
+
+
+def _app(path: str, tuning: bool):
+    from app import create_app
+    from config import DevelopmentConfig, database_engine_options
+
+    uri = f'sqlite:///{os.path.abspath(path)}'
+    return create_app(type('BenchmarkConfig', (DevelopmentConfig,), {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': database_engine_options(uri),
+        'SQLITE_TUNING': tuning,
+        'SLOW_QUERY_THRESHOLD_MS': None,
+    }))
+
+
+def run(app, spec: DatasetSpec, batches: int, batch_size: int) -> Dict:
+    """Sync batches in a thread while reading in this one; latencies in ms"""
+    from models import db
+    from models.upcoming_event import UpcomingEvent
+
+    sync_ms, read_ms, locked = [], [], {'sync': 0, 'read': 0}
+    done = threading.Event()
+
+    def sync():
+        with app.app_context():
+            for batch in range(batches):
+                start = (batch * batch_size) % max(1, spec.salesforce_events - batch_size)
+                records = salesforce_event_records(spec, start=start, count=batch_size)
+                started = time.perf_counter()
+                try:
+                    UpcomingEvent.upsert_from_salesforce(records)
+                    sync_ms.append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    db.session.rollback()
+                    locked['sync'] += 1
+            db.session.remove()
+        done.set()
+
+    writer = threading.Thread(target=sync)
+    with app.app_context():
+        writer.start()
+        while not done.is_set():
+            started = time.perf_counter()
+            try:
+                UpcomingEvent.list_dicts(UpcomingEvent.query.filter_by(display_on_website=True)
+                                         .order_by(*UpcomingEvent.chronological()))
+                read_ms.append((time.perf_counter() - started) * 1000)
+            except OperationalError:
+                locked['read'] += 1
+            db.session.remove()
+        writer.join()
+    return {'sync_batch_ms': _summary(sync_ms), 'read_ms': _summary(read_ms), 'locked': locked}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sync and read latency with and without SQLite tuning')
+    parser.add_argument('--scale', default='10k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--batches', type=int, default=10, help='Sync batches per profile')
+    parser.add_argument('--batch-size', type=int, default=SYNC_BATCH_SIZE, help='Records per sync batch')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY,
+                        help='Where to create the two benchmark databases (reset by this script)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    spec = DatasetSpec.for_scale(args.scale, seed=args.seed)
+    results = {}
+    for profile, tuning in (('default', False), ('tuned', True)):
+        path = os.path.join(args.directory, f'benchmark_sqlite_{profile}.db')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        app = _app(path, tuning)
+        with app.app_context():
+            from models import db
+            db.create_all()
+            populate(spec, reset=True)
+        results[profile] = run(app, spec, args.batches, args.batch_size)
+        with app.app_context():
+            db.engine.dispose()
+
+    print(f"Sync ({args.batches} x {args.batch_size} records) with concurrent reads, scale {args.scale}:")
+    print(f"  {'profile':<8} {'sync p50':>9} {'sync p95':>9} {'read p50':>9} {'read p95':>9} {'reads':>6} "
+          f"{'locked':>7}")
+    for profile, result in results.items():
+        sync, read = result['sync_batch_ms'], result['read_ms']
+        print(f"  {profile:<8} {sync['p50']:>9} {sync['p95']:>9} {read['p50']:>9} {read['p95']:>9} "
+              f"{read['count']:>6} {sum(result['locked'].values()):>7}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
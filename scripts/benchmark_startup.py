@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Startup Time Benchmark for Voluntold
+Measures worker cold start: a fresh interpreter imports the app module and
+calls create_app(), under `python -X importtime`. Reports wall time, the
+slowest imports, and whether the heavy client libraries that should stay
+deferred (pandas, simple_salesforce, requests) were loaded.
+
+Usage:
+    python scripts/benchmark_startup.py --runs 5 --output startup.json
+    python scripts/benchmark_startup.py --runs 5 --compare startup.json --fail-on-regression 25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+# Libraries only the admin sync paths need; importing them at startup is a regression
+DEFERRED_MODULES = ('pandas', 'simple_salesforce', 'requests')
+
+STARTUP_SNIPPET = '''
+import time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+create_app()
+finished = time.perf_counter()
+print(f"{(imported - started) * 1000:.3f} {(finished - imported) * 1000:.3f}")
+'''
+
+
+def parse_importtime(stderr: str) -> List[dict]:
+    """Parse `-X importtime` lines into {module, depth, self_us, cumulative_us}"""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        imports.append({
+            'module': name.strip(),
+            'depth': (len(name) - len(name.lstrip()) - 1) // 2,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+        })
+    return imports
+
+
+def run_once() -> Dict:
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', STARTUP_SNIPPET],
+                            cwd=project_root, env=env, capture_output=True, text=True, check=True)
+    import_ms, create_ms = (float(value) for value in result.stdout.strip().splitlines()[-1].split())
+    imports = parse_importtime(result.stderr)
+    return {'import_ms': import_ms, 'create_app_ms': create_ms, 'imports': imports}
+
+
+def summarize(runs: List[Dict], top: int) -> Dict:
+    last_imports = runs[-1]['imports']
+    loaded = {entry['module'] for entry in last_imports}
+    # Direct imports of the app and of the modules create_app() pulls in
+    app_level = [entry for entry in last_imports if entry['depth'] <= 1]
+    slowest = sorted(app_level, key=lambda entry: entry['cumulative_us'], reverse=True)[:top]
+    return {
+        'runs': len(runs),
+        'import_ms': round(statistics.median(run['import_ms'] for run in runs), 2),
+        'create_app_ms': round(statistics.median(run['create_app_ms'] for run in runs), 2),
+        'total_ms': round(statistics.median(run['import_ms'] + run['create_app_ms'] for run in runs), 2),
+        'modules_imported': len(loaded),
+        'deferred_modules_loaded': [module for module in DEFERRED_MODULES if module in loaded],
+        'slowest_imports': [{'module': entry['module'], 'cumulative_ms': round(entry['cumulative_us'] / 1000, 2)}
+                            for entry in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark app cold start')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--compare', help='Baseline JSON file to compare against')
+    parser.add_argument('--fail-on-regression', type=float, metavar='PCT',
+                        help='Exit non-zero when total startup grows by more than PCT percent, '
+                             'or when a deferred module is imported at startup')
+    args = parser.parse_args()
+
+    # Warm the filesystem cache so the first measured run is not an outlier
+    run_once()
+    summary = summarize([run_once() for _ in range(args.runs)], args.top)
+
+    print(f"Cold start over {summary['runs']} runs (median):")
+    print(f"  import app      {summary['import_ms']:>9.1f} ms")
+    print(f"  create_app()    {summary['create_app_ms']:>9.1f} ms")
+    print(f"  total           {summary['total_ms']:>9.1f} ms  ({summary['modules_imported']} modules)")
+    print(f"  deferred modules loaded at startup: {', '.join(summary['deferred_modules_loaded']) or 'none'}")
+    print("Slowest imports (cumulative):")
+    for entry in summary['slowest_imports']:
+        print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        change = (summary['total_ms'] - baseline['total_ms']) / baseline['total_ms'] * 100
+        print(f"\nTotal startup {baseline['total_ms']} -> {summary['total_ms']} ms ({change:+.1f}%)")
+        newly_loaded = sorted(set(summary['deferred_modules_loaded']) - set(baseline['deferred_modules_loaded']))
+        if newly_loaded:
+            print(f"Now imported at startup: {', '.join(newly_loaded)}")
+        if args.fail_on_regression is not None and (change > args.fail_on_regression or newly_loaded):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
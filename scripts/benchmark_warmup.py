@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Worker Warm-up Benchmark for Voluntold
+Compares the latency of a freshly forked worker's first requests with and
+without the pre-fork warm-up (services.warmup), the way gunicorn forks
+workers from a preloaded master. Each run forks a child from the loaded
+app, replays the public pages and feeds once in order, and reports the
+per-endpoint latency and how much memory the child had to copy.
+
+Usage:
+    python scripts/benchmark_warmup.py --scale 10k --runs 5
+    python scripts/benchmark_warmup.py --database-url postgresql://localhost/voluntold_bench --scale 10k
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from synthetic_data import DatasetSpec, populate, use_database  # noqa: E402
+
+DEFAULT_DATABASE_URL = 'sqlite:///benchmark.db'
+
+# What a visitor's first page load hits, in order
+FIRST_REQUESTS = [
+    ('home', '/'),
+    ('volunteer_signup', '/events/volunteer_signup'),
+    ('volunteer_signup_api', '/events/volunteer_signup_api'),
+    ('dia_events_api', '/events/dia_events_api'),
+    ('dia_events_with_districts', '/events/api/dia/events'),
+    ('displayed_events_api', '/events/displayed_events_api'),
+    ('school_mappings', '/api/school-mappings'),
+    ('districts_page', '/districts'),
+]
+
+
+def private_dirty_kb() -> int:
+    """Memory this process has written to (not shared with its parent), in kB"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Private_Dirty:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def first_requests(app) -> Dict:
+    from services.warmup import reset_after_fork
+
+    reset_after_fork(app)
+    baseline_kb = private_dirty_kb()
+    client = app.test_client()
+    timings = {}
+    for name, path in FIRST_REQUESTS:
+        started = time.perf_counter()
+        response = client.get(path)
+        response.get_data()
+        timings[name] = (time.perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            timings[name] = None
+    return {'timings': timings, 'copied_kb': private_dirty_kb() - baseline_kb}
+
+
+def run_forked(app) -> Dict:
+    """Run first_requests() in a forked child and return its result"""
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            payload = json.dumps(first_requests(app)).encode()
+        except Exception as exc:  # report rather than hang the parent
+            payload = json.dumps({'error': str(exc)}).encode()
+        with os.fdopen(write_fd, 'wb') as pipe:
+            pipe.write(payload)
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as pipe:
+        result = json.loads(pipe.read() or b'{}')
+    os.waitpid(pid, 0)
+    if 'error' in result:
+        raise RuntimeError(f"Forked worker failed: {result['error']}")
+    return result
+
+
+def summarize(runs: List[Dict]) -> Dict:
+    endpoints = {}
+    for name, _ in FIRST_REQUESTS:
+        samples = [run['timings'][name] for run in runs if run['timings'].get(name) is not None]
+        endpoints[name] = round(statistics.median(samples), 2) if samples else None
+    return {
+        'endpoints_ms': endpoints,
+        'total_ms': round(sum(value for value in endpoints.values() if value), 2),
+        'copied_kb': int(statistics.median(run['copied_kb'] for run in runs)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare first-request latency with and without pre-fork warm-up')
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--runs', type=int, default=5, help='Forked workers per mode')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help='Database to benchmark against (reset by this script)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    if not hasattr(os, 'fork'):
+        sys.exit('This benchmark forks workers like gunicorn and needs a POSIX system')
+
+    use_database(args.database_url)
+    from app import app
+    from models import db
+    from services.warmup import warm_up
+
+    with app.app_context():
+        populate(DatasetSpec.for_scale(args.scale, seed=args.seed), reset=True)
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+    # Cold runs first: every child forks from a master that has served nothing
+    cold = summarize([run_forked(app) for _ in range(args.runs)])
+    warmup_ms = sum(warm_up(app).values())
+    warm = summarize([run_forked(app) for _ in range(args.runs)])
+
+    print(f"First request after fork, median of {args.runs} workers (scale {args.scale}):")
+    print(f"  {'endpoint':<28} {'cold ms':>10} {'warm ms':>10}")
+    for name, _ in FIRST_REQUESTS:
+        cold_ms, warm_ms = cold['endpoints_ms'][name], warm['endpoints_ms'][name]
+        print(f"  {name:<28} {cold_ms if cold_ms is not None else 'error':>10} "
+              f"{warm_ms if warm_ms is not None else 'error':>10}")
+    print(f"  {'total':<28} {cold['total_ms']:>10} {warm['total_ms']:>10}")
+    print(f"  {'memory copied per worker kB':<28} {cold['copied_kb']:>10} {warm['copied_kb']:>10}")
+    print(f"Warm-up cost in the master: {warmup_ms:.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'scale': args.scale, 'runs': args.runs, 'warmup_ms': round(warmup_ms, 2),
+                       'cold': cold, 'warm': warm}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Fake Upstream Server for Voluntold
+Serves stand-ins for Salesforce, Google Sheets and Polaris on localhost with
+a seeded synthetic dataset, so the syncs can be load-tested offline.
+
+Usage:
+    python scripts/fake_upstreams.py --scale 10k --port 8001 --latency-ms 40 --jitter-ms 20
+    python scripts/fake_upstreams.py --events 5000 --error-rate salesforce=0.05 --page-size 500
+
+Then start the app with the printed environment variables.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from synthetic_data import (DatasetSpec, polaris_user_records, salesforce_event_records,  # noqa: E402
+                            virtual_sheet_rows)
+from services.fake_upstreams import FakeUpstreamOptions, FakeUpstreams, FakeUpstreamServer  # noqa: E402
+
+SHEET_ID = 'synthetic-sheet'
+
+
+def parse_error_rates(values):
+    """['salesforce=0.1', 'sheets=0.5'] -> {'salesforce': 0.1, 'sheets': 0.5}"""
+    rates = {}
+    for value in values or []:
+        service, _, rate = value.partition('=')
+        rates[service.strip()] = float(rate)
+    return rates
+
+
+def build_upstreams(spec: DatasetSpec, options: FakeUpstreamOptions) -> FakeUpstreams:
+    return FakeUpstreams(
+        salesforce_records=salesforce_event_records(spec),
+        sheets={SHEET_ID: virtual_sheet_rows(spec), '*': virtual_sheet_rows(spec)},
+        polaris_users=polaris_user_records(spec),
+        options=options,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve fake Salesforce, Google Sheets and Polaris APIs')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--events', type=int, help='Override the number of events')
+    parser.add_argument('--users', type=int, help='Override the number of Polaris users')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Fixed latency added to every response')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Random extra latency up to this value')
+    parser.add_argument('--page-size', type=int, default=2000, help='Salesforce query batch size')
+    parser.add_argument('--error-rate', action='append', metavar='SERVICE=RATE',
+                        help='Fraction of requests to fail for salesforce, sheets or polaris (repeatable)')
+    parser.add_argument('--error-status', type=int, default=503)
+    args = parser.parse_args()
+
+    spec = DatasetSpec.for_scale(args.scale, seed=args.seed)
+    if args.events is not None:
+        spec.events = args.events
+    if args.users is not None:
+        spec.users = args.users
+
+    options = FakeUpstreamOptions(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rates=parse_error_rates(args.error_rate),
+        error_status=args.error_status,
+        salesforce_page_size=args.page_size,
+        seed=args.seed,
+    )
+    server = FakeUpstreamServer(build_upstreams(spec, options), host=args.host, port=args.port).start()
+
+    print(f"Serving {spec.salesforce_events} sessions, {spec.virtual_events} virtual events and "
+          f"{spec.users} users at {server.base_url}")
+    print("Point the app at it with:")
+    for key, value in server.config_overrides().items():
+        print(f"  export {key}={value}")
+    print(f"  export VIRTUAL_EVENTS_SHEET_ID={SHEET_ID}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nRequests served: {server.upstreams.requests} (errors injected: {server.upstreams.errors_injected})")
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+User Loader Query Measurement for Voluntold
+Replays the dashboard AJAX workflow with and without the cached principal
+and reports the SQL statements issued per request.
+"""
+
+import contextlib
+import io
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import event
+from app import app
+from models import db
+from models.user import User
+from models.upcoming_event import UpcomingEvent
+from models.event_district_mapping import EventDistrictMapping
+from services.user_cache import principal_cache
+
+EVENT_ID = 'TEST_LOADER_01'
+USERNAME = 'TEST_loader_user'
+
+# (label, method, url, json body) - the calls the dashboard makes while a user works
+WORKFLOW = [
+    ('toggle visibility', 'post', '/events/toggle-event-visibility', {'event_id': EVENT_ID, 'visible': True}),
+    ('save note', 'put', f'/events/api/events/{EVENT_ID}/note', {'note': 'Bring ID'}),
+    ('add district', 'post', f'/events/api/events/{EVENT_ID}/districts', {'district': 'TEST District'}),
+    ('remove district', 'delete', f'/events/api/events/{EVENT_ID}/districts/TEST District', None),
+    ('delete note', 'delete', f'/events/api/events/{EVENT_ID}/note', None),
+    ('archive list', 'get', '/api/events/archive', None),
+]
+
+
+def setup_data():
+    cleanup_data()
+    user = User(username=USERNAME, email='test_loader@example.com',
+                password_hash='not-a-real-hash', is_admin=True)
+    event_row = UpcomingEvent(
+        salesforce_id=EVENT_ID,
+        name='TEST_Loader Event',
+        available_slots=5,
+        filled_volunteer_jobs=0,
+        date_and_time='12/15/2025 9:00 AM to 11:00 AM',
+        event_type='Career Jumping',
+        start_date=datetime.now(timezone.utc) + timedelta(days=30),
+        status='active'
+    )
+    db.session.add_all([user, event_row])
+    db.session.commit()
+    return user.id
+
+
+def cleanup_data():
+    event_row = UpcomingEvent.query.filter_by(salesforce_id=EVENT_ID).first()
+    if event_row:
+        EventDistrictMapping.query.filter_by(event_id=event_row.id).delete()
+        db.session.delete(event_row)
+    User.query.filter_by(username=USERNAME).delete()
+    db.session.commit()
+
+
+def run_workflow(user_id, ttl, rounds):
+    """Run the workflow and return {label: (total statements, user statements)} per request"""
+    app.config['USER_CACHE_TTL'] = ttl
+    principal_cache.clear()
+    counts = {label: [0, 0] for label, *_ in WORKFLOW}
+    current = {}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'label' in current:
+            counts[current['label']][0] += 1
+            if 'FROM users' in statement:
+                counts[current['label']][1] += 1
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+        # Routes print debug output; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(rounds):
+                for label, method, url, body in WORKFLOW:
+                    current['label'] = label
+                    getattr(client, method)(url, json=body)
+                    current.pop('label')
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    return {label: (total / rounds, users / rounds) for label, (total, users) in counts.items()}
+
+
+def main(rounds=20):
+    # Requests run outside this context so each gets its own session, as in production
+    with app.app_context():
+        user_id = setup_data()
+    try:
+        uncached = run_workflow(user_id, ttl=0, rounds=rounds)
+        cached = run_workflow(user_id, ttl=60, rounds=rounds)
+    finally:
+        app.config['USER_CACHE_TTL'] = 60
+        with app.app_context():
+            cleanup_data()
+
+    print(f"SQL statements per request (average over {rounds} rounds)")
+    print("=" * 64)
+    print(f"{'request':<20}{'uncached':>12}{'cached':>12}{'user loads saved':>20}")
+    total_saved = 0
+    for label, *_ in WORKFLOW:
+        before, after = uncached[label][0], cached[label][0]
+        saved = uncached[label][1] - cached[label][1]
+        total_saved += saved
+        print(f"{label:<20}{before:>12.2f}{after:>12.2f}{saved:>20.2f}")
+    print("=" * 64)
+    print(f"User queries saved per workflow: {total_saved:.2f} of {len(WORKFLOW)} requests")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Connection Pool Stress Test for Voluntold
+Runs more concurrent workers than the pool has connections, each holding its
+connection for --hold-ms (a slow query), and reports checkout wait
+percentiles, timeouts and peak overflow. Use it to size DB_POOL_SIZE /
+DB_MAX_OVERFLOW / DB_POOL_TIMEOUT against the gunicorn thread count, and to
+see what the pool metrics look like when the pool is exhausted.
+
+Usage:
+    python scripts/stress_db_pool.py --workers 16 --pool-size 4 --max-overflow 0 --pool-timeout 1
+    python scripts/stress_db_pool.py --database-url postgresql://localhost/voluntold --workers 32 --hold-ms 100
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from sqlalchemy import create_engine, exc, text  # noqa: E402
+
+from services.db_pool import (POOL_TIMEOUTS_TOTAL, POOL_WAIT_SECONDS, TimedQueuePool,  # noqa: E402
+                              engine_options)
+
+DEFAULT_DATABASE_URL = 'sqlite:///instance/stress_pool.db'
+BIND = 'stress'
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run(engine, workers: int, tasks: int, hold_ms: float) -> dict:
+    waits, lock = [], threading.Lock()
+    peak = {'checked_out': 0, 'overflow': 0}
+    timeouts = 0
+
+    def task(_):
+        nonlocal timeouts
+        started = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                waited = time.perf_counter() - started
+                with lock:
+                    waits.append(waited)
+                    peak['checked_out'] = max(peak['checked_out'], engine.pool.checkedout())
+                    peak['overflow'] = max(peak['overflow'], engine.pool.overflow())
+                conn.execute(text('SELECT 1'))
+                time.sleep(hold_ms / 1000)  # a slow query holding its connection
+        except exc.TimeoutError:
+            with lock:
+                timeouts += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(task, range(tasks)))
+    elapsed = time.perf_counter() - started
+    return {
+        'tasks': tasks,
+        'completed': len(waits),
+        'timeouts': timeouts,
+        'throughput_per_s': round(len(waits) / elapsed, 1),
+        'wait_ms': {
+            'p50': round(_percentile(waits, 50) * 1000, 1),
+            'p95': round(_percentile(waits, 95) * 1000, 1),
+            'max': round(max(waits, default=0) * 1000, 1),
+            'mean': round(statistics.mean(waits) * 1000, 1) if waits else 0.0,
+        },
+        'peak_checked_out': peak['checked_out'],
+        'peak_overflow': peak['overflow'],
+        'metrics': {
+            'voluntold_db_pool_wait_seconds_count': POOL_WAIT_SECONDS.count(bind=BIND),
+            'voluntold_db_pool_timeouts_total': POOL_TIMEOUTS_TOTAL.value(bind=BIND),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Saturate the connection pool and report waits and timeouts')
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL)
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent threads (e.g. gunicorn threads)')
+    parser.add_argument('--tasks', type=int, default=200, help='Total connection checkouts')
+    parser.add_argument('--hold-ms', type=float, default=50, help='How long each task keeps its connection')
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-overflow', type=int, default=0)
+    parser.add_argument('--pool-timeout', type=float, default=1)
+    parser.add_argument('--output', help='Write results to this JSON file')
+    args = parser.parse_args()
+
+    options = engine_options(args.database_url, pool_size=args.pool_size, max_overflow=args.max_overflow,
+                             pool_timeout=args.pool_timeout)
+    if options.get('poolclass') is not TimedQueuePool:
+        parser.error('an in-memory SQLite database has no pool to saturate; use a file or a server database')
+    if args.database_url.startswith('sqlite:///'):
+        os.makedirs(os.path.dirname(os.path.abspath(args.database_url[len('sqlite:///'):])), exist_ok=True)
+    engine = create_engine(args.database_url, **options)
+    engine.pool.metrics_bind = BIND
+
+    result = run(engine, args.workers, args.tasks, args.hold_ms)
+    engine.dispose()
+
+    capacity = args.pool_size + args.max_overflow
+    print(f"{args.workers} workers on {capacity} connections (pool {args.pool_size} + overflow "
+          f"{args.max_overflow}), {args.hold_ms:g} ms per checkout, timeout {args.pool_timeout:g} s:")
+    print(f"  completed {result['completed']}/{result['tasks']}, timeouts {result['timeouts']}, "
+          f"{result['throughput_per_s']}/s")
+    print(f"  checkout wait ms: p50 {result['wait_ms']['p50']}  p95 {result['wait_ms']['p95']}  "
+          f"max {result['wait_ms']['max']}")
+    print(f"  peak checked out {result['peak_checked_out']}, peak overflow {result['peak_overflow']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'args': vars(args), **result}, f, indent=2)
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
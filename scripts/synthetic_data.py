@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset Generator for Voluntold
+Creates a seeded, reproducible dataset of events, district mappings, school
+mappings, users and virtual events at benchmark scale (1k/10k/100k events).
+
+The generator functions are importable (benchmark_endpoints.py uses them) and
+also produce upstream-shaped records (Salesforce Session__c rows and virtual
+event sheet rows) so the sync/upsert paths can be driven with the same data.
+
+Usage:
+    python scripts/synthetic_data.py --scale 10k --reset
+    python scripts/synthetic_data.py --events 2500 --districts 120 --seed 7 \\
+        --database-url postgresql://localhost/voluntold_bench --reset
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+# Add the project root to the path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+INSERT_CHUNK_SIZE = 5000
+# Every synthetic user logs in with this password
+PASSWORD = 'synthetic'
+
+EVENT_TYPES = ['Career Jumping', 'Career Speaker', 'DIA - Classroom Speaker', 'DIA - Career Fair',
+               'Career Fair', 'Workplace Visit', 'Volunteer Orientation', 'Mock Interviews']
+VIRTUAL_SESSION_TYPES = ['Career Exploration', 'Industry Chat', 'Teacher Requested', 'Skills Workshop']
+TOPICS = ['Engineering', 'Healthcare', 'Finance', 'Arts', 'Technology', 'Trades', 'Public Service', 'Science']
+SCHOOL_LEVELS = ['Elementary', 'Middle', 'High']
+SESSION_STATUSES = ['Confirmed', 'Requested', 'Pending']
+SESSION_LENGTH = timedelta(hours=2)
+DISTRICT_WORDS = ['North', 'South', 'East', 'West', 'Central', 'Lake', 'River', 'Prairie', 'Valley', 'Hill',
+                  'Park', 'Oak', 'Cedar', 'Maple', 'Grand', 'Liberty', 'Union', 'Summit', 'Spring', 'Pine']
+
+
+@dataclass
+class DatasetSpec:
+    """Row counts and ratios for one generated dataset"""
+
+    events: int
+    districts: int
+    schools_per_district: int = 8
+    users: int = 100
+    virtual_ratio: float = 0.1
+    archived_ratio: float = 0.3
+    max_districts_per_event: int = 3
+    seed: int = 42
+
+    @classmethod
+    def for_scale(cls, scale: str, seed: int = 42) -> 'DatasetSpec':
+        """Spec for a named scale: hundreds of districts and thousands of sessions at the top end"""
+        events = SCALES[scale] if scale in SCALES else int(scale)
+        return cls(
+            events=events,
+            districts=max(10, min(500, events // 50)),
+            users=max(50, events // 20),
+            seed=seed,
+        )
+
+    @property
+    def virtual_events(self) -> int:
+        return int(self.events * self.virtual_ratio)
+
+    @property
+    def salesforce_events(self) -> int:
+        return self.events - self.virtual_events
+
+
+def district_names(spec: DatasetSpec) -> List[str]:
+    """Deterministic, unique district names"""
+    names = []
+    for index in range(spec.districts):
+        word = DISTRICT_WORDS[index % len(DISTRICT_WORDS)]
+        names.append(f'{word} {index // len(DISTRICT_WORDS) + 1} School District')
+    return names
+
+
+def salesforce_id(index: int) -> str:
+    """18-character Session__c id"""
+    return f'a0S{index:015d}'
+
+
+def salesforce_event_records(spec: DatasetSpec, start: int = 0, count: int = None,
+                             rng: random.Random = None) -> List[Dict]:
+    """Session__c records as returned by the Salesforce query in sync_upcoming_events"""
+    rng = rng or random.Random(spec.seed)
+    count = spec.salesforce_events if count is None else count
+    today = datetime.now(timezone.utc).date()
+    records = []
+    for index in range(start, start + count):
+        start_date = today + timedelta(days=rng.randint(2, 180))
+        starts = datetime(start_date.year, start_date.month, start_date.day, rng.randint(8, 14))
+        ends = starts + SESSION_LENGTH
+        records.append({
+            'attributes': {'type': 'Session__c', 'url': f'/services/data/v59.0/sobjects/Session__c/{salesforce_id(index)}'},
+            'Id': salesforce_id(index),
+            'Name': f'SYN {rng.choice(EVENT_TYPES)} #{index}',
+            'Available_Slots__c': float(rng.randint(1, 30)),
+            'Filled_Volunteer_Jobs__c': float(rng.randint(0, 20)),
+            'Date_and_Time_for_Cal__c': f'{starts:%m/%d/%Y %I:%M %p} to {ends:%I:%M %p}',
+            'Session_Type__c': rng.choice(EVENT_TYPES),
+            'Registration_Link__c': f'https://example.org/register/{index}',
+            'Display_on_Website__c': 'Yes' if rng.random() < 0.7 else 'No',
+            'Start_Date__c': start_date.isoformat(),
+            'Session_Status__c': rng.choice(SESSION_STATUSES),
+        })
+    return records
+
+
+def virtual_sheet_rows(spec: DatasetSpec, start: int = 0, count: int = None,
+                       rng: random.Random = None) -> List[Dict]:
+    """Virtual event rows keyed by the sheet columns GoogleSheetsService returns"""
+    rng = rng or random.Random(spec.seed + 1)
+    count = spec.virtual_events if count is None else count
+    districts = district_names(spec)
+    today = datetime.now(timezone.utc).date()
+    rows = []
+    for index in range(start, start + count):
+        event_date = today + timedelta(days=rng.randint(2, 120))
+        district = rng.choice(districts)
+        rows.append({
+            'Status': '',
+            'Date': f'{event_date.month}/{event_date.day}/{event_date.year}',
+            'Time': f'{rng.randint(8, 14)}:00',
+            'Session Type': rng.choice(VIRTUAL_SESSION_TYPES),
+            'Teacher Name': f'Teacher {index}',
+            'School Name': f'{district.replace(" School District", "")} School {rng.randint(1, spec.schools_per_district)}',
+            'School Level': rng.choice(SCHOOL_LEVELS),
+            'District': district,
+            'Session Title': f'SYN Virtual {rng.choice(TOPICS)} Session #{index}',
+            'Presenter': '',
+            'Organization': '',
+            'Presenter Location': '',
+            'Topic/Theme': rng.choice(TOPICS),
+            'Session Link': f'https://example.org/virtual/{index}',
+        })
+    return rows
+
+
+def school_mapping_rows(spec: DatasetSpec) -> List[Dict]:
+    rows = []
+    for district_index, district in enumerate(district_names(spec)):
+        short_name = district.replace(' School District', '')
+        for school in range(spec.schools_per_district):
+            rows.append({
+                'id': district_index * spec.schools_per_district + school + 1,
+                'name': f'{short_name} School {school + 1}',
+                'district': district,
+                'parent_salesforce_id': f'001{district_index:06d}{school:09d}',
+            })
+    return rows
+
+
+def user_rows(spec: DatasetSpec, count: int = None) -> List[Dict]:
+    """Rows for users; count defaults to spec.users (larger counts extend the same sequence)"""
+    from werkzeug.security import generate_password_hash
+    from models.user import SecurityLevel
+
+    rng = random.Random(spec.seed + 2)
+    now = datetime.now(timezone.utc)
+    # Hashed once: per-user hashing would dominate generation time
+    password_hash = generate_password_hash(PASSWORD)
+    # The first user is the admin; the rest are mostly regular users
+    levels = (SecurityLevel.USER, SecurityLevel.USER, SecurityLevel.USER, SecurityLevel.SUPERVISOR)
+    return [{
+        'id': index + 1,
+        'username': f'syn_user_{index}',
+        'email': f'syn_user_{index}@example.org',
+        'password_hash': password_hash,
+        'first_name': f'First{index}',
+        'last_name': f'Last{index}',
+        'security_level': int(SecurityLevel.ADMIN) if index == 0 else int(rng.choice(levels)),
+        'created_at': now,
+        'updated_at': now - timedelta(minutes=rng.randint(0, 60 * 24 * 30)),
+    } for index in range(spec.users if count is None else count)]
+
+
+def polaris_user_records(spec: DatasetSpec, extra: int = 0) -> List[Dict]:
+    """Users as the Polaris sync export returns them: every local user plus extra new ones"""
+    return [{
+        'username': row['username'],
+        'email': row['email'],
+        'password_hash': row['password_hash'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'security_level': row['security_level'],
+        'updated_at': row['updated_at'].replace(tzinfo=None).isoformat(),
+    } for row in user_rows(spec, count=spec.users + extra)]
+
+
+def event_rows(spec: DatasetSpec) -> Iterator[Dict]:
+    """Rows for upcoming_events: Salesforce sessions (some archived) then virtual events"""
+    rng = random.Random(spec.seed + 3)
+    now = datetime.now(timezone.utc)
+    event_id = 0
+    for record in salesforce_event_records(spec):
+        event_id += 1
+        archived = rng.random() < spec.archived_ratio
+        yield {
+            'id': event_id,
+            'salesforce_id': record['Id'],
+            'name': record['Name'],
+            'available_slots': 0 if archived else int(record['Available_Slots__c']),
+            'filled_volunteer_jobs': int(record['Filled_Volunteer_Jobs__c']) or (1 if archived else 0),
+            'date_and_time': record['Date_and_Time_for_Cal__c'],
+            'event_type': record['Session_Type__c'],
+            'registration_link': record['Registration_Link__c'],
+            'display_on_website': record['Display_on_Website__c'] == 'Yes',
+            'start_date': datetime.fromisoformat(record['Start_Date__c']).replace(tzinfo=timezone.utc),
+            'status': 'archived' if archived else 'active',
+            'session_status': record['Session_Status__c'],
+            'note': 'Bring photo ID' if rng.random() < 0.1 else None,
+            'source': 'salesforce',
+            'created_at': now,
+            'updated_at': now,
+        }
+    for row in virtual_sheet_rows(spec):
+        event_id += 1
+        yield {
+            'id': event_id,
+            'salesforce_id': None,
+            'name': row['Session Title'],
+            'available_slots': 50,
+            'filled_volunteer_jobs': 0,
+            'date_and_time': f"{row['Date']} {row['Time']}",
+            'event_type': row['Session Type'],
+            'registration_link': row['Session Link'],
+            'display_on_website': True,
+            'start_date': datetime.strptime(row['Date'], '%m/%d/%Y').replace(tzinfo=timezone.utc),
+            'status': 'active',
+            'source': 'virtual',
+            'spreadsheet_id': 'synthetic-sheet',
+            'topic_theme': row['Topic/Theme'],
+            'teacher_name': row['Teacher Name'],
+            'school_name': row['School Name'],
+            'school_level': row['School Level'],
+            'district': row['District'],
+            'created_at': now,
+            'updated_at': now,
+        }
+
+
+def district_mapping_rows(spec: DatasetSpec) -> Iterator[Dict]:
+    """Link most Salesforce events to one or more districts"""
+    rng = random.Random(spec.seed + 4)
+    districts = district_names(spec)
+    now = datetime.now(timezone.utc)
+    for event_id in range(1, spec.salesforce_events + 1):
+        if rng.random() < 0.2:
+            continue
+        for district in rng.sample(districts, rng.randint(1, min(spec.max_districts_per_event, len(districts)))):
+            yield {'event_id': event_id, 'district': district, 'created_at': now}
+
+
+def _insert_chunked(session, model, rows) -> int:
+    from sqlalchemy import insert
+
+    total, chunk = 0, []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK_SIZE:
+            session.execute(insert(model), chunk)
+            total, chunk = total + len(chunk), []
+    if chunk:
+        session.execute(insert(model), chunk)
+        total += len(chunk)
+    return total
+
+
+def populate(spec: DatasetSpec, reset: bool = False) -> Dict[str, int]:
+    """Write the dataset through the app's session. Must run inside an app context."""
+    from models import db
+    from models.user import User
+    from models.upcoming_event import UpcomingEvent
+    from models.event_district_mapping import EventDistrictMapping
+    from models.school_mapping import SchoolMapping
+    from services.user_cache import principal_cache
+
+    if reset:
+        db.session.remove()
+        db.drop_all()
+    db.create_all()
+
+    counts = {
+        'school_mappings': _insert_chunked(db.session, SchoolMapping, school_mapping_rows(spec)),
+        'users': _insert_chunked(db.session, User, user_rows(spec)),
+        'events': _insert_chunked(db.session, UpcomingEvent, event_rows(spec)),
+        'event_district_mappings': _insert_chunked(db.session, EventDistrictMapping, district_mapping_rows(spec)),
+    }
+    db.session.commit()
+    principal_cache.clear()
+    return counts
+
+
+def use_database(url: str) -> None:
+    """Point the app at another database. Call before importing app."""
+    if url:
+        os.environ['DEV_DATABASE_URL'] = url
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic Voluntold dataset')
+    parser.add_argument('--scale', default='1k', help='1k, 10k, 100k or an event count')
+    parser.add_argument('--events', type=int, help='Override the number of events')
+    parser.add_argument('--districts', type=int, help='Override the number of districts')
+    parser.add_argument('--users', type=int, help='Override the number of users')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='Target database (defaults to the development database)')
+    parser.add_argument('--reset', action='store_true', help='Drop and recreate all tables first')
+    args = parser.parse_args()
+
+    spec = DatasetSpec.for_scale(args.scale, seed=args.seed)
+    for field in ('events', 'districts', 'users'):
+        if getattr(args, field) is not None:
+            setattr(spec, field, getattr(args, field))
+
+    use_database(args.database_url)
+    from app import app
+
+    started = time.perf_counter()
+    with app.app_context():
+        counts = populate(spec, reset=args.reset)
+    elapsed = time.perf_counter() - started
+
+    print(f"Generated dataset (seed {spec.seed}) in {elapsed:.1f}s:")
+    for table, count in counts.items():
+        print(f"  {table:<24} {count:>8}")
+    print(f"  {'districts':<24} {spec.districts:>8}")
+
+
+if __name__ == '__main__':
+    main()
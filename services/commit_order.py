@@ -0,0 +1,57 @@
+"""
+Commit-ordered ids for the logs consumers read by cursor.
+
+The change log (/api/v1/events/changes) hands out its autoincrement id as
+the cursor, and readers ask for ids above the last one they saw. An id is
+assigned when its row is inserted, not when its transaction commits. If two
+writers overlapped, the one holding the lower id could commit after a
+reader had already moved past the higher one, and its rows would never be
+delivered.
+
+So writers of these logs are serialized from their first log insert until
+they commit. A writer that gets id N commits or rolls back before any other
+writer can insert, so ids become visible in order:
+
+- SQLite does this already: a write transaction holds the database lock
+  from its first write until it commits.
+- On PostgreSQL the flush that inserts a log row first takes a
+  transaction-level advisory lock, which the database releases at commit
+  or rollback.
+
+Log models opt in with `__commit_ordered__ = True`. Writers add log rows
+last, right before committing, so the lock is held briefly.
+"""
+
+from sqlalchemy import event, text
+
+from services.db_routing import RoutingSession
+from services.job_lock import ADVISORY_LOCK_NAMESPACE
+
+COMMIT_ORDER_LOCK_KEY = 0  # second half of the advisory key; job locks use crc32 of their name
+LOCKED_INFO_KEY = 'commit_order_locked'
+
+
+def _serialize_log_writers(session, flush_context, instances) -> None:
+    if session.info.get(LOCKED_INFO_KEY):
+        return
+    log_row = next((obj for obj in session.new if getattr(type(obj), '__commit_ordered__', False)), None)
+    if log_row is None:
+        return
+    # An INSERT clause routes to the primary, where the flush will write
+    connection = session.connection(bind_arguments={'clause': type(log_row).__table__.insert()})
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text('SELECT pg_advisory_xact_lock(:namespace, :key)'),
+                       {'namespace': ADVISORY_LOCK_NAMESPACE, 'key': COMMIT_ORDER_LOCK_KEY})
+    session.info[LOCKED_INFO_KEY] = True
+
+
+def _release(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(LOCKED_INFO_KEY, None)
+
+
+def init_commit_order(app) -> None:
+    if not event.contains(RoutingSession, 'before_flush', _serialize_log_writers):
+        event.listen(RoutingSession, 'before_flush', _serialize_log_writers)
+        event.listen(RoutingSession, 'after_transaction_end', _release)
@@ -0,0 +1,135 @@
+"""
+Negotiated response compression for JSON and HTML.
+
+An after_request hook compresses eligible responses with brotli (when the
+brotli package is installed and the client accepts it) or gzip:
+
+- only 200 responses of COMPRESS_MIMETYPES at least COMPRESS_MIN_SIZE bytes;
+  small bodies cost more CPU than the bytes they save
+- never streamed responses (the SSE stream, NDJSON exports) or responses
+  that already carry a Content-Encoding (the precompressed /feeds/ files)
+- a strong ETag gets the coding appended, and a request already holding
+  that tag is answered 304
+
+Snapshot feeds (services.feed_cache) are compressed in every coding when
+the snapshot is built (encode_snapshot), so requests for it only send
+stored bytes and none of them pays for the compression. Builds run on the
+request that missed, so the snapshot levels stay moderate:
+COMPRESS_SNAPSHOT_LEVEL (gzip 9) and COMPRESS_SNAPSHOT_BR_QUALITY (brotli
+5; quality 11 takes seconds on a large feed for about a fifth fewer bytes).
+Everything else is compressed per request at the faster COMPRESS_LEVEL /
+COMPRESS_BR_QUALITY.
+"""
+
+import gzip
+from typing import Dict, Optional
+
+from flask import request
+
+from services.metrics import Counter
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only without it
+    brotli = None
+
+DEFAULT_MIMETYPES = ('application/json', 'text/html', 'text/calendar')
+DEFAULT_MIN_SIZE = 1024
+# Snapshots are compressed once per build, so they can afford slower settings
+SNAPSHOT_GZIP_LEVEL = 9
+SNAPSHOT_BR_QUALITY = 5
+
+COMPRESSED_BYTES_TOTAL = Counter('voluntold_compressed_bytes_total',
+                                 'Response bytes before and after compression, by coding and stage')
+
+
+def compress(body: bytes, coding: str, level: int) -> bytes:
+    if coding == 'br':
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def choose_coding(accept_encodings) -> Optional[str]:
+    """The content coding to use for a request, preferring brotli"""
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def _snapshot_level(coding: str, config) -> int:
+    if coding == 'br':
+        return config.get('COMPRESS_SNAPSHOT_BR_QUALITY', SNAPSHOT_BR_QUALITY)
+    return config.get('COMPRESS_SNAPSHOT_LEVEL', SNAPSHOT_GZIP_LEVEL)
+
+
+def encode_snapshot(body: Optional[bytes], config) -> Dict[str, bytes]:
+    """A snapshot body in each coding the hook may send; empty if it would send the body as is"""
+    if body is None or not config.get('COMPRESS', True) or \
+            len(body) < config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE):
+        return {}
+    codings = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return {coding: compress(body, coding, _snapshot_level(coding, config)) for coding in codings}
+
+
+def _eligible(response, config) -> bool:
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    if response.mimetype not in config.get('COMPRESS_MIMETYPES', DEFAULT_MIMETYPES):
+        return False
+    return response.content_length is not None and \
+        response.content_length >= config.get('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)
+
+
+def init_compression(app) -> None:
+    if not app.config.get('COMPRESS', True):
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if not _eligible(response, app.config):
+            return response
+        # Cacheable either way: the body depends on the request's Accept-Encoding
+        response.vary.add('Accept-Encoding')
+        coding = choose_coding(request.accept_encodings)
+        if coding is None:
+            return response
+
+        # A strong ETag names one representation, so the compressed one gets its own;
+        # weak ones (the calendars) already cover every encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            etag = f'{etag}-{coding}'
+            if request.if_none_match.contains(etag):
+                # The client holds this compressed representation; the view compared the plain tag
+                response.status_code = 304
+                response.set_data(b'')
+                response.set_etag(etag)
+                return response
+
+        body = response.get_data()
+        snapshot = getattr(response, 'snapshot', None)
+        if snapshot is not None:
+            compressed = snapshot.encoded.get(coding)
+            if compressed is None:
+                # Built while compression was off or the body was under the minimum size then;
+                # concurrent requests may both compress, and they store the same bytes
+                compressed = snapshot.encoded[coding] = compress(body, coding, _snapshot_level(coding, app.config))
+            stage = 'snapshot'
+        else:
+            level = app.config.get('COMPRESS_BR_QUALITY', 4) if coding == 'br' \
+                else app.config.get('COMPRESS_LEVEL', 6)
+            compressed = compress(body, coding, level)
+            stage = 'request'
+
+        COMPRESSED_BYTES_TOTAL.inc(len(body), coding=coding, stage=stage, kind='original')
+        COMPRESSED_BYTES_TOTAL.inc(len(compressed), coding=coding, stage=stage, kind='compressed')
+        response.set_data(compressed)
+        response.content_encoding = coding
+        if etag and not weak:
+            response.set_etag(etag)
+        return response
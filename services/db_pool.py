@@ -0,0 +1,103 @@
+"""
+Connection pool configuration and telemetry.
+
+engine_options() turns the DB_POOL_* settings into SQLALCHEMY_ENGINE_OPTIONS,
+which Flask-SQLAlchemy applies to every engine (the primary and the read
+replica). Pre-ping is on by default: a connection dropped by the server (e.g.
+Heroku Postgres maintenance) is replaced at checkout instead of failing the
+request that drew it.
+
+Pools are TimedQueuePool, which records how long each checkout waited and
+counts checkouts that timed out. init_pool_metrics() adds gauges of the
+size, checked-out connections and overflow of each engine's pool.
+"""
+
+import time
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from services.metrics import Counter, Gauge, Histogram
+
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30)
+
+POOL_WAIT_SECONDS = Histogram('voluntold_db_pool_wait_seconds',
+                              'Time to check a connection out of the pool, by bind',
+                              buckets=POOL_WAIT_BUCKETS)
+POOL_TIMEOUTS_TOTAL = Counter('voluntold_db_pool_timeouts_total',
+                              'Checkouts that gave up after pool_timeout, by bind')
+POOL_SIZE = Gauge('voluntold_db_pool_size', 'Configured pool size, by bind')
+POOL_CHECKED_OUT = Gauge('voluntold_db_pool_checked_out', 'Connections in use, by bind')
+POOL_OVERFLOW = Gauge('voluntold_db_pool_overflow',
+                      'Connections open beyond pool_size (negative while the pool is filling), by bind')
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports checkout wait time and timeouts"""
+
+    metrics_bind = 'default'
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS_TOTAL.inc(bind=self.metrics_bind)
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(time.perf_counter() - started, bind=self.metrics_bind)
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep its label
+        pool = super().recreate()
+        pool.metrics_bind = self.metrics_bind
+        return pool
+
+
+def _in_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri: Optional[str], pool_size: int = 5, max_overflow: int = 10, pool_timeout: float = 30,
+                   pool_recycle: int = 1800, pre_ping: bool = True, statement_timeout_ms: int = 0) -> dict:
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for a database URI.
+
+    In-memory SQLite gets only pre-ping: Flask-SQLAlchemy gives it a single
+    shared connection (StaticPool), which takes no sizing; a shared-cache
+    memory URI is pooled like a file. The statement timeout is set per
+    connection on PostgreSQL and ignored elsewhere.
+    """
+    options = {'pool_pre_ping': pre_ping}
+    url = make_url(uri) if uri else None
+    if url is None or _in_memory_sqlite(url):
+        return options
+    options.update(poolclass=TimedQueuePool, pool_size=pool_size, max_overflow=max_overflow,
+                   pool_timeout=pool_timeout, pool_recycle=pool_recycle)
+    if statement_timeout_ms and url.get_backend_name() == 'postgresql':
+        options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout_ms)}'}
+    elif url.get_backend_name() == 'sqlite' and url.query.get('mode') == 'memory':
+        # pysqlite binds memory connections to their creating thread; pooled ones move between threads
+        options['connect_args'] = {'check_same_thread': False}
+    return options
+
+
+def _pool_stat(engine, method):
+    def read():
+        pool = engine.pool  # re-read: dispose() replaces it
+        return getattr(pool, method)() if isinstance(pool, QueuePool) else 0
+    return read
+
+
+def init_pool_metrics(app, db) -> None:
+    with app.app_context():
+        engines = dict(db.engines)
+    for bind, engine in engines.items():
+        label = bind or 'default'
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.metrics_bind = label
+        POOL_SIZE.set_function(_pool_stat(engine, 'size'), bind=label)
+        POOL_CHECKED_OUT.set_function(_pool_stat(engine, 'checkedout'), bind=label)
+        POOL_OVERFLOW.set_function(_pool_stat(engine, 'overflow'), bind=label)
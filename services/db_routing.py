@@ -0,0 +1,134 @@
+"""
+Read-replica routing for the public feeds.
+
+When REPLICA_DATABASE_URL is set, it becomes the 'replica' entry of
+SQLALCHEMY_BINDS, so Flask-SQLAlchemy gives it an engine and pool of its
+own. Views marked @replica_read (the anonymous GET feeds and APIs) then read
+through it, and everything else (writes, flushes, admin pages, syncs) stays
+on the primary. Without a replica configured everything uses the primary.
+
+Reads go back to the primary for REPLICA_STICKY_SECONDS after a write, so
+replication lag never hides a change from whoever just made it:
+
+- in the browser that made it: an authenticated non-GET request stamps the
+  session, and that session's feed requests read from the primary
+- in the worker that made it: a commit also invalidates that worker's
+  snapshots (services.feed_cache), and the rebuild must see the change
+
+Snapshot feeds are shared between requests, so a sticky request does not
+take a cached snapshot unless it was built from the primary after the write
+that made the request sticky (primary_since()). Otherwise it rebuilds the
+snapshot from the primary, which then serves everyone.
+"""
+
+import time
+from functools import wraps
+from typing import Optional
+
+from flask import current_app, g, has_request_context, request, session
+from flask_login import current_user
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+from services.metrics import Counter
+
+REPLICA_BIND = 'replica'
+STICKY_SESSION_KEY = 'db_primary_until'
+DEFAULT_STICKY_SECONDS = 10
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+READS_TOTAL = Counter('voluntold_db_routed_reads_total', 'Requests of @replica_read views by database used')
+
+_last_write = 0.0  # monotonic time of this process's last write
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends a @replica_read request's queries to the replica"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase) and reading_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reading_replica() -> bool:
+    """Whether this request's queries go to the replica"""
+    return has_request_context() and g.get('db_replica', False)
+
+
+def primary_since() -> Optional[float]:
+    """For a sticky request, the wall-clock time of the write it must see; None otherwise"""
+    return g.get('db_primary_since') if has_request_context() else None
+
+
+def replica_configured(app=None) -> bool:
+    return REPLICA_BIND in (app or current_app).config.get('SQLALCHEMY_BINDS', {})
+
+
+def _sticky_since() -> Optional[float]:
+    """Wall-clock time of the recent write that keeps this request on the primary, or None"""
+    window = current_app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+    since_write = time.monotonic() - _last_write
+    if since_write < window:
+        return time.time() - since_write
+    # Only look at the session when the browser sent one: reading it marks the response Vary: Cookie
+    if current_app.config.get('SESSION_COOKIE_NAME', 'session') not in request.cookies:
+        return None
+    until = session.get(STICKY_SESSION_KEY, 0)
+    # Stamped after the write's commit, so this is no earlier than the write
+    return until - window if until > time.time() else None
+
+
+def replica_read(view):
+    """Serve an anonymous GET view from the replica, unless a recent write makes it sticky"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method not in SAFE_METHODS or not replica_configured():
+            return view(*args, **kwargs)
+        since = _sticky_since()
+        g.db_replica = since is None
+        if since is not None:
+            g.db_primary_since = since
+        READS_TOTAL.inc(target='replica' if g.db_replica else 'primary')
+        try:
+            return view(*args, **kwargs)
+        finally:
+            g.pop('db_replica', None)
+            g.pop('db_primary_since', None)
+    return wrapper
+
+
+def _mark_write(*args, **kwargs) -> None:
+    global _last_write
+    _last_write = time.monotonic()
+
+
+def _mark_bulk_write(orm_execute_state) -> None:
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        _mark_write()
+
+
+def init_db_routing(app) -> None:
+    if not replica_configured(app):
+        return
+
+    from models import db
+
+    # init_app gave the bind an empty metadata of its own, so create_all()/drop_all() would
+    # also target the replica, and fail in any other app sharing `db` without one. The
+    # replica mirrors the primary's schema through replication and owns no tables.
+    db.metadatas.pop(REPLICA_BIND, None)
+
+    if not event.contains(RoutingSession, 'after_flush', _mark_write):
+        event.listen(RoutingSession, 'after_flush', _mark_write)
+        event.listen(RoutingSession, 'do_orm_execute', _mark_bulk_write)
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and current_user.is_authenticated:
+            window = app.config.get('REPLICA_STICKY_SECONDS', DEFAULT_STICKY_SECONDS)
+            session[STICKY_SESSION_KEY] = time.time() + window
+        return response
@@ -0,0 +1,39 @@
+"""
+Event categories classified from Session_Type__c.
+
+Feeds filter on the indexed UpcomingEvent.category instead of matching
+event_type text (a leading-wildcard ILIKE cannot use an index). Upserts
+classify each event with EVENT_CATEGORY_RULES: (regex, category) pairs
+tried in order against the session type, case-insensitively. An event no
+rule matches falls back to its source, 'virtual' or 'in_person'.
+
+After changing the rules, `flask backfill-events --all` reclassifies the
+stored events.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+DIA = 'dia'
+IN_PERSON = 'in_person'
+VIRTUAL = 'virtual'
+
+DEFAULT_RULES: Tuple[Tuple[str, str], ...] = (
+    (r'\bDIA\b', DIA),
+)
+
+
+@lru_cache(maxsize=16)
+def _compiled(rules: Tuple[Tuple[str, str], ...]):
+    return [(re.compile(pattern, re.IGNORECASE), category) for pattern, category in rules]
+
+
+def classify(event_type: Optional[str], source: Optional[str] = 'salesforce',
+             rules: Iterable[Sequence[str]] = DEFAULT_RULES) -> str:
+    """The category of a session type, falling back to the event's source"""
+    if event_type:
+        for pattern, category in _compiled(tuple(tuple(rule) for rule in rules)):
+            if pattern.search(event_type):
+                return category
+    return VIRTUAL if source == 'virtual' else IN_PERSON
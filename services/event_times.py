@@ -0,0 +1,106 @@
+"""
+Start and end times parsed from an event's free-text date_and_time.
+
+Salesforce sends Date_and_Time_for_Cal__c as "MM/DD/YYYY HH:MM AM to
+HH:MM PM"; the virtual sheet gives "M/D/YYYY" plus a time that may lack
+AM/PM (read as a 24-hour clock) and an end. Times are local to
+EVENT_TIMEZONE and returned as aware UTC datetimes; an event without a
+time spans its whole local day, midnight to midnight.
+
+The parsed times are stored on UpcomingEvent.starts_at / ends_at during
+upserts and inserts (and by `flask backfill-events`), so readers filter
+and order on the columns. Parsing is cached: a sync re-parses mostly the
+same strings every run.
+"""
+
+import re
+from functools import lru_cache
+from datetime import datetime, time, timedelta, timezone
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+DEFAULT_TIMEZONE = 'America/Chicago'
+DEFAULT_DURATION = timedelta(hours=1)
+
+_PATTERN = re.compile(
+    r'(?P<date>\d{1,2}/\d{1,2}/\d{4})'
+    r'(?:\s+(?:at\s+)?(?P<sh>\d{1,2}):(?P<sm>\d{2})\s*(?P<sp>[AaPp]\.?[Mm]\.?)?'
+    r'(?:\s*(?:to|-|–)\s*(?P<eh>\d{1,2}):(?P<em>\d{2})\s*(?P<ep>[AaPp]\.?[Mm]\.?)?)?)?'
+)
+
+
+class EventTimes(NamedTuple):
+    starts_at: datetime  # aware UTC; local midnight of the day for all-day events
+    ends_at: datetime
+    all_day: bool
+
+    @classmethod
+    def from_columns(cls, starts_at: datetime, ends_at: datetime, tz: str = DEFAULT_TIMEZONE) -> 'EventTimes':
+        """Rebuild stored times; all-day events run from one local midnight to a later one"""
+        zone = ZoneInfo(tz)
+        local_start, local_end = starts_at.astimezone(zone), ends_at.astimezone(zone)
+        all_day = (local_start.time() == time(0) and local_end.time() == time(0)
+                   and local_end.date() > local_start.date())
+        return cls(starts_at, ends_at, all_day)
+
+    def local_dates(self, tz: str = DEFAULT_TIMEZONE):
+        """(first day, day after the last) of an all-day event, in EVENT_TIMEZONE"""
+        zone = ZoneInfo(tz)
+        return self.starts_at.astimezone(zone).date(), self.ends_at.astimezone(zone).date()
+
+
+def _clock(hour: str, minute: str, meridiem: Optional[str]) -> Optional[time]:
+    hour, minute = int(hour), int(minute)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem[0].lower() == 'p' else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return time(hour, minute)
+
+
+@lru_cache(maxsize=4096)
+def parse_event_times(date_and_time: Optional[str], start_date: Optional[datetime] = None,
+                      tz: str = DEFAULT_TIMEZONE) -> Optional[EventTimes]:
+    """
+    Parse date_and_time, falling back to an all-day event on start_date.
+
+    Returns:
+        EventTimes, or None when neither gives a date
+    """
+    match = _PATTERN.search(date_and_time or '')
+    day = None
+    if match:
+        try:
+            day = datetime.strptime(match['date'], '%m/%d/%Y').date()
+        except ValueError:
+            match = None
+    if day is None:
+        if start_date is None:
+            return None
+        day = start_date.date()
+        match = None
+
+    # "9:00 to 11:00 AM" / "9:00 AM to 11:00": one AM/PM covers both times
+    start_meridiem = match['sp'] or match['ep'] if match else None
+    start = _clock(match['sh'], match['sm'], start_meridiem) if match and match['sh'] else None
+    zone = ZoneInfo(tz)
+    if start is None:
+        # Combined per day rather than midnight + 24h, which is off by an hour across DST changes
+        midnight = datetime.combine(day, time(0), tzinfo=zone)
+        next_midnight = datetime.combine(day + timedelta(days=1), time(0), tzinfo=zone)
+        return EventTimes(midnight.astimezone(timezone.utc), next_midnight.astimezone(timezone.utc), True)
+
+    end = _clock(match['eh'], match['em'], match['ep'] or match['sp']) if match['eh'] else None
+    if end is not None and not match['sp'] and start > end and start.hour >= 12:
+        start = start.replace(hour=start.hour - 12)  # "11:00 to 1:00 PM" starts in the morning
+
+    starts_at = datetime.combine(day, start, tzinfo=zone)
+    if end is None:
+        ends_at = starts_at + DEFAULT_DURATION
+    else:
+        ends_at = datetime.combine(day, end, tzinfo=zone)
+        if ends_at <= starts_at:
+            ends_at += timedelta(days=1)  # runs past midnight
+    return EventTimes(starts_at.astimezone(timezone.utc), ends_at.astimezone(timezone.utc), False)
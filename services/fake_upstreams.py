@@ -0,0 +1,288 @@
+"""
+Local stand-ins for the upstream services the syncs call.
+
+One WSGI app serves the subset of each API that Voluntold uses:
+
+- Salesforce: SOAP username/password login (what simple_salesforce sends),
+  the OAuth2 password-grant token endpoint, and REST query/queryMore with a
+  configurable batch size.
+- Google Sheets: the gviz and export CSV endpoints, with the three
+  instruction rows the real virtual events sheet has above its data.
+- Polaris: /api/v1/token and /api/v1/users/sync, as JSON or NDJSON with the
+  watermark trailer.
+
+Latency (fixed plus jitter), error injection per service and the datasets
+are configurable, and randomness is seeded, so sync throughput can be
+measured offline and repeatably. FakeUpstreamServer runs the app on a
+localhost port in a background thread; scripts/fake_upstreams.py serves it
+from the command line.
+"""
+
+import csv
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+# Salesforce reports this as the instance so data calls reuse the login route
+SALESFORCE_INSTANCE = 'login.salesforce.com'
+SHEET_COLUMNS = ['Status', 'Date', 'Time', 'Session Type', 'Teacher Name', 'School Name', 'School Level',
+                 'District', 'Session Title', 'Presenter', 'Organization', 'Presenter Location', 'Topic/Theme',
+                 'Session Link']
+SHEET_PREAMBLE_ROWS = 3
+# The real header cells carry notes after the column name, which GoogleSheetsService strips
+SHEET_HEADER_SUFFIX = ' *'
+SOAP_USERNAME = re.compile(r'<\w+:username>(.*?)</\w+:username>', re.S)
+
+SOAP_LOGIN_RESPONSE = '''<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns="urn:partner.soap.sforce.com">
+<soapenv:Body><loginResponse><result>
+<serverUrl>https://{instance}/services/Soap/u/{version}/00DFAKE</serverUrl>
+<sessionId>{session_id}</sessionId>
+<userName>{username}</userName>
+</result></loginResponse></soapenv:Body></soapenv:Envelope>'''
+
+
+@dataclass
+class FakeUpstreamOptions:
+    """Behaviour knobs for the stand-in services"""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Fraction of requests per service ('salesforce', 'sheets', 'polaris') answered with error_status
+    error_rates: Dict[str, float] = field(default_factory=dict)
+    error_status: int = 503
+    salesforce_page_size: int = 2000
+    seed: int = 0
+
+
+class FakeUpstreams:
+    """Datasets, options and request counters behind the stand-in WSGI app"""
+
+    def __init__(self, salesforce_records: List[dict] = None, sheets: Dict[str, List[dict]] = None,
+                 polaris_users: List[dict] = None, options: FakeUpstreamOptions = None):
+        self.salesforce_records = salesforce_records or []
+        # Sheet id -> rows keyed by SHEET_COLUMNS; rows under '*' are served for any id
+        self.sheets = sheets or {}
+        self.polaris_users = sorted(polaris_users or [], key=lambda user: user.get('updated_at') or '')
+        self.options = options or FakeUpstreamOptions()
+        self.requests: Dict[str, int] = {}
+        self.errors_injected = 0
+        self._rng = random.Random(self.options.seed)
+        self._lock = threading.Lock()
+        self._sessions = set()
+        self._cursors: Dict[str, int] = {}
+        self.app = self._create_app()
+
+    # Shared behaviour
+
+    def _before(self, service: str, endpoint: str) -> Optional[Response]:
+        """Count the request, apply latency and maybe inject an error"""
+        with self._lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            delay = self.options.latency_ms + self._rng.uniform(0, self.options.jitter_ms)
+            fail = self._rng.random() < self.options.error_rates.get(service, 0.0)
+            if fail:
+                self.errors_injected += 1
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            return jsonify({'error': f'Injected {service} failure'}), self.options.error_status
+        return None
+
+    def _create_app(self) -> Flask:
+        app = Flask(__name__)
+
+        @app.route('/services/Soap/u/<version>', methods=['POST'])
+        def salesforce_soap_login(version):
+            error = self._before('salesforce', 'salesforce_login')
+            if error:
+                return error
+            session_id = self._new_session()
+            match = SOAP_USERNAME.search(request.get_data(as_text=True))
+            username = match.group(1) if match else ''
+            body = SOAP_LOGIN_RESPONSE.format(instance=SALESFORCE_INSTANCE, version=version,
+                                              session_id=session_id, username=escape(username))
+            return Response(body, mimetype='text/xml')
+
+        @app.route('/services/oauth2/token', methods=['POST'])
+        def salesforce_oauth_token():
+            error = self._before('salesforce', 'salesforce_login')
+            if error:
+                return error
+            return jsonify({'access_token': self._new_session(), 'instance_url': f'https://{SALESFORCE_INSTANCE}',
+                            'token_type': 'Bearer', 'id': 'https://login.salesforce.com/id/00DFAKE/005FAKE'})
+
+        @app.route('/services/data/<version>/query/', methods=['GET'])
+        @app.route('/services/data/<version>/query', methods=['GET'])
+        def salesforce_query(version):
+            error = self._before('salesforce', 'salesforce_query') or self._check_session()
+            if error:
+                return error
+            records = self._salesforce_matches(request.args.get('q', ''))
+            return jsonify(self._salesforce_page(version, records, 0))
+
+        @app.route('/services/data/<version>/query/<locator>', methods=['GET'])
+        def salesforce_query_more(version, locator):
+            error = self._before('salesforce', 'salesforce_query_more') or self._check_session()
+            if error:
+                return error
+            cursor_id, _, offset = locator.rpartition('-')
+            with self._lock:
+                known = cursor_id in self._cursors
+            if not known or not offset.isdigit():
+                return jsonify([{'errorCode': 'INVALID_QUERY_LOCATOR', 'message': 'invalid query locator'}]), 400
+            return jsonify(self._salesforce_page(version, self.salesforce_records, int(offset), cursor_id))
+
+        @app.route('/spreadsheets/d/<sheet_id>/gviz/tq', methods=['GET'])
+        @app.route('/spreadsheets/d/<sheet_id>/export', methods=['GET'])
+        def sheets_csv(sheet_id):
+            error = self._before('sheets', 'sheets_csv')
+            if error:
+                return error
+            rows = self.sheets.get(sheet_id, self.sheets.get('*'))
+            if rows is None:
+                return Response('Sheet not found', status=404, mimetype='text/plain')
+            return Response(self._sheet_csv(rows), mimetype='text/csv')
+
+        @app.route('/api/v1/token', methods=['POST'])
+        def polaris_token():
+            error = self._before('polaris', 'polaris_token')
+            if error:
+                return error
+            data = request.get_json(silent=True) or {}
+            if not data.get('username') or not data.get('password'):
+                return jsonify({'error': 'Missing username or password'}), 400
+            return jsonify({'token': self._new_session(), 'expires_in': 30 * 24 * 3600})
+
+        @app.route('/api/v1/users/sync', methods=['GET'])
+        def polaris_users_sync():
+            error = self._before('polaris', 'polaris_users_sync')
+            if error:
+                return error
+            with self._lock:
+                authorized = request.headers.get('X-API-Token') in self._sessions
+            if not authorized:
+                return jsonify({'error': 'Invalid or expired API token'}), 401
+            return self._polaris_users()
+
+        return app
+
+    def _new_session(self) -> str:
+        session_id = uuid.UUID(int=self._rng.getrandbits(128)).hex
+        with self._lock:
+            self._sessions.add(session_id)
+        return session_id
+
+    # Salesforce
+
+    def _check_session(self):
+        token = request.headers.get('Authorization', '').replace('Bearer ', '', 1)
+        with self._lock:
+            valid = token in self._sessions
+        if not valid:
+            return jsonify([{'errorCode': 'INVALID_SESSION_ID', 'message': 'Session expired or invalid'}]), 401
+        return None
+
+    def _salesforce_matches(self, soql: str) -> List[dict]:
+        # Only Session__c is served; the WHERE clause is assumed to match every record
+        return self.salesforce_records if 'FROM Session__c' in ' '.join(soql.split()) else []
+
+    def _salesforce_page(self, version: str, records: List[dict], offset: int, cursor_id: str = None) -> dict:
+        page_size = max(1, self.options.salesforce_page_size)
+        page = records[offset:offset + page_size]
+        done = offset + page_size >= len(records)
+        body = {'totalSize': len(records), 'done': done, 'records': page}
+        if not done:
+            if cursor_id is None:
+                cursor_id = f'01gFAKE{uuid.UUID(int=self._rng.getrandbits(128)).hex[:11]}'
+                with self._lock:
+                    self._cursors[cursor_id] = len(records)
+            body['nextRecordsUrl'] = f'/services/data/{version}/query/{cursor_id}-{offset + page_size}'
+        return body
+
+    # Sheets
+
+    @staticmethod
+    def _sheet_csv(rows: List[dict]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow([column + SHEET_HEADER_SUFFIX for column in SHEET_COLUMNS])
+        writer = csv.DictWriter(buffer, fieldnames=SHEET_COLUMNS, extrasaction='ignore')
+        # The real sheet has instruction rows between the header and the data
+        for index in range(SHEET_PREAMBLE_ROWS):
+            writer.writerow({'Status': f'Instructions {index + 1}'})
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    # Polaris
+
+    def _polaris_users(self):
+        updated_since = request.args.get('updated_since')
+        users = [user for user in self.polaris_users
+                 if not updated_since or (user.get('updated_at') or '') >= updated_since]
+        watermark = users[-1].get('updated_at') if users else None  # as /api/v1/users/sync
+        wants_ndjson = (request.args.get('format') == 'ndjson'
+                        or NDJSON_MIMETYPE in request.headers.get('Accept', ''))
+        if not wants_ndjson:
+            return jsonify({'users': users})
+
+        def generate():
+            for user in users:
+                yield json.dumps(user) + '\n'
+            yield json.dumps({'_sync': {'count': len(users), 'watermark': watermark}}) + '\n'
+
+        return Response(generate(), mimetype=NDJSON_MIMETYPE)
+
+
+class FakeUpstreamServer:
+    """Serve a FakeUpstreams app on localhost from a background thread"""
+
+    def __init__(self, upstreams: FakeUpstreams, host: str = '127.0.0.1', port: int = 0):
+        self.upstreams = upstreams
+        self._server = make_server(host, port, upstreams.app, threaded=True)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self._server.host}:{self._server.port}'
+
+    def config_overrides(self) -> dict:
+        """Flask config that points every sync at this server"""
+        return {
+            'SALESFORCE_BASE_URL': self.base_url,
+            'GOOGLE_SHEETS_BASE_URL': self.base_url,
+            'POLARIS_BASE_URL': self.base_url,
+            'SF_USERNAME': 'sync@example.org',
+            'SF_PASSWORD': 'fake-password',
+            'SF_SECURITY_TOKEN': 'fake-token',
+            'SYNC_USERNAME': 'sync',
+            'SYNC_PASSWORD': 'fake-password',
+        }
+
+    def start(self) -> 'FakeUpstreamServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-upstreams', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
@@ -0,0 +1,192 @@
+"""
+Prebuilt snapshots of read-mostly data: the public event feeds and the
+school directory.
+
+Each snapshot is registered with a builder and the models it is derived
+from. The first read builds it (for JSON feeds, the response body is
+serialized and compressed once as well) and later reads reuse it until FEED_CACHE_TTL
+expires or a committed change to one of its models invalidates it in this
+process. Other processes pick up changes when their TTL expires.
+
+Under gunicorn with preload_app, services.warmup builds every snapshot in
+the master before forking, so workers start with them already in memory
+and share those pages copy-on-write until they rebuild.
+
+A request kept on the primary after a write (services.db_routing) only
+takes a snapshot built from the primary after that write; otherwise the
+snapshot is rebuilt, from the primary, before it is served.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Response, current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from services.compression import encode_snapshot
+from services.db_routing import primary_since, reading_replica
+
+DEFAULT_TTL = 30  # seconds
+
+
+@dataclass
+class Snapshot:
+    data: Any
+    body: Optional[bytes]  # serialized JSON for feeds, None otherwise
+    built_at: float
+    expires_at: float
+    # body compressed per content coding, filled when built (services.compression)
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+    # other renderings of data, e.g. calendars (services.ical); dropped with the snapshot
+    derived: Dict[Any, Any] = field(default_factory=dict)
+    # wall-clock time the build started reading, and whether it read from the replica
+    read_at: float = 0.0
+    from_replica: bool = False
+
+    def shows_writes_since(self, since: float) -> bool:
+        """Whether the snapshot certainly includes writes committed before since (wall clock)"""
+        return not self.from_replica and self.read_at >= since
+
+
+@dataclass
+class SnapshotSpec:
+    builder: Callable[[], Any]
+    models: Tuple[type, ...]
+    as_json: bool
+
+
+class SnapshotCache:
+    """Thread-safe named snapshots with TTL and model-based invalidation"""
+
+    def __init__(self):
+        self._specs: Dict[str, SnapshotSpec] = {}
+        self._entries: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a build that raced one is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, name: str, builder: Callable[[], Any], models=(), as_json: bool = True) -> None:
+        self._specs[name] = SnapshotSpec(builder, tuple(models), as_json)
+
+    @property
+    def names(self):
+        return list(self._specs)
+
+    def get(self, name: str) -> Snapshot:
+        """Return the snapshot, building it on a miss. Needs an app context."""
+        now = time.monotonic()
+        since = primary_since()
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry.expires_at > now and (since is None or entry.shows_writes_since(since)):
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+        return self._build(name, generation)
+
+    def _build(self, name: str, generation: int) -> Snapshot:
+        spec = self._specs[name]
+        ttl = current_app.config.get('FEED_CACHE_TTL', DEFAULT_TTL)
+        read_at = time.time()
+        data = spec.builder()
+        body = f'{current_app.json.dumps(data)}\n'.encode() if spec.as_json else None
+        now = time.monotonic()
+        entry = Snapshot(data, body, built_at=now, expires_at=now + ttl,
+                         encoded=encode_snapshot(body, current_app.config),
+                         read_at=read_at, from_replica=reading_replica())
+        if ttl:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[name] = entry
+        return entry
+
+    def warm(self, names=None) -> Dict[str, float]:
+        """Build snapshots now; returns build time in milliseconds per name"""
+        timings = {}
+        for name in names or self.names:
+            started = time.perf_counter()
+            with self._lock:
+                generation = self._generation
+            self._build(name, generation)
+            timings[name] = (time.perf_counter() - started) * 1000
+        return timings
+
+    def invalidate_models(self, classes) -> None:
+        """Drop snapshots derived from any of the given model classes"""
+        with self._lock:
+            self._generation += 1
+            for name, spec in self._specs.items():
+                if any(issubclass(cls, model) for cls in classes for model in spec.models):
+                    self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+snapshot_cache = SnapshotCache()
+
+
+def register_snapshot(name: str, *models, as_json: bool = True):
+    """Decorator registering a snapshot builder derived from the given models"""
+    def decorator(builder):
+        snapshot_cache.register(name, builder, models, as_json=as_json)
+        return builder
+    return decorator
+
+
+def snapshot_data(name: str):
+    """The snapshot's data. Shared between requests; do not mutate it."""
+    return snapshot_cache.get(name).data
+
+
+def snapshot_response(name: str) -> Response:
+    """JSON response from the snapshot's pre-serialized body"""
+    snapshot = snapshot_cache.get(name)
+    response = Response(snapshot.body, mimetype=current_app.json.mimetype)
+    # Lets the compression hook reuse the snapshot's compressed body
+    response.snapshot = snapshot
+    return response
+
+
+# Invalidation: changed model classes are collected on the session and
+# applied on commit, so a concurrent rebuild cannot cache uncommitted state.
+
+def _mark_changed(session, classes) -> None:
+    session.info.setdefault('snapshot_changes', set()).update(classes)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_flushed_models(session, flush_context):
+    _mark_changed(session, {type(obj) for obj in list(session.new) + list(session.dirty) + list(session.deleted)})
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _collect_bulk_models(orm_execute_state):
+    # Query.update()/delete() and insert()/update()/delete() statements bypass the flush
+    if orm_execute_state.is_select:
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None:
+        _mark_changed(orm_execute_state.session, {mapper.class_})
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed_models(session):
+    changed = session.info.pop('snapshot_changes', None)
+    if changed:
+        snapshot_cache.invalidate_models(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back_models(session):
+    session.info.pop('snapshot_changes', None)
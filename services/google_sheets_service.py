@@ -3,24 +3,39 @@ Google Sheets CSV Reader Service for Virtual Events
 
 This service handles reading data from public Google Sheets using CSV export URLs.
 It properly handles the spreadsheet structure with 3 header rows to skip.
+CSV is fetched over the shared HTTP session; GOOGLE_SHEETS_BASE_URL can point
+it at a local stand-in server.
 """
 
+import io
 import os
 import pandas as pd
 import requests
 from typing import List, Dict, Optional
 import logging
 
+from services.http_client import get_http_session
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = 'https://docs.google.com'
+
 class GoogleSheetsService:
     """Service for reading data from Google Sheets via CSV export"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Voluntold-VirtualEvents/1.0'
-        })
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, session: Optional[requests.Session] = None):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or get_http_session()
+
+    @classmethod
+    def from_config(cls, config) -> 'GoogleSheetsService':
+        """Build a service from the Flask config"""
+        return cls(base_url=config.get('GOOGLE_SHEETS_BASE_URL') or DEFAULT_BASE_URL)
+
+    def _read_csv(self, csv_url: str) -> pd.DataFrame:
+        response = self.session.get(csv_url)
+        response.raise_for_status()
+        return pd.read_csv(io.StringIO(response.text))
     
     def read_sheet_data(self, sheet_id: str) -> List[Dict]:
         """
@@ -41,22 +56,22 @@ class GoogleSheetsService:
             raise ValueError("Sheet ID is required")
         
         # Try primary URL format first
-        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
+        csv_url = f"{self.base_url}/spreadsheets/d/{sheet_id}/gviz/tq?tqx=out:csv"
         
         try:
             logger.info(f"Attempting to fetch sheet with ID: {sheet_id}")
             logger.info(f"Primary URL: {csv_url}")
             
-            df = pd.read_csv(csv_url)
+            df = self._read_csv(csv_url)
             
         except Exception as e:
             logger.warning(f"Primary URL failed: {str(e)}")
             # Try fallback URL format
-            csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
+            csv_url = f"{self.base_url}/spreadsheets/d/{sheet_id}/export?format=csv&gid=0"
             logger.info(f"Trying fallback URL: {csv_url}")
             
             try:
-                df = pd.read_csv(csv_url)
+                df = self._read_csv(csv_url)
             except Exception as e2:
                 logger.error(f"Both URL formats failed. Primary: {str(e)}, Fallback: {str(e2)}")
                 raise ConnectionError(f"Unable to connect to Google Sheet {sheet_id}: {str(e2)}")
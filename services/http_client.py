@@ -0,0 +1,115 @@
+"""
+Shared HTTP client for outbound calls to external services.
+
+A single pooled requests.Session per process, with connect/read timeouts
+applied to every request and automatic retries with backoff on connection
+errors and 429/5xx responses.
+
+redirect_origin() points a session's traffic for one origin at another base
+URL, for clients with hard-coded hosts (simple_salesforce) that need to talk
+to a local stand-in server.
+"""
+
+import threading
+from typing import Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5, 30)  # (connect, read) seconds
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = 'Voluntold/1.0'
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller gives none"""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class RewriteOriginAdapter(TimeoutHTTPAdapter):
+    """Send requests addressed to one origin to another base URL instead"""
+
+    def __init__(self, source: str, target: str, *args, **kwargs):
+        self.source = source.rstrip('/')
+        self.target = target.rstrip('/')
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if request.url.startswith(self.source):
+            request.url = self.target + request.url[len(self.source):]
+        return super().send(request, **kwargs)
+
+
+def build_session(timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF,
+                  pool_maxsize=10, retry_methods=('GET', 'HEAD', 'POST')) -> requests.Session:
+    """
+    Create a requests.Session with pooled connections, timeouts and retries.
+
+    Args:
+        timeout: Default (connect, read) timeout in seconds
+        retries: Retry attempts for connection errors and retryable statuses
+        backoff: Exponential backoff factor between retries
+        pool_maxsize: Connections kept per host
+        retry_methods: HTTP methods that are safe to retry for this client
+
+    Returns:
+        requests.Session: Configured session
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(retry_methods),
+        raise_on_status=False
+    )
+    adapter = TimeoutHTTPAdapter(timeout=timeout, max_retries=retry,
+                                 pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+
+def redirect_origin(session: requests.Session, source: str, target: str,
+                    timeout=DEFAULT_TIMEOUT) -> requests.Session:
+    """Route the session's requests for source (e.g. 'https://login.salesforce.com') to target"""
+    session.mount(source.rstrip('/') + '/', RewriteOriginAdapter(source, target, timeout=timeout))
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide shared session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def reset_http_session() -> None:
+    """Close the shared session (e.g. after fork) so the next call rebuilds it"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
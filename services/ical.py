@@ -0,0 +1,128 @@
+"""
+iCalendar (RFC 5545) feeds of the public events.
+
+Calendars are rendered from a feed snapshot (services.feed_cache) and kept
+on it, so a calendar is rendered once per snapshot build, and the weak
+ETag is a digest of the events it contains. Calendar clients polling with
+If-None-Match get a 304 without a query or a render until the events
+change, and every worker computes the same ETag for the same events.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Tuple
+
+from flask import current_app
+
+from services.event_times import DEFAULT_TIMEZONE, EventTimes
+
+PRODID = '-//PREP-KC//Voluntold//EN'
+# Hint for clients that honour it: poll every 15 minutes
+REFRESH_INTERVAL = 'PT15M'
+MAX_CACHED_CALENDARS = 256
+
+
+def escape_text(value) -> str:
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line: str) -> str:
+    """Fold a content line to 75 octets, continuing with CRLF + space"""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a UTF-8 sequence
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts)
+
+
+def _utc(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _stored(value: str) -> datetime:
+    # Feed timestamps are UTC ("...Z")
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def _event_times(event: dict, tz: str):
+    if not (event.get('starts_at') and event.get('ends_at')):
+        return None  # no date to put it on
+    return EventTimes.from_columns(_stored(event['starts_at']), _stored(event['ends_at']), tz)
+
+
+def _vevent(event: dict, tz: str, stamp: str) -> List[str]:
+    times = _event_times(event, tz)
+    if times is None:
+        return []
+
+    uid = event['Id'] or f"virtual-{event['id']}"
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{uid}@voluntold',
+        f'DTSTAMP:{stamp}',
+    ]
+    if times.all_day:
+        first_day, day_after = times.local_dates(tz)
+        lines += [f'DTSTART;VALUE=DATE:{first_day:%Y%m%d}', f'DTEND;VALUE=DATE:{day_after:%Y%m%d}']
+    else:
+        lines += [f'DTSTART:{_utc(times.starts_at)}', f'DTEND:{_utc(times.ends_at)}']
+    lines.append(f"SUMMARY:{escape_text(event['name'])}")
+
+    details = []
+    if event.get('event_type'):
+        details.append(event['event_type'])
+        lines.append(f"CATEGORIES:{escape_text(event['event_type'])}")
+    if event.get('available_slots') is not None:
+        details.append(f"Volunteers needed: {event['available_slots']}")
+    if event.get('districts'):
+        details.append(f"Districts: {', '.join(event['districts'])}")
+    if event.get('note'):
+        details.append(event['note'])
+    if event.get('registration_link'):
+        details.append(f"Register: {event['registration_link']}")
+        lines.append(f"URL:{event['registration_link']}")
+    if details:
+        lines.append(f"DESCRIPTION:{escape_text(chr(10).join(details))}")
+    lines += ['STATUS:CONFIRMED', 'END:VEVENT']
+    return lines
+
+
+def render_calendar(name: str, events: Iterable[dict], tz: str = DEFAULT_TIMEZONE) -> Tuple[bytes, str]:
+    """
+    Render events as a VCALENDAR.
+
+    Returns:
+        tuple: (body, ETag value derived from the events)
+    """
+    events = list(events)
+    stamp = _utc(datetime.now(timezone.utc))
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+             f'X-WR-CALNAME:{escape_text(name)}', f'X-PUBLISHED-TTL:{REFRESH_INTERVAL}',
+             f'REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}']
+    for event in events:
+        lines += _vevent(event, tz, stamp)
+    lines.append('END:VCALENDAR')
+    body = ('\r\n'.join(fold(line) for line in lines) + '\r\n').encode()
+    # DTSTAMP changes per render, so the ETag covers the events, not the bytes
+    digest = hashlib.sha1(json.dumps([name, events], sort_keys=True, default=str).encode()).hexdigest()
+    return body, digest
+
+
+def snapshot_calendar(snapshot, key, name: str, select: Callable[[dict], bool]) -> Tuple[bytes, str]:
+    """The calendar of a snapshot's selected events, rendered once per snapshot build"""
+    cached = snapshot.derived.get(key)
+    if cached is None:
+        if len(snapshot.derived) >= MAX_CACHED_CALENDARS:
+            snapshot.derived.clear()  # arbitrary district/type names in URLs must not grow it unbounded
+        tz = current_app.config.get('EVENT_TIMEZONE', DEFAULT_TIMEZONE)
+        cached = snapshot.derived[key] = render_calendar(name, (e for e in snapshot.data if select(e)), tz)
+    return cached
@@ -0,0 +1,221 @@
+"""
+Cross-process mutual exclusion for the syncs, and the runner that uses it.
+
+JobLock is held for the whole run of a named job:
+
+- On PostgreSQL it is a session-level advisory lock on a dedicated
+  connection. The database drops it if the holder's connection dies, so a
+  crashed worker never leaves the job locked.
+- Elsewhere (SQLite) it falls back to the job_leases row (JobLease), which
+  expires after SCHEDULER_LEASE_TTL if the holder never releases it.
+
+execute_job() runs a job under its lock and records it as a JobRun that is
+committed as 'running' before the job starts, so a second caller gets a
+handle to the in-flight run: sync endpoints answer 409 with that handle,
+or with ?wait=1 wait for the run and return its result.
+"""
+
+import json
+import os
+import socket
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Callable, Optional, Tuple
+
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import text
+
+from models import db
+from models.job_lease import JobLease
+from models.job_run import JobRun
+from services.live_updates import publish
+
+# First half of the two-key advisory lock, so our keys cannot collide with other applications'
+ADVISORY_LOCK_NAMESPACE = 0x566F6C75  # 'Volu'
+DEFAULT_LEASE_TTL = 1800
+WAIT_POLL_INTERVAL = 0.5
+
+
+def _int4(value: int) -> int:
+    """Fold an unsigned 32-bit value into Postgres int4 range"""
+    return value - 2 ** 32 if value >= 2 ** 31 else value
+
+
+class JobAlreadyRunning(Exception):
+    def __init__(self, name: str, run: Optional[dict] = None):
+        super().__init__(f'{name} is already running')
+        self.name = name
+        self.run = run  # the in-flight JobRun as a dict, when it has been recorded
+
+
+class JobLock:
+    """Non-blocking lock on a job name, held until release()"""
+
+    def __init__(self, name: str, owner: str = None, ttl: float = None, engine=None):
+        self.name = name
+        # Unique per lock so two threads in one process do not share a lease
+        self.owner = f"{owner or f'{socket.gethostname()}:{os.getpid()}'}:{uuid.uuid4().hex[:8]}"
+        self.ttl = ttl
+        self.engine = engine
+        self._connection = None
+        self._lease = False
+
+    @property
+    def key(self) -> int:
+        return _int4(zlib.crc32(self.name.encode()))
+
+    def acquire(self) -> bool:
+        engine = self.engine or db.engine
+        if engine.dialect.name == 'postgresql':
+            connection = engine.connect()
+            locked = connection.execute(text('SELECT pg_try_advisory_lock(:namespace, :key)'),
+                                        {'namespace': ADVISORY_LOCK_NAMESPACE, 'key': self.key}).scalar()
+            connection.commit()
+            if not locked:
+                connection.close()
+                return False
+            self._connection = connection
+            return True
+        ttl = self.ttl or current_app.config.get('SCHEDULER_LEASE_TTL', DEFAULT_LEASE_TTL)
+        self._lease = JobLease.acquire(self.name, self.owner, ttl)
+        return self._lease
+
+    def release(self) -> None:
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            try:
+                unlocked = connection.execute(text('SELECT pg_advisory_unlock(:namespace, :key)'),
+                                              {'namespace': ADVISORY_LOCK_NAMESPACE, 'key': self.key}).scalar()
+                connection.commit()
+                if not unlocked:
+                    # Never hand a connection that may still hold the lock back to the pool
+                    connection.invalidate()
+            except Exception:
+                connection.invalidate()
+                raise
+            finally:
+                connection.close()
+        elif self._lease:
+            self._lease = False
+            JobLease.release(self.name, self.owner)
+
+    def __enter__(self):
+        if not self.acquire():
+            raise JobAlreadyRunning(self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+        return False
+
+
+def in_flight_run(name: str) -> Optional[JobRun]:
+    return JobRun.query.filter_by(job_name=name, status='running').order_by(JobRun.id.desc()).first()
+
+
+def _summary(result: dict) -> dict:
+    """The result without row lists (e.g. every school mapping), for the run history"""
+    return {key: value for key, value in result.items() if not isinstance(value, (list, tuple))}
+
+
+def execute_job(name: str, fn: Callable, trigger: str = 'manual', owner: str = None,
+                changed: Callable[[dict], int] = None) -> Tuple[dict, Optional[dict], int]:
+    """
+    Run fn under the job's lock and record it as a JobRun.
+
+    fn returns a result dict with 'success', or (result, HTTP status).
+
+    Returns:
+        tuple: (recorded run dict, fn's full result, HTTP status)
+
+    Raises:
+        JobAlreadyRunning: another caller holds the lock; carries its run when recorded
+    """
+    lock = JobLock(name, owner=owner)
+    if not lock.acquire():
+        running = in_flight_run(name)
+        raise JobAlreadyRunning(name, running.to_dict() if running else None)
+
+    try:
+        # Runs left 'running' by a holder that died can never finish
+        JobRun.query.filter_by(job_name=name, status='running').update({'status': 'abandoned'})
+        run = JobRun(job_name=name, trigger=trigger, status='running', started_at=datetime.now(timezone.utc))
+        db.session.add(run)
+        db.session.commit()
+
+        started = time.perf_counter()
+        try:
+            outcome = fn()
+            result, status = outcome if isinstance(outcome, tuple) else (outcome, None)
+            success = bool(result.get('success'))
+            run.error = None if success else str(result.get('error', 'Unknown error'))
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('%s raised', name)
+            result, status, success, run.error = None, 500, False, str(e)
+
+        run.duration_ms = (time.perf_counter() - started) * 1000
+        run.finished_at = datetime.now(timezone.utc)
+        run.status = 'success' if success else 'failed'
+        run.changed_count = changed(result) if success and changed else 0
+        run.result = json.dumps(_summary(result), default=str) if result is not None else None
+        publish('sync_completed', {'job': name, 'run_id': run.id, 'status': run.status,
+                                   'changed_count': run.changed_count})
+        db.session.commit()
+        return run.to_dict(), result, status or (200 if success else 500)
+    finally:
+        lock.release()
+
+
+def wait_for_run(run_id: int, timeout: float) -> Optional[dict]:
+    """Poll until the run finishes; returns it, or None on timeout"""
+    deadline = time.monotonic() + timeout
+    while True:
+        run = db.session.get(JobRun, run_id, populate_existing=True)
+        finished = run.to_dict() if run is not None and run.status != 'running' else None
+        db.session.rollback()  # end the read so the next poll sees new commits
+        if finished is not None or run is None:
+            return finished
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(WAIT_POLL_INTERVAL)
+
+
+def _job_handle(run: Optional[dict]) -> Optional[dict]:
+    if run is None:
+        return None
+    return {**run, 'status_url': url_for('sync.job_status', run_id=run['id'])}
+
+
+def sync_endpoint(name: str, fn: Callable, trigger: str = 'manual'):
+    """
+    Flask response for a sync endpoint: run fn under the job lock.
+
+    If the job is already running, answer 409 with the in-flight job handle,
+    or with ?wait=1 wait (up to SYNC_WAIT_TIMEOUT seconds) and answer with
+    that run's recorded result.
+    """
+    try:
+        _, result, status = execute_job(name, fn, trigger=trigger)
+        return jsonify(result if result is not None else {'success': False, 'error': 'Sync raised an error'}), status
+    except JobAlreadyRunning as busy:
+        running = busy.run
+        if request.args.get('wait', type=int):
+            timeout = current_app.config.get('SYNC_WAIT_TIMEOUT', 300)
+            if running is None:
+                # The holder has the lock but has not recorded its run yet
+                time.sleep(WAIT_POLL_INTERVAL)
+                run = in_flight_run(name)
+                running = run.to_dict() if run else None
+            finished = wait_for_run(running['id'], timeout) if running else None
+            if finished is not None:
+                result = finished['result'] or {'success': False, 'error': finished['error']}
+                result = {**result, 'shared_run': True, 'job': _job_handle(finished)}
+                return jsonify(result), 200 if finished['status'] == 'success' else 500
+        return jsonify({
+            'success': False,
+            'error': f'{name} is already running',
+            'job': _job_handle(running),
+        }), 409
@@ -0,0 +1,212 @@
+"""
+Live updates for the dashboard and public event pages over Server-Sent Events.
+
+Writers call publish() (or publish_event()) before committing a change; the
+notification is a LiveUpdate row in the same transaction. Each worker runs
+one Broadcaster thread that polls for rows above the last id it has seen
+(the generation counter, which becomes visible in commit order, see
+services.commit_order) and fans them out to the /events/stream clients
+connected to that worker, so a change made in any worker or in the
+scheduler reaches every client within LIVE_UPDATES_POLL_INTERVAL.
+
+Messages carry the changed event as the feeds serialize it, so pages patch
+their list in place; 'sync_completed' tells them when a sync changed rows
+and a refetch is worth it. Clients that reconnect send Last-Event-ID and
+receive what they missed while it is still retained.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from flask import Response, current_app
+
+from models import db
+from models.live_update import LiveUpdate
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 200
+REPLAY_LIMIT = 500
+PRUNE_EVERY = 600  # seconds between retention sweeps
+
+
+def publish(kind: str, payload: dict) -> None:
+    """Queue a notification in the current session; it goes out when the caller commits"""
+    db.session.add(LiveUpdate(kind=kind, payload=json.dumps(payload, default=str)))
+
+
+def publish_event(event) -> None:
+    """Announce an event's current state (visibility, note, districts, ...)"""
+    publish('event_updated', {'event': event.to_dict()})
+
+
+def publish_event_removed(event_id: int) -> None:
+    publish('event_removed', {'id': event_id})
+
+
+def format_message(update_id: int, kind: str, payload: str) -> str:
+    return f'id: {update_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+
+class Subscription:
+    """One connected client's queue of formatted messages"""
+
+    def __init__(self):
+        self.queue: queue.Queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def put(self, message: str) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            # A client this far behind reconnects with Last-Event-ID and replays instead
+            self.closed = True
+            return False
+
+
+class Broadcaster:
+    """Per-process poller that fans LiveUpdate rows out to subscribers"""
+
+    def __init__(self, app, poll_interval: float = 1.0, retention: float = 86400, background: bool = True):
+        self.app = app
+        self.background = background  # False: the caller drives poll() (tests)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.last_id: Optional[int] = None
+        self._subscribers: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = 0.0
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> Subscription:
+        subscription = Subscription()
+        with self.app.app_context():
+            try:
+                if self.last_id is None:
+                    self.last_id = self._max_id()
+                if last_event_id is not None:
+                    # Replay what the client missed, up to what the poller will deliver next
+                    for row in self._rows_after(last_event_id, upto=self.last_id, limit=REPLAY_LIMIT):
+                        subscription.put(format_message(row.id, row.kind, row.payload))
+            finally:
+                db.session.remove()
+        with self._lock:
+            self._subscribers.append(subscription)
+        self._ensure_thread()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _ensure_thread(self) -> None:
+        # Started on first subscribe, so it runs in the worker, never in a preloading master
+        if not self.background or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='live-updates', daemon=True)
+                self._thread.start()
+
+    @staticmethod
+    def _max_id() -> int:
+        return db.session.query(db.func.max(LiveUpdate.id)).scalar() or 0
+
+    @staticmethod
+    def _rows_after(after_id: int, upto: int = None, limit: int = REPLAY_LIMIT):
+        query = LiveUpdate.query.filter(LiveUpdate.id > after_id)
+        if upto is not None:
+            query = query.filter(LiveUpdate.id <= upto)
+        return query.order_by(LiveUpdate.id).limit(limit).all()
+
+    def poll(self) -> int:
+        """Deliver new rows to subscribers; returns how many were delivered"""
+        with self.app.app_context():
+            try:
+                if self.last_id is None:
+                    self.last_id = self._max_id()
+                rows = self._rows_after(self.last_id)
+                messages = [format_message(row.id, row.kind, row.payload) for row in rows]
+                if rows:
+                    self.last_id = rows[-1].id
+                if time.monotonic() - self._last_prune > PRUNE_EVERY:
+                    self._prune()
+            finally:
+                db.session.remove()
+        if not messages:
+            return 0
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            for message in messages:
+                if not subscription.put(message):
+                    self.unsubscribe(subscription)
+                    break
+        return len(messages)
+
+    def _prune(self) -> None:
+        self._last_prune = time.monotonic()
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.retention)
+        LiveUpdate.query.filter(LiveUpdate.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+
+    def _run(self) -> None:
+        while True:
+            if not self._subscribers:
+                time.sleep(self.poll_interval)
+                continue
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Live update poll failed')
+            time.sleep(self.poll_interval)
+
+
+def stream(broadcaster: Broadcaster, subscription: Subscription, max_seconds: float,
+           heartbeat: float = 15.0) -> Iterator[str]:
+    """SSE body: messages as they arrive, heartbeats while idle, closed after max_seconds"""
+    deadline = time.monotonic() + max_seconds
+    # Tell EventSource how long to wait before reconnecting
+    yield 'retry: 3000\n\n'
+    try:
+        while not subscription.closed and time.monotonic() < deadline:
+            try:
+                yield subscription.queue.get(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+    finally:
+        broadcaster.unsubscribe(subscription)
+
+
+def init_live_updates(app) -> Broadcaster:
+    broadcaster = Broadcaster(
+        app,
+        poll_interval=app.config.get('LIVE_UPDATES_POLL_INTERVAL', 1.0),
+        retention=app.config.get('LIVE_UPDATES_RETENTION', 86400),
+    )
+    app.extensions['live_updates'] = broadcaster
+    return broadcaster
+
+
+def stream_response(last_event_id: Optional[str]) -> Response:
+    """The /events/stream response for this worker's broadcaster"""
+    broadcaster = current_app.extensions['live_updates']
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    subscription = broadcaster.subscribe(after)
+    body = stream(broadcaster, subscription, current_app.config.get('LIVE_STREAM_MAX_SECONDS', 300))
+    return Response(body, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',  # nginx would otherwise buffer the stream
+    })
@@ -0,0 +1,461 @@
+"""
+Lightweight Prometheus-style metrics.
+
+Counters, gauges and histograms live in a per-process registry. The request
+middleware in init_metrics() records per-endpoint latency, status counts,
+in-flight requests and SQL statement count/time, and sync code records phase
+durations with time_phase().
+
+Under gunicorn each worker has its own registry. When METRICS_DIR is set,
+every process periodically writes a snapshot of its registry to that
+directory and /metrics merges all snapshots: counters and histograms are
+summed across every process that ever wrote (so totals survive worker
+restarts), gauges are summed across live processes only. Snapshots of
+exited processes are folded into one metrics_dead.json and deleted, so the
+directory does not grow with every worker restart.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SYNC_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+try:
+    import fcntl
+except ImportError:  # Windows, where gunicorn does not run, so there is a single process
+    fcntl = None
+
+DEAD_SNAPSHOT = 'metrics_dead.json'
+
+
+def _label_key(labels: dict) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Metric:
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, registry: 'MetricsRegistry' = None):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[LabelKey, object] = {}
+        self._lock = threading.Lock()
+        (registry or default_registry).register(self)
+
+    def samples(self) -> List[list]:
+        with self._lock:
+            return [[list(map(list, key)), self._copy(value)] for key, value in self._values.items()]
+
+    def describe(self) -> dict:
+        return {'type': self.type_name, 'help': self.documentation}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    """Monotonically increasing value"""
+    type_name = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+
+class Gauge(Metric):
+    """Value that can go up and down; summed across live processes"""
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, registry=None):
+        super().__init__(name, documentation, registry)
+        self._functions = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def set_function(self, fn, **labels):
+        """Read the gauge from fn() whenever metrics are collected"""
+        with self._lock:
+            self._functions[_label_key(labels)] = fn
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                self.set(fn(), **dict(key))
+            except Exception:
+                pass
+        return super().samples()
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, buckets: Iterable[float] = DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, registry)
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        state = self._values.get(_label_key(labels))
+        return state[-1] if state else 0
+
+    def describe(self):
+        return {**super().describe(), 'buckets': list(self.buckets)}
+
+    @staticmethod
+    def _copy(value):
+        return list(value)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class MetricsRegistry:
+    """Per-process collection of metrics with optional on-disk snapshots"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.metrics_dir: Optional[str] = None
+        self.flush_interval = 5.0
+        self._last_flush = 0.0
+        self._flush_lock = threading.Lock()
+        # pid that last wrote a snapshot; a forked worker inherits the master's value
+        self._flushed_pid: Optional[int] = None
+
+    def register(self, metric: Metric):
+        self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def snapshot(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'metrics': {
+                name: {**metric.describe(), 'samples': metric.samples()}
+                for name, metric in self._metrics.items()
+            }
+        }
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def flush(self):
+        """Write this process's snapshot to METRICS_DIR (atomic replace)"""
+        if not self.metrics_dir:
+            return
+        os.makedirs(self.metrics_dir, exist_ok=True)
+        if self._flushed_pid != os.getpid():
+            # First flush in this process (e.g. a worker forked from a preloaded master):
+            # never overwrite a snapshot left under this pid before folding it
+            self.fold_dead(include_own=True)
+        path = os.path.join(self.metrics_dir, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+        self._last_flush = time.monotonic()
+        self._flushed_pid = os.getpid()
+
+    def maybe_flush(self):
+        """Flush if the flush interval has passed; cheap enough to call per request"""
+        if not self.metrics_dir or time.monotonic() - self._last_flush < self.flush_interval:
+            return
+        if self._flush_lock.acquire(blocking=False):
+            try:
+                self.flush()
+            finally:
+                self._flush_lock.release()
+
+    def collect(self) -> dict:
+        """Return merged metrics for this process and, in multiprocess mode, all others"""
+        snapshots = [self.snapshot()]
+        if self.metrics_dir and os.path.isdir(self.metrics_dir):
+            with _directory_lock(self.metrics_dir):
+                self._fold_dead()
+                own = f'metrics_{os.getpid()}.json'
+                for filename in os.listdir(self.metrics_dir):
+                    if filename.startswith('metrics_') and filename.endswith('.json') and filename != own:
+                        snapshot = _read_snapshot(os.path.join(self.metrics_dir, filename))
+                        if snapshot is not None:
+                            snapshots.append(snapshot)
+        return merge_snapshots(snapshots)
+
+    def fold_dead(self, include_own: bool = False):
+        """
+        Fold the counters and histograms of exited processes into
+        metrics_dead.json and delete their snapshots.
+
+        include_own also folds a snapshot under this process's pid if this
+        process has not flushed yet: it was left by an exited process that
+        had the same pid. flush() does this before a process's first write,
+        and init_metrics / reset_after_fork do it at startup.
+        """
+        if self.metrics_dir and os.path.isdir(self.metrics_dir):
+            with _directory_lock(self.metrics_dir):
+                self._fold_dead(include_own and self._flushed_pid != os.getpid())
+
+    def _fold_dead(self, include_own: bool = False):
+        dead_path = os.path.join(self.metrics_dir, DEAD_SNAPSHOT)
+        dead = []
+        for filename in os.listdir(self.metrics_dir):
+            if not filename.startswith('metrics_') or not filename.endswith('.json') or filename == DEAD_SNAPSHOT:
+                continue
+            path = os.path.join(self.metrics_dir, filename)
+            snapshot = _read_snapshot(path)
+            if snapshot is None:
+                continue
+            pid = snapshot.get('pid')
+            if (pid == os.getpid() and include_own) or (pid != os.getpid() and not _pid_alive(pid)):
+                dead.append((path, snapshot))
+        if not dead:
+            return
+        previous = _read_snapshot(dead_path) or {'pid': None, 'metrics': {}}
+        merged = merge_snapshots([previous] + [snapshot for _, snapshot in dead])
+        folded = {'pid': None, 'metrics': {
+            name: {**{key: value for key, value in family.items() if key != 'values'},
+                   'samples': [[list(map(list, key)), value] for key, value in family['values'].items()]}
+            for name, family in merged.items() if family['type'] != 'gauge'
+        }}
+        tmp_path = f'{dead_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(folded, f)
+        os.replace(tmp_path, dead_path)
+        for path, _ in dead:
+            os.remove(path)
+
+
+@contextmanager
+def _directory_lock(directory: str):
+    """Serialize snapshot folding across the processes sharing METRICS_DIR"""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _pid_alive(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Combine per-process snapshots into one set of metric families"""
+    merged: Dict[str, dict] = {}
+    for snapshot in snapshots:
+        pid = snapshot.get('pid')
+        # pid None is metrics_dead.json, which only holds counters and histograms
+        alive = pid == os.getpid() or (pid is not None and _pid_alive(pid))
+        for name, family in snapshot['metrics'].items():
+            target = merged.setdefault(name, {key: value for key, value in family.items() if key != 'samples'})
+            target.setdefault('values', {})
+            if family['type'] == 'gauge' and not alive:
+                continue
+            for labels, value in family['samples']:
+                key = tuple(tuple(pair) for pair in labels)
+                if family['type'] == 'histogram':
+                    current = target['values'].get(key)
+                    target['values'][key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target['values'][key] = target['values'].get(key, 0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(key, extra=()) -> str:
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render_text(merged: dict) -> str:
+    """Render merged metrics in the Prometheus text exposition format"""
+    lines = []
+    for name in sorted(merged):
+        family = merged[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key in sorted(family['values']):
+            value = family['values'][key]
+            if family['type'] == 'histogram':
+                cumulative = 0
+                for bound, bucket_count in zip(family['buckets'], value):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', _format_number(float(bound)))])} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {value[-1]}")
+                lines.append(f"{name}_sum{_format_labels(key)} {_format_number(value[-2])}")
+                lines.append(f"{name}_count{_format_labels(key)} {value[-1]}")
+            else:
+                lines.append(f"{name}{_format_labels(key)} {_format_number(value)}")
+    return '\n'.join(lines) + '\n'
+
+
+default_registry = MetricsRegistry()
+
+REQUEST_LATENCY = Histogram('voluntold_http_request_duration_seconds',
+                            'HTTP request latency by endpoint and method')
+REQUESTS_TOTAL = Counter('voluntold_http_requests_total',
+                         'HTTP responses by endpoint, method and status')
+REQUESTS_IN_FLIGHT = Gauge('voluntold_http_requests_in_flight',
+                           'HTTP requests currently being served')
+REQUEST_SQL_QUERIES = Histogram('voluntold_http_request_sql_queries',
+                                'SQL statements issued per HTTP request by endpoint',
+                                buckets=QUERY_COUNT_BUCKETS)
+SQL_QUERIES_TOTAL = Counter('voluntold_sql_queries_total',
+                            'SQL statements executed by endpoint')
+SQL_QUERY_SECONDS = Counter('voluntold_sql_query_seconds_total',
+                            'Time spent executing SQL statements by endpoint')
+SYNC_PHASE_SECONDS = Histogram('voluntold_sync_phase_duration_seconds',
+                               'Duration of sync phases by job and phase',
+                               buckets=SYNC_BUCKETS)
+
+
+@contextmanager
+def time_phase(job: str, phase: str):
+    """Record how long a sync phase takes"""
+    with SYNC_PHASE_SECONDS.time(job=job, phase=phase):
+        yield
+
+
+def _endpoint_label() -> str:
+    try:
+        return request.endpoint or 'unmatched'
+    except RuntimeError:
+        return 'background'
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    endpoint = _endpoint_label()
+    SQL_QUERIES_TOTAL.inc(endpoint=endpoint)
+    SQL_QUERY_SECONDS.inc(elapsed, endpoint=endpoint)
+    try:
+        g.metrics_sql_queries = g.get('metrics_sql_queries', 0) + 1
+    except RuntimeError:
+        pass
+
+
+def init_metrics(app):
+    """Install the request middleware and configure multiprocess snapshots"""
+    default_registry.metrics_dir = app.config.get('METRICS_DIR') or None
+    default_registry.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', 5.0)
+    if default_registry.metrics_dir:
+        default_registry.fold_dead(include_own=True)
+        atexit.register(default_registry.flush)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_sql_queries = 0
+        g.metrics_in_flight = True
+        REQUESTS_IN_FLIGHT.inc()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = _endpoint_label()
+            REQUEST_LATENCY.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+            REQUESTS_TOTAL.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+            REQUEST_SQL_QUERIES.observe(g.get('metrics_sql_queries', 0), endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        if g.pop('metrics_in_flight', False):
+            REQUESTS_IN_FLIGHT.dec()
+        default_registry.maybe_flush()
@@ -0,0 +1,105 @@
+"""
+Client for the Polaris user API.
+
+Polaris is the source of truth for staff accounts. Voluntold authenticates
+with the sync service credentials, receives an API token and pulls users
+from /api/v1/users/sync.
+"""
+
+import json
+import logging
+from typing import Dict, Iterator, Optional
+
+import requests
+
+from services.http_client import get_http_session
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = 'https://polaris-prepkc.pythonanywhere.com'
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+class PolarisAuthError(Exception):
+    """Raised when Polaris does not return an API token"""
+
+
+class PolarisClient:
+    """Thin wrapper over the Polaris token and user sync endpoints"""
+
+    def __init__(self, username: str, password: str, base_url: str = DEFAULT_BASE_URL,
+                 session: Optional[requests.Session] = None):
+        self.username = username
+        self.password = password
+        self.base_url = base_url.rstrip('/')
+        self.session = session or get_http_session()
+        self._token = None
+        # Watermark reported by the last completed iter_users() stream
+        self.last_watermark = None
+
+    @classmethod
+    def from_config(cls, config) -> 'PolarisClient':
+        """Build a client from the Flask config"""
+        return cls(
+            username=config.get('SYNC_USERNAME'),
+            password=config.get('SYNC_PASSWORD'),
+            base_url=config.get('POLARIS_BASE_URL') or DEFAULT_BASE_URL
+        )
+
+    def get_token(self) -> str:
+        """Obtain (and remember) an API token for the sync user"""
+        if self._token:
+            return self._token
+
+        response = self.session.post(
+            f'{self.base_url}/api/v1/token',
+            headers={'Content-Type': 'application/json'},
+            json={'username': self.username, 'password': self.password}
+        )
+        response.raise_for_status()
+        token = response.json().get('token')
+        if not token:
+            raise PolarisAuthError('Failed to obtain API token')
+        self._token = token
+        return token
+
+    def iter_users(self, updated_since: Optional[str] = None, page_size: int = 1000) -> Iterator[Dict]:
+        """
+        Stream users changed since a watermark as NDJSON.
+
+        Users are yielded as they arrive. Once the stream is exhausted,
+        last_watermark holds the value to pass as updated_since next time;
+        it stays None when nothing changed, so the caller keeps its stored
+        watermark. Servers that predate the NDJSON export answer with the
+        full JSON document; those users are yielded as-is and no watermark
+        is set.
+        """
+        self.last_watermark = None
+        params = {'format': 'ndjson', 'limit': page_size}
+        if updated_since:
+            params['updated_since'] = updated_since
+
+        with self.session.get(
+            f'{self.base_url}/api/v1/users/sync',
+            headers={'Accept': NDJSON_MIMETYPE, 'X-API-Token': self.get_token()},
+            params=params,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+
+            if not response.headers.get('Content-Type', '').startswith(NDJSON_MIMETYPE):
+                yield from response.json().get('users', [])
+                return
+
+            count = 0
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                record = json.loads(line)
+                if '_sync' in record:
+                    self.last_watermark = record['_sync'].get('watermark')
+                    continue
+                count += 1
+                yield record
+
+        logger.info(f"Streamed {count} users from Polaris (updated since {updated_since or 'the beginning'})")
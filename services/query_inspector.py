@@ -0,0 +1,131 @@
+"""
+SQL statement recording, query budgets and N+1 detection.
+
+QueryRecorder captures every statement an engine executes while active and
+groups them by normalized shape (literals and bind parameters collapsed),
+which is how N+1 patterns show up: the same shape repeated once per row.
+
+- assert_max_queries() fails with a grouped report when a block of code
+  issues more statements than its budget (used by the test suite).
+- init_n1_detection() logs a warning with the calling line whenever a
+  request repeats a SELECT shape more than N1_DETECTION_THRESHOLD times
+  (opt-in, meant for development).
+"""
+
+import logging
+import os
+import re
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_N1_THRESHOLD = 5
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\$\d+|:\w+|\?')
+_PLACEHOLDER_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, bind parameters and IN lists so equivalent statements compare equal"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+def caller_location(skip: Tuple[str, ...] = ()) -> Optional[str]:
+    """Return 'path:line in function' for the innermost project frame outside SQLAlchemy"""
+    frame = sys._getframe(1)
+    own_file = os.path.abspath(__file__)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (filename.startswith(PROJECT_ROOT) and filename != own_file
+                and not any(filename.endswith(suffix) for suffix in skip)
+                and f'{os.sep}site-packages{os.sep}' not in filename):
+            return f'{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a block issues more SQL statements than its budget"""
+
+
+class QueryRecorder:
+    """Record statements executed on an engine (or every engine) while active"""
+
+    def __init__(self, engine=Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return False
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def shapes(self) -> Counter:
+        return Counter(normalize_sql(statement) for statement in self.statements)
+
+    def repeated(self, threshold: int = 2) -> List[Tuple[str, int]]:
+        """Statement shapes executed at least threshold times, most frequent first"""
+        return [(shape, count) for shape, count in self.shapes().most_common() if count >= threshold]
+
+    def report(self) -> str:
+        lines = [f'{self.count} statements, {len(self.shapes())} distinct shapes']
+        for shape, count in self.shapes().most_common():
+            marker = '  <-- repeated' if count > 1 else ''
+            lines.append(f'  {count:>4} x {shape[:200]}{marker}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(budget: int, engine=Engine, label: str = 'block'):
+    """Fail with a grouped statement report if the block exceeds its query budget"""
+    with QueryRecorder(engine) as recorder:
+        yield recorder
+    if recorder.count > budget:
+        raise QueryBudgetExceeded(
+            f'{label} issued {recorder.count} SQL statements (budget {budget})\n{recorder.report()}'
+        )
+
+
+def init_n1_detection(app):
+    """Log inline warnings for repeated SELECT shapes within a request"""
+    threshold = app.config.get('N1_DETECTION_THRESHOLD', DEFAULT_N1_THRESHOLD)
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _track_statement(conn, cursor, statement, parameters, context, executemany):
+        if not has_request_context() or not statement.lstrip().upper().startswith('SELECT'):
+            return
+        shapes = g.setdefault('n1_shapes', Counter())
+        shape = normalize_sql(statement)
+        shapes[shape] += 1
+        if shapes[shape] == threshold + 1:
+            logger.warning(
+                f"Possible N+1 in {request.endpoint}: statement repeated {shapes[shape]} times "
+                f"at {caller_location() or 'unknown location'}: {shape[:200]}"
+            )
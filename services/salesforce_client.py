@@ -0,0 +1,30 @@
+"""
+Salesforce connection for the event sync.
+
+simple_salesforce always talks https to *.salesforce.com. When
+SALESFORCE_BASE_URL is set (a local stand-in such as the fake upstream
+server), every call for the login origin is rewritten to that base URL; the
+stand-in reports the login origin as the instance, so query and queryMore
+calls follow the same route.
+"""
+
+from simple_salesforce import Salesforce
+
+from services.http_client import build_session, redirect_origin
+
+SALESFORCE_LOGIN_ORIGIN = 'https://login.salesforce.com'
+
+
+def connect_salesforce(config) -> Salesforce:
+    """Log in with the configured credentials"""
+    kwargs = {
+        'username': config.get('SF_USERNAME'),
+        'password': config.get('SF_PASSWORD'),
+        'security_token': config.get('SF_SECURITY_TOKEN'),
+        'domain': 'login',
+    }
+    base_url = config.get('SALESFORCE_BASE_URL')
+    if base_url:
+        # No retries: the stand-in's injected errors should surface as they would in production
+        kwargs['session'] = redirect_origin(build_session(retries=0), SALESFORCE_LOGIN_ORIGIN, base_url)
+    return Salesforce(**kwargs)
@@ -0,0 +1,270 @@
+"""
+Built-in scheduler for the periodic syncs.
+
+`flask --app app scheduler run` starts a long-running process that runs
+each job (Salesforce sessions, virtual event sheets, Polaris users, school
+mappings, static feed publishing, event change log compaction) on its own
+interval:
+
+- Every delay is jittered by +/- SCHEDULER_JITTER so several schedulers, or
+  jobs with equal intervals, do not hit the upstreams in lockstep.
+- A job runs only while holding its JobLock, so two schedulers, cron's
+  sync_script.py and the dashboard's sync buttons never run it concurrently.
+- Failures back off exponentially, up to SCHEDULER_MAX_BACKOFF.
+- While runs keep changing rows the interval halves, down to a quarter of
+  the configured one; quiet runs double it back to the configured value.
+
+Every run is stored as a JobRun, and `scheduler history` lists them.
+"""
+
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from models import db
+from models.event_change import EventChange
+from models.job_run import JobRun
+from services.job_lock import JobAlreadyRunning, execute_job
+from services.metrics import Counter
+
+logger = logging.getLogger('scheduler')
+
+SCHEDULED_RUNS_TOTAL = Counter('voluntold_scheduled_runs_total',
+                               'Scheduled job runs by job and status')
+
+# Longest the loop sleeps, so a stop request or clock change is noticed
+MAX_SLEEP = 60.0
+
+
+@dataclass
+class Job:
+    name: str
+    run: Callable[[], dict]  # returns a result dict with 'success'
+    interval: float  # configured seconds between runs
+    changed: Callable[[dict], int]  # rows a successful run changed
+    min_interval: Optional[float] = None  # floor while data is changing; interval / 4 by default
+
+    def __post_init__(self):
+        if self.min_interval is None:
+            self.min_interval = self.interval / 4
+
+
+@dataclass
+class JobState:
+    interval: float  # current adaptive interval
+    next_run: float  # epoch seconds
+    failures: int = 0
+
+
+def default_owner() -> str:
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _epoch(value: datetime) -> float:
+    # SQLite returns naive datetimes; everything is stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class Scheduler:
+    """Runs jobs when due, under a lease, and records every run"""
+
+    def __init__(self, app, jobs: List[Job], owner: str = None, jitter: float = None,
+                 max_backoff: float = None, lease_ttl: float = None, history_limit: int = None,
+                 rng: random.Random = None, clock: Callable[[], float] = time.time):
+        config = app.config
+        self.app = app
+        self.jobs: Dict[str, Job] = {job.name: job for job in jobs}
+        self.owner = owner or default_owner()
+        self.jitter = config.get('SCHEDULER_JITTER', 0.1) if jitter is None else jitter
+        self.max_backoff = config.get('SCHEDULER_MAX_BACKOFF', 6 * 3600) if max_backoff is None else max_backoff
+        self.lease_ttl = config.get('SCHEDULER_LEASE_TTL', 1800) if lease_ttl is None else lease_ttl
+        self.history_limit = config.get('SCHEDULER_HISTORY_LIMIT', 500) if history_limit is None else history_limit
+        self.rng = rng or random.Random()
+        self.clock = clock
+        self.states: Dict[str, JobState] = {}
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+    def load_state(self) -> None:
+        """Schedule each job from its last recorded run, so restarts do not re-run everything"""
+        now = self.clock()
+        with self.app.app_context():
+            for job in self.jobs.values():
+                last = JobRun.latest(job.name)
+                if last is not None and last.finished_at is not None and last.next_interval is not None:
+                    next_run = _epoch(last.finished_at) + last.next_interval
+                else:
+                    # Never run: start soon, staggered
+                    next_run = now + self.rng.uniform(0, self.jitter * job.interval)
+                self.states[job.name] = JobState(interval=job.interval, next_run=next_run)
+
+    def next_delay(self, job: Job, state: JobState, success: bool, changed: int) -> float:
+        """Seconds until the next run, updating the job's adaptive state"""
+        if not success:
+            state.failures += 1
+            return self._jittered(min(state.interval * 2 ** state.failures, self.max_backoff))
+        state.failures = 0
+        if changed:
+            state.interval = max(job.min_interval, state.interval / 2)
+        else:
+            state.interval = min(job.interval, state.interval * 2)
+        return self._jittered(state.interval)
+
+    def run_job(self, name: str) -> Optional[dict]:
+        """Run a job now. Returns the recorded run, or None if it is already running elsewhere."""
+        job = self.jobs[name]
+        state = self.states.setdefault(name, JobState(interval=job.interval, next_run=0))
+        with self.app.app_context():
+            try:
+                run, _, _ = execute_job(name, job.run, trigger='scheduled', owner=self.owner, changed=job.changed)
+            except JobAlreadyRunning:
+                logger.info('%s is already running elsewhere; skipped', name)
+                state.next_run = self.clock() + self._jittered(job.min_interval)
+                SCHEDULED_RUNS_TOTAL.inc(job=name, status='skipped')
+                return None
+            finally:
+                db.session.remove()
+
+            run['next_interval'] = self.next_delay(job, state, run['status'] == 'success', run['changed_count'])
+            state.next_run = self.clock() + run['next_interval']
+            JobRun.query.filter_by(id=run['id']).update({'next_interval': run['next_interval']})
+            JobRun.prune(name, self.history_limit)
+            db.session.commit()
+            db.session.remove()
+
+        SCHEDULED_RUNS_TOTAL.inc(job=name, status=run['status'])
+        logger.info('%s %s in %.0f ms, %d changed; next run in %.0f s%s', name, run['status'], run['duration_ms'],
+                    run['changed_count'], run['next_interval'], f" ({run['error']})" if run['error'] else '')
+        return run
+
+    def run_pending(self) -> List[str]:
+        """Run every job that is due; returns their names"""
+        if not self.states:
+            self.load_state()
+        due = [name for name, state in sorted(self.states.items(), key=lambda item: item[1].next_run)
+               if state.next_run <= self.clock()]
+        for name in due:
+            self.run_job(name)
+        return due
+
+    def seconds_until_next(self) -> float:
+        if not self.states:
+            return 0.0
+        return max(0.0, min(state.next_run for state in self.states.values()) - self.clock())
+
+    def run_forever(self, stop: threading.Event = None) -> None:
+        stop = stop or threading.Event()
+        self.load_state()
+        logger.info('Scheduler %s started with jobs: %s', self.owner,
+                    ', '.join(f'{job.name} every {job.interval:.0f}s' for job in self.jobs.values()))
+        while not stop.is_set():
+            self.run_pending()
+            stop.wait(min(self.seconds_until_next(), MAX_SLEEP))
+        logger.info('Scheduler %s stopped', self.owner)
+
+
+def default_jobs(config) -> List[Job]:
+    """The sync jobs, skipping any with a zero interval or missing configuration"""
+    # Deferred: the route modules import the Salesforce/Sheets/Polaris clients lazily too
+    from routes.school_mappings import MAPPINGS_FILE, sync_school_mappings
+    from routes.sync import sync_polaris_users
+    from routes.upcoming_events import sync_upcoming_events
+    from routes.virtual_events import import_virtual_sheet
+    from services.static_feeds import publish_if_stale
+
+    retention = config.get('EVENT_CHANGES_RETENTION', 30 * 86400)
+    candidates = [
+        # updated_count covers every session still in Salesforce, so it says nothing about change
+        (Job('salesforce_sessions', sync_upcoming_events, config.get('SCHEDULER_SALESFORCE_INTERVAL', 3600),
+             lambda r: r['new_count'] + r['deleted_count'] + r['archived_count']),
+         config.get('SF_USERNAME')),
+        (Job('virtual_sheets', lambda: import_virtual_sheet()[0], config.get('SCHEDULER_VIRTUAL_SHEETS_INTERVAL', 3600),
+             lambda r: r['new_count']),
+         os.getenv('VIRTUAL_EVENTS_SHEET_ID')),
+        (Job('polaris_users', lambda: sync_polaris_users()[0], config.get('SCHEDULER_POLARIS_USERS_INTERVAL', 3600),
+             lambda r: r['stats']['created'] + r['stats']['updated']),
+         config.get('SYNC_USERNAME')),
+        (Job('school_mappings', lambda: sync_school_mappings()[0],
+             config.get('SCHEDULER_SCHOOL_MAPPINGS_INTERVAL', 86400), lambda r: r['changed_count']),
+         MAPPINGS_FILE.exists()),
+        (Job('static_feeds', publish_if_stale, config.get('SCHEDULER_STATIC_FEEDS_INTERVAL', 120),
+             lambda r: r['written']),
+         config.get('STATIC_FEEDS')),
+        # Housekeeping: compacting the change log changes no events
+        (Job('event_changes_compaction', lambda: {'success': True, **EventChange.compact(retention)},
+             config.get('SCHEDULER_EVENT_CHANGES_COMPACTION_INTERVAL', 86400), lambda r: 0),
+         True),
+    ]
+    jobs = []
+    for job, configured in candidates:
+        if not job.interval:
+            continue
+        if not configured:
+            logger.warning('%s is not configured; not scheduling it', job.name)
+            continue
+        jobs.append(job)
+    return jobs
+
+
+def build_scheduler(app) -> Scheduler:
+    return Scheduler(app, default_jobs(app.config))
+
+
+scheduler_cli = AppGroup('scheduler', help='Run and inspect the scheduled syncs.')
+
+
+@scheduler_cli.command('run')
+def run_command():
+    """Run the scheduler until interrupted."""
+    scheduler = build_scheduler(current_app._get_current_object())
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *args: stop.set())
+    click.echo(f"Scheduling {', '.join(scheduler.jobs) or 'nothing'}; Ctrl+C to stop")
+    scheduler.run_forever(stop)
+
+
+@scheduler_cli.command('run-job')
+@click.argument('name')
+def run_job_command(name):
+    """Run one job now, under its lease."""
+    app = current_app._get_current_object()
+    jobs = {job.name: job for job in default_jobs(app.config)}
+    if name not in jobs:
+        raise click.BadParameter(f"choose from: {', '.join(jobs) or 'no configured jobs'}", param_hint='NAME')
+    run = Scheduler(app, [jobs[name]]).run_job(name)
+    if run is None:
+        click.echo(f'{name} is already running elsewhere')
+        raise SystemExit(1)
+    click.echo(f"{name}: {run['status']} in {run['duration_ms']:.0f} ms, {run['changed_count']} changed"
+               + (f" ({run['error']})" if run['error'] else ''))
+    if run['status'] != 'success':
+        raise SystemExit(1)
+
+
+@scheduler_cli.command('history')
+@click.option('--job', 'job_name', help='Only this job')
+@click.option('--limit', default=20, show_default=True)
+def history_command(job_name, limit):
+    """List recent job runs."""
+    query = JobRun.query
+    if job_name:
+        query = query.filter_by(job_name=job_name)
+    for run in query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit):
+        click.echo(f'{run.started_at:%Y-%m-%d %H:%M:%S}  {run.job_name:<20} {run.status:<8} '
+                   f'{run.duration_ms or 0:>9.0f} ms  {run.changed_count or 0:>6} changed'
+                   + (f'  {run.error}' if run.error else ''))
@@ -0,0 +1,46 @@
+"""
+In-memory school/district lookup built from the school_mappings table.
+
+The mappings change only when the CSV is re-synced, but the dashboard's
+district autocomplete and the school-mapping APIs read them constantly.
+The directory is a feed_cache snapshot, so it is built once per process
+(before fork when warmed up) and rebuilt after a sync.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from models.school_mapping import SchoolMapping
+from services.feed_cache import register_snapshot, snapshot_data
+
+
+@dataclass(frozen=True)
+class SchoolDirectory:
+    schools: Tuple[dict, ...]
+    by_district: Dict[str, Tuple[dict, ...]]
+    districts: Tuple[str, ...]  # sorted, distinct
+
+    def schools_in(self, district: str) -> List[dict]:
+        return list(self.by_district.get(district, ()))
+
+    def search_districts(self, query: str) -> List[str]:
+        """Case-insensitive substring match, like the ILIKE it replaces"""
+        query = query.lower()
+        return [district for district in self.districts if query in district.lower()]
+
+
+@register_snapshot('school_directory', SchoolMapping, as_json=False)
+def build_school_directory() -> SchoolDirectory:
+    schools = tuple(mapping.to_dict() for mapping in SchoolMapping.query.order_by(SchoolMapping.id))
+    by_district: Dict[str, list] = {}
+    for school in schools:
+        by_district.setdefault(school['district'], []).append(school)
+    return SchoolDirectory(
+        schools=schools,
+        by_district={district: tuple(rows) for district, rows in by_district.items()},
+        districts=tuple(sorted(by_district)),
+    )
+
+
+def school_directory() -> SchoolDirectory:
+    return snapshot_data('school_directory')
@@ -0,0 +1,324 @@
+"""
+Opt-in slow-query log with EXPLAIN capture.
+
+Statements slower than SLOW_QUERY_THRESHOLD_MS are recorded with their
+normalized SQL, the route and project line that issued them, and a query
+plan. Plans are captured on a background thread with a separate connection,
+so the request that ran the slow statement never waits for EXPLAIN. A
+sampled fraction of SELECTs is explained with EXPLAIN ANALYZE where the
+database supports it.
+
+The recorder is rate-limited so a burst of slow statements cannot turn it
+into a hot path of its own:
+
+- A statement shape is captured in full (log line, entry, plan) at most once
+  per SLOW_QUERY_SHAPE_INTERVAL seconds. Repeats in between only bump that
+  shape's counters.
+- At most SLOW_QUERY_MAX_PER_MINUTE entries are captured per process per
+  minute; the rest are counted as dropped.
+- The EXPLAIN queue is bounded; plans are skipped when it is full.
+
+Each worker keeps its own ring buffer. When METRICS_DIR is set, workers also
+write their entries to slow_queries_<pid>.json there so the admin page can
+show offenders from every worker.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Dict, List, Optional
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from services.query_inspector import caller_location, normalize_sql
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 100
+DEFAULT_SHAPE_INTERVAL = 60
+DEFAULT_MAX_PER_MINUTE = 30
+EXPLAIN_QUEUE_SIZE = 20
+MAX_TRACKED_SHAPES = 1000
+MAX_STATEMENT_LENGTH = 4000
+SKIP_INFO_KEY = 'slow_query_log_skip'
+START_INFO_KEY = 'slow_query_log_start'
+_OWN_FILE = os.path.join('services', 'slow_query_log.py')
+
+# Statements worth a plan; only plain SELECTs are run under EXPLAIN ANALYZE, since a
+# WITH can wrap a data-modifying CTE
+READ_STATEMENT = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+SELECT_STATEMENT = re.compile(r'\s*SELECT\b', re.IGNORECASE)
+
+# (EXPLAIN prefix, EXPLAIN ANALYZE prefix) per dialect
+EXPLAIN_PREFIXES = {
+    'sqlite': ('EXPLAIN QUERY PLAN ', None),
+    'postgresql': ('EXPLAIN ', 'EXPLAIN (ANALYZE, BUFFERS) '),
+    'mysql': ('EXPLAIN ', 'EXPLAIN ANALYZE '),
+}
+
+
+def _fingerprint(shape: str) -> str:
+    return format(zlib.crc32(shape.encode('utf-8')), '08x')
+
+
+def _format_plan(rows) -> str:
+    lines = []
+    for row in rows:
+        row = tuple(row)
+        # SQLite's EXPLAIN QUERY PLAN returns (id, parent, notused, detail)
+        lines.append(str(row[-1]) if len(row) in (1, 4) else ' | '.join(str(value) for value in row))
+    return '\n'.join(lines)
+
+
+class SlowQueryLog:
+    """Record slow statements on an engine and capture their plans in the background"""
+
+    def __init__(self, threshold_ms: float, explain: bool = True, analyze_sample_rate: float = 0.0,
+                 capacity: int = DEFAULT_CAPACITY, shape_interval: float = DEFAULT_SHAPE_INTERVAL,
+                 max_per_minute: int = DEFAULT_MAX_PER_MINUTE, storage_dir: Optional[str] = None):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.analyze_sample_rate = analyze_sample_rate
+        self.shape_interval = shape_interval
+        self.max_per_minute = max_per_minute
+        self.storage_dir = storage_dir
+        self.entries: deque = deque(maxlen=capacity)
+        self.shapes: Dict[str, dict] = {}
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=EXPLAIN_QUEUE_SIZE)
+        self._worker: Optional[threading.Thread] = None
+        self._engines = []
+        self._databases = {}
+
+    # Engine hooks
+
+    def install(self, engine, database: str = 'primary'):
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines.append(engine)
+        self._databases[engine] = database
+
+    def uninstall(self):
+        for engine in self._engines:
+            event.remove(engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.remove(engine, 'after_cursor_execute', self._after_cursor_execute)
+        self._engines = []
+        self._databases = {}
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(START_INFO_KEY, []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get(START_INFO_KEY)
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold or conn.info.get(SKIP_INFO_KEY):
+            return
+        self.record(conn.engine, statement, None if executemany else parameters, elapsed)
+
+    # Recording
+
+    def _allow_capture(self, fingerprint: str, now: float) -> bool:
+        """Update the per-shape counters and decide whether to capture in full. Caller holds the lock."""
+        stats = self.shapes.get(fingerprint)
+        if stats is None:
+            if len(self.shapes) >= MAX_TRACKED_SHAPES:
+                self.shapes.clear()
+            stats = self.shapes[fingerprint] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                'last_captured': None}
+        stats['count'] += 1
+
+        if stats['last_captured'] is not None and now - stats['last_captured'] < self.shape_interval:
+            return False
+        if now - self._window_start >= 60:
+            self._window_start, self._window_count = now, 0
+        if self._window_count >= self.max_per_minute:
+            self.dropped += 1
+            return False
+        self._window_count += 1
+        stats['last_captured'] = now
+        return True
+
+    def record(self, engine, statement: str, parameters, elapsed: float) -> Optional[dict]:
+        """Count a slow statement and, unless rate-limited, capture an entry for it"""
+        shape = normalize_sql(statement)
+        fingerprint = _fingerprint(shape)
+        duration_ms = round(elapsed * 1000, 2)
+        now = time.monotonic()
+
+        with self._lock:
+            capture = self._allow_capture(fingerprint, now)
+            stats = self.shapes[fingerprint]
+            stats['total_ms'] += duration_ms
+            stats['max_ms'] = max(stats['max_ms'], duration_ms)
+            stats['shape'] = shape
+            if not capture:
+                return None
+
+        if has_request_context():
+            route = f'{request.method} {request.endpoint or request.path}'
+        else:
+            route = 'background'
+        entry = {
+            'fingerprint': fingerprint,
+            'sql': shape,
+            'statement': statement[:MAX_STATEMENT_LENGTH],
+            'duration_ms': duration_ms,
+            'route': route,
+            'database': self._databases.get(engine, 'primary'),
+            'caller': caller_location(skip=(_OWN_FILE,)),
+            'timestamp': time.time(),
+            'pid': os.getpid(),
+            'plan': None,
+            'plan_error': None,
+            'analyzed': False,
+        }
+        with self._lock:
+            self.entries.append(entry)
+
+        logger.warning(f"Slow query ({duration_ms} ms) in {route} at {entry['caller'] or 'unknown location'}: "
+                       f"{shape[:500]}")
+        self._submit(engine, entry, statement, parameters)
+        return entry
+
+    # Background EXPLAIN and persistence
+
+    def _submit(self, engine, entry: dict, statement: str, parameters):
+        prefixes = EXPLAIN_PREFIXES.get(engine.dialect.name)
+        is_read = READ_STATEMENT.match(statement) is not None
+        explain = self.explain and prefixes is not None and is_read and parameters is not None
+        if not explain and not self.storage_dir:
+            return
+
+        prefix = None
+        if explain:
+            analyze = (prefixes[1] is not None and SELECT_STATEMENT.match(statement) is not None
+                       and random.random() < self.analyze_sample_rate)
+            prefix = prefixes[1] if analyze else prefixes[0]
+            entry['analyzed'] = analyze
+
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait((engine, entry, prefix, statement, parameters))
+        except queue.Full:
+            entry['analyzed'] = False
+            logger.debug('Slow query EXPLAIN queue is full; skipping plan capture')
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='slow-query-explain', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            engine, entry, prefix, statement, parameters = self._queue.get()
+            try:
+                if prefix is not None:
+                    try:
+                        entry['plan'] = self._explain(engine, prefix, statement, parameters)
+                    except Exception as e:
+                        # Still persisted below, just without a plan
+                        entry['analyzed'] = False
+                        entry['plan_error'] = str(e)
+                        logger.debug(f'Slow query EXPLAIN failed: {e}')
+                self._persist()
+            except Exception as e:
+                logger.warning(f'Could not persist slow query log: {e}')
+            finally:
+                self._queue.task_done()
+
+    def _explain(self, engine, prefix: str, statement: str, parameters) -> str:
+        with engine.connect() as conn:
+            conn.info[SKIP_INFO_KEY] = True
+            try:
+                rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+            finally:
+                conn.info.pop(SKIP_INFO_KEY, None)
+                # EXPLAIN ANALYZE executes the statement; never keep its transaction
+                conn.rollback()
+        return _format_plan(rows)
+
+    def _persist(self):
+        """Write this process's entries to the shared directory (atomic replace)"""
+        if not self.storage_dir:
+            return
+        os.makedirs(self.storage_dir, exist_ok=True)
+        path = os.path.join(self.storage_dir, f'slow_queries_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'pid': os.getpid(), 'entries': self.latest()}, f)
+        os.replace(tmp_path, path)
+
+    def wait_idle(self):
+        """Block until queued plans have been captured"""
+        self._queue.join()
+
+    # Reading
+
+    def latest(self) -> List[dict]:
+        """This process's captured entries, newest first"""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self.entries)]
+
+    def collect(self, limit: int = DEFAULT_CAPACITY) -> List[dict]:
+        """Newest entries from this process and, when a storage dir is set, every other worker"""
+        entries = self.latest()
+        if self.storage_dir and os.path.isdir(self.storage_dir):
+            own = f'slow_queries_{os.getpid()}.json'
+            for filename in os.listdir(self.storage_dir):
+                if not filename.startswith('slow_queries_') or not filename.endswith('.json') or filename == own:
+                    continue
+                try:
+                    with open(os.path.join(self.storage_dir, filename)) as f:
+                        entries.extend(json.load(f).get('entries', []))
+                except (OSError, ValueError):
+                    continue
+        entries.sort(key=lambda entry: entry['timestamp'], reverse=True)
+        return entries[:limit]
+
+    def top_shapes(self, limit: int = 20) -> List[dict]:
+        """This process's slow statement shapes by total time"""
+        with self._lock:
+            shapes = [{'fingerprint': fingerprint, **stats} for fingerprint, stats in self.shapes.items()]
+        shapes.sort(key=lambda stats: stats['total_ms'], reverse=True)
+        return shapes[:limit]
+
+
+def init_slow_query_log(app) -> Optional[SlowQueryLog]:
+    """Install the slow-query log on the app's engines (primary and binds) when SLOW_QUERY_THRESHOLD_MS is set"""
+    threshold_ms = app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold_ms is None:
+        return None
+
+    from models import db
+
+    slow_query_log = SlowQueryLog(
+        threshold_ms=threshold_ms,
+        explain=app.config.get('SLOW_QUERY_EXPLAIN', True),
+        analyze_sample_rate=app.config.get('SLOW_QUERY_ANALYZE_SAMPLE_RATE', 0.0),
+        capacity=app.config.get('SLOW_QUERY_LOG_SIZE', DEFAULT_CAPACITY),
+        shape_interval=app.config.get('SLOW_QUERY_SHAPE_INTERVAL', DEFAULT_SHAPE_INTERVAL),
+        max_per_minute=app.config.get('SLOW_QUERY_MAX_PER_MINUTE', DEFAULT_MAX_PER_MINUTE),
+        storage_dir=app.config.get('METRICS_DIR') or None,
+    )
+    with app.app_context():
+        # Every bind, so queries routed to the read replica (services.db_routing) are caught too
+        for bind_key, engine in db.engines.items():
+            slow_query_log.install(engine, bind_key or 'primary')
+    app.extensions['slow_query_log'] = slow_query_log
+    return slow_query_log
@@ -0,0 +1,76 @@
+"""
+Opt-in SQLite tuning for single-node and development deployments.
+
+With SQLITE_TUNING on, every new connection to a SQLite engine runs:
+
+- journal_mode=WAL: readers no longer block the writer or each other, so the
+  dashboard keeps working during a sync instead of hitting "database is locked"
+- synchronous=NORMAL: safe with WAL; commits skip an fsync per transaction
+- busy_timeout: a writer waits for the lock instead of failing at once
+- mmap_size, cache_size and temp_store=MEMORY: fewer read syscalls and no
+  temporary files for sorts
+
+WAL is a property of the database file, so it stays on after the first
+connection sets it; the other pragmas are per connection.
+
+SQLITE_MEMORY_URI is a shared-cache in-memory database for the test suite
+(TEST_SQLITE_MEMORY=1). Every pooled connection sees the same database, and
+init_sqlite_tuning() holds one connection open so it survives the pool
+closing all of its own.
+"""
+
+import sqlite3
+
+from sqlalchemy import event
+
+# file: URI with mode=memory; Flask-SQLAlchemy only treats ':memory:' as in-memory, so this gets a pool
+SQLITE_MEMORY_URI = 'sqlite:///file:voluntold?mode=memory&cache=shared&uri=true'
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative: KiB, i.e. 64 MiB per connection
+    'temp_store': 'MEMORY',
+}
+
+
+def is_memory(url) -> bool:
+    return url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'
+
+
+def tuning_pragmas(config) -> dict:
+    return {name: config.get(f'SQLITE_{name.upper()}', default) for name, default in DEFAULT_PRAGMAS.items()}
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict, memory: bool = False) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            if memory and name in ('journal_mode', 'mmap_size'):
+                continue  # no file behind it
+            cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+        cursor.close()
+
+
+def init_sqlite_tuning(app, db) -> None:
+    with app.app_context():
+        engines = dict(db.engines)
+    for engine in engines.values():
+        if engine.dialect.name != 'sqlite':
+            continue
+        memory = is_memory(engine.url)
+        if memory and engine.url.query.get('cache') == 'shared':
+            # The shared database is dropped when its last connection closes
+            database = engine.url.database
+            app.extensions.setdefault('sqlite_keepalive', []).append(
+                sqlite3.connect(f'{database}?mode=memory&cache=shared', uri=True, check_same_thread=False))
+        if not app.config.get('SQLITE_TUNING'):
+            continue
+        pragmas = tuning_pragmas(app.config)
+
+        @event.listens_for(engine, 'connect')
+        def _tune(dbapi_connection, connection_record, pragmas=pragmas, memory=memory):
+            apply_pragmas(dbapi_connection, pragmas, memory)
@@ -0,0 +1,218 @@
+"""
+Pre-rendered public feeds, written to disk after each sync.
+
+publish_feeds() serializes the public feeds (displayed events, DIA events
+overall and per district, virtual events) into STATIC_FEEDS_DIR, with a
+gzip and, when the brotli package is installed, a brotli variant beside
+each file. Flask's static route, the /feeds/ route (which picks the
+variant the client accepts) or a front proxy (nginx gzip_static /
+brotli_static) serves them without running a view or a query.
+
+Each file is written under a temporary name and renamed into place, so
+readers never see a partial file. Unchanged feeds are not rewritten, which
+keeps their mtime and ETag stable. manifest.json is written last. It lists
+every feed with its digest and sizes, and the event change-log cursor the
+feeds were built from; comparing that cursor with the current one is how
+freshness is reported.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import current_app
+
+from models.event_change import EventChange
+
+try:
+    import brotli
+except ImportError:  # optional; without it only .gz variants are written
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; publishers there are not serialized
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+
+
+def feeds_dir(app=None) -> Path:
+    app = app or current_app
+    return Path(app.config.get('STATIC_FEEDS_DIR') or Path(app.static_folder) / 'feeds')
+
+
+def _slug(name: str, taken: set) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'district'
+    if slug in taken:
+        # Distinct names that slugify alike ("St. Joseph" / "St Joseph")
+        slug = f'{slug}-{zlib.crc32(name.encode()):08x}'
+    taken.add(slug)
+    return slug
+
+
+def build_feeds() -> Dict[str, object]:
+    """Relative file name -> feed data, the same data the feed endpoints return"""
+    # Deferred like the scheduler's jobs: the route modules pull in the blueprints
+    from models.upcoming_event import UpcomingEvent
+    from routes.dia import upcoming_dia_events
+    from routes.upcoming_events import displayed_events
+
+    dia_events = upcoming_dia_events()
+    virtual = UpcomingEvent.query.filter_by(source='virtual', status='active')\
+        .order_by(*UpcomingEvent.chronological())
+    feeds = {
+        'displayed_events.json': displayed_events(),
+        'dia_events.json': dia_events,
+        'virtual_events.json': UpcomingEvent.list_dicts(virtual),
+    }
+    districts = sorted({district for event in dia_events for district in event['districts']})
+    taken = set()
+    for district in districts:
+        feeds[f'dia/districts/{_slug(district, taken)}.json'] = {
+            'district': district,
+            'events': [event for event in dia_events if district in event['districts']],
+        }
+    return feeds
+
+
+def _variants(body: bytes) -> Dict[str, bytes]:
+    # mtime=0 so identical feeds compress to identical bytes
+    variants = {'': body, '.gz': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(body, quality=11)
+    return variants
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    temp.write_bytes(data)
+    os.replace(temp, path)
+
+
+def _remove(path: Path) -> None:
+    for suffix in ('', '.gz', '.br'):
+        try:
+            path.with_name(path.name + suffix).unlink()
+        except FileNotFoundError:
+            pass
+
+
+def read_manifest(directory: Path = None) -> Optional[dict]:
+    try:
+        return json.loads(((directory or feeds_dir()) / MANIFEST).read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@contextmanager
+def _publish_lock(directory: Path):
+    """Serialize publishers (workers, the scheduler) so an older build never overwrites a newer one"""
+    directory.mkdir(parents=True, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(directory / '.lock', 'w') as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def publish_feeds() -> dict:
+    """
+    Write every feed and the manifest. Needs an app context.
+
+    Returns:
+        dict: published_at, cursor, and how many feeds were written, unchanged and removed
+    """
+    started = time.perf_counter()
+    directory = feeds_dir()
+    with _publish_lock(directory):
+        # Read before building, so a change committed mid-build shows as not yet published
+        cursor = EventChange.latest_cursor()
+        previous = (read_manifest(directory) or {}).get('feeds', {})
+        feeds, written, unchanged = {}, 0, 0
+        for name, data in build_feeds().items():
+            body = (current_app.json.dumps(data) + '\n').encode()
+            digest = hashlib.sha256(body).hexdigest()
+            path = directory / name
+            if previous.get(name, {}).get('sha256') == digest and path.exists():
+                feeds[name] = previous[name]
+                unchanged += 1
+                continue
+            variants = _variants(body)
+            # Compressed variants first, so the plain file never points at stale ones
+            for suffix in sorted(variants, key=len, reverse=True):
+                _write_atomic(path.with_name(path.name + suffix), variants[suffix])
+            feeds[name] = {
+                'sha256': digest,
+                'bytes': len(body),
+                **{f'{suffix[1:]}_bytes': len(blob) for suffix, blob in variants.items() if suffix},
+                'count': len(data['events'] if isinstance(data, dict) else data),
+            }
+            written += 1
+
+        removed = [name for name in previous if name not in feeds]
+        for name in removed:
+            _remove(directory / name)
+
+        published_at = datetime.now(timezone.utc).isoformat()
+        _write_atomic(directory / MANIFEST, json.dumps(
+            {'published_at': published_at, 'cursor': cursor, 'feeds': feeds}, indent=1, sort_keys=True
+        ).encode())
+
+    return {
+        'published_at': published_at,
+        'cursor': cursor,
+        'written': written,
+        'unchanged': unchanged,
+        'removed': len(removed),
+        'duration_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def feed_freshness() -> Optional[dict]:
+    """When the feeds were published, and how many event changes they are behind"""
+    manifest = read_manifest()
+    if manifest is None:
+        return None
+    # Change-log ids become visible in commit order (services.commit_order), so a change
+    # committed after the publish read its cursor always has a higher id than the manifest's
+    return {
+        'published_at': manifest['published_at'],
+        'cursor': manifest['cursor'],
+        'changes_behind': max(0, EventChange.latest_cursor() - manifest['cursor']),
+    }
+
+
+def publish_after_sync() -> Optional[dict]:
+    """Publish for a sync report: the publish summary, or the error and how stale the feeds are"""
+    if not current_app.config.get('STATIC_FEEDS'):
+        return None
+    try:
+        return publish_feeds()
+    except Exception as e:
+        logger.exception('Publishing static feeds failed')
+        return {'error': str(e), **(feed_freshness() or {})}
+
+
+def publish_if_stale() -> dict:
+    """Scheduler job: republish when events changed since the last publish (e.g. admin edits)"""
+    freshness = feed_freshness()
+    if freshness is not None and freshness['changes_behind'] == 0:
+        return {'success': True, 'written': 0, **freshness}
+    return {'success': True, **publish_feeds()}
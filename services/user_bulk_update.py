@@ -0,0 +1,138 @@
+"""
+Bulk path for POST /api/v1/users/update.
+
+Rows are processed in chunks. Each chunk resolves its usernames (and the
+emails it would write) with one IN query each, applies updates and creates
+as bulk statements and commits, so a large push never holds one long
+transaction. Every input row gets a result entry.
+
+Rows may set username, email, first_name, last_name, security_level and
+(on create) password_hash. is_admin is accepted as in the per-row path and
+in User(): without a security_level, it sets ADMIN or USER. Other keys are
+ignored.
+"""
+
+import logging
+from typing import Dict, List
+
+from sqlalchemy import insert, select, update
+
+from models import db
+from models.user import SecurityLevel, User
+from services.user_cache import principal_cache
+from services.user_sync import chunked
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_CHUNK_SIZE = 10000
+# Columns a push may change on an existing user (password_hash is never updated)
+UPDATE_FIELDS = ('email', 'first_name', 'last_name', 'security_level')
+CREATE_FIELDS = ('username', 'email', 'password_hash', 'first_name', 'last_name', 'security_level')
+
+
+def _with_security_level(row: dict) -> dict:
+    """The row with is_admin turned into security_level, as User.is_admin's setter does"""
+    if 'is_admin' not in row or 'security_level' in row:
+        return row
+    return {**row, 'security_level': SecurityLevel.ADMIN if row['is_admin'] else SecurityLevel.USER}
+
+
+def _result(index, username, status, error=None):
+    result = {'index': index, 'username': username, 'status': status}
+    if error:
+        result['error'] = error
+    return result
+
+
+class BulkUserUpdater:
+    """Apply a list of pushed user rows with chunked bulk statements"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+
+    def apply(self, rows: List[dict]) -> dict:
+        """
+        Update or create users.
+
+        Returns:
+            dict: created/updated/unchanged/failed counts, error messages and
+            a per-row 'results' list in input order
+        """
+        results: List[dict] = [None] * len(rows)
+        seen_usernames = set()
+        pending = []
+
+        for index, row in enumerate(rows):
+            username = row.get('username') if isinstance(row, dict) else None
+            if not username or not row.get('email'):
+                results[index] = _result(index, username or 'unknown', 'failed',
+                                         f"Missing required fields for user: {username or 'unknown'}")
+            elif username in seen_usernames:
+                results[index] = _result(index, username, 'failed', 'Duplicate username in request')
+            else:
+                seen_usernames.add(username)
+                pending.append((index, _with_security_level(row)))
+
+        for chunk in chunked(pending, self.chunk_size):
+            for result in self._apply_chunk(chunk):
+                results[result['index']] = result
+
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': []}
+        for result in results:
+            summary[result['status']] += 1
+            if result['status'] == 'failed':
+                summary['errors'].append(f"{result['username']}: {result['error']}")
+        summary['results'] = results
+        return summary
+
+    def _apply_chunk(self, chunk) -> List[dict]:
+        usernames = [row['username'] for _, row in chunk]
+        emails = [row['email'] for _, row in chunk]
+        columns = [User.id, User.username] + [getattr(User, name) for name in UPDATE_FIELDS]
+        existing: Dict[str, dict] = {
+            row['username']: dict(row)
+            for row in db.session.execute(select(*columns).where(User.username.in_(usernames))).mappings()
+        }
+        email_owners: Dict[str, str] = dict(
+            db.session.execute(select(User.email, User.username).where(User.email.in_(emails))).all()
+        )
+
+        results, updates, creates, claimed_emails = [], [], [], {}
+        for index, row in chunk:
+            username, email = row['username'], row['email']
+            owner = claimed_emails.get(email) or email_owners.get(email)
+            if owner is not None and owner != username:
+                results.append(_result(index, username, 'failed', f"Email {email} already belongs to {owner}"))
+                continue
+            claimed_emails[email] = username
+
+            current = existing.get(username)
+            if current is not None:
+                changes = {key: row[key] for key in UPDATE_FIELDS if key in row and row[key] != current[key]}
+                if changes:
+                    updates.append({'id': current['id'], **changes})
+                    results.append(_result(index, username, 'updated'))
+                else:
+                    results.append(_result(index, username, 'unchanged'))
+            elif not row.get('password_hash'):
+                results.append(_result(index, username, 'failed', 'password_hash is required to create a user'))
+            else:
+                creates.append({key: row[key] for key in CREATE_FIELDS if key in row})
+                results.append(_result(index, username, 'created'))
+
+        try:
+            if updates:
+                db.session.execute(update(User), updates)
+            if creates:
+                db.session.execute(insert(User), creates)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Bulk user update chunk failed: {str(e)}")
+            return [_result(r['index'], r['username'], 'failed', str(e)) if r['status'] in ('created', 'updated')
+                    else r for r in results]
+
+        for row in updates:
+            principal_cache.invalidate(row['id'])
+        return results
@@ -0,0 +1,148 @@
+"""
+Cached principal for the Flask-Login user loader.
+
+Flask-Login calls the user loader on every authenticated request, including
+the small AJAX calls the dashboard makes for notes, visibility toggles and
+district links. Instead of loading the full User row each time, the loader
+returns a CachedPrincipal built from a short-TTL, per-process cache of the
+few fields needed for authentication and permission checks. The full User
+is only loaded from the database when a route touches an attribute that is
+not cached.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from models import db
+from models.user import User, SecurityLevel
+
+# Fields kept in the cache. Everything else is read from the hydrated User.
+PRINCIPAL_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'security_level')
+
+DEFAULT_TTL = 60  # seconds
+
+
+class PrincipalCache:
+    """Thread-safe TTL cache of principal fields keyed by user id"""
+
+    def __init__(self):
+        self._entries: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, fields = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                self.misses += 1
+                return None
+            self.hits += 1
+            return fields
+
+    def put(self, user_id: int, fields: dict, ttl: float) -> None:
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, fields)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+principal_cache = PrincipalCache()
+
+
+class CachedPrincipal(UserMixin):
+    """
+    Lightweight stand-in for User used as Flask-Login's current_user.
+
+    Cached fields and permission helpers are answered without touching the
+    database. Any other attribute hydrates the full User on first access
+    (once per request) and is read from it.
+    """
+
+    def __init__(self, fields: dict):
+        self._fields = fields
+        self._user = None
+
+    def __getattr__(self, name):
+        # Only called when normal attribute lookup fails
+        if name.startswith('_'):
+            raise AttributeError(name)
+        fields = self.__dict__['_fields']
+        if name in fields:
+            return fields[name]
+        return getattr(self.hydrate(), name)
+
+    def get_id(self):
+        return str(self._fields['id'])
+
+    def hydrate(self) -> Optional[User]:
+        """Load the full User for this principal, once per request"""
+        if self._user is None:
+            self._user = db.session.get(User, self._fields['id'])
+        return self._user
+
+    @property
+    def is_admin(self):
+        return self._fields['security_level'] == SecurityLevel.ADMIN
+
+    def has_permission_level(self, required_level):
+        return self._fields['security_level'] >= required_level
+
+    def can_manage_user(self, other_user):
+        return self._fields['security_level'] > other_user.security_level
+
+    def __repr__(self):
+        return f"<CachedPrincipal(id={self._fields['id']}, username='{self._fields['username']}')>"
+
+
+def principal_fields(user: User) -> dict:
+    """Extract the cached principal fields from a User"""
+    return {name: getattr(user, name) for name in PRINCIPAL_FIELDS}
+
+
+def load_principal(user_id):
+    """
+    User loader backed by the principal cache.
+
+    Returns a CachedPrincipal, or the plain User when USER_CACHE_TTL is 0.
+    """
+    user_id = int(user_id)
+    ttl = current_app.config.get('USER_CACHE_TTL', DEFAULT_TTL)
+    if not ttl:
+        return db.session.get(User, user_id)
+
+    fields = principal_cache.get(user_id)
+    if fields is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        fields = principal_fields(user)
+        principal_cache.put(user_id, fields, ttl)
+    return CachedPrincipal(fields)
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_flushed_users(session, flush_context):
+    """Drop cached principals for users changed or deleted in this process"""
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            principal_cache.invalidate(obj.id)
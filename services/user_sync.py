@@ -0,0 +1,206 @@
+"""
+Bulk reconciliation of users pulled from Polaris.
+
+The reconciler loads every local user that could match the incoming batch
+(by email or username) in a few chunked IN queries, resolves each incoming
+record against in-memory email and username maps, and writes creates and
+updates back as bulk statements. The matching rules are the ones /sync_users
+has always applied:
+
+- A user found by email is updated. Its username is only changed when the
+  incoming username does not already belong to a different user.
+- A user not found by email whose username is taken is skipped.
+- Anyone else is created.
+"""
+
+import logging
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Sequence
+
+from sqlalchemy import insert, select, update
+
+from models import db
+from models.user import User
+from services.user_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 5000
+REQUIRED_FIELDS = ('username', 'email', 'password_hash')
+# Columns the sync may change on an existing user
+SYNC_FIELDS = ('username', 'first_name', 'last_name', 'security_level', 'password_hash')
+
+
+def chunked(items: Sequence, size: int) -> Iterator[Sequence]:
+    """Yield successive slices of at most size items"""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class UserReconciler:
+    """Reconcile a batch of external users against the users table"""
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, log: logging.Logger = None):
+        self.chunk_size = chunk_size
+        self.log = log or logger
+        self.stats = {'created': 0, 'updated': 0, 'skipped': 0}
+        # Both maps point at the same row dicts so in-batch changes stay consistent
+        self._by_email: Dict[str, dict] = {}
+        self._by_username: Dict[str, dict] = {}
+        self._updates: Dict[int, dict] = {}
+        self._creates: List[dict] = []
+
+    def reconcile(self, external_users: Iterable[dict]) -> dict:
+        """
+        Apply a batch of external users. The caller commits.
+
+        Args:
+            external_users: Dictionaries with at least username, email and password_hash
+
+        Returns:
+            dict: Counts of created, updated and skipped users
+        """
+        valid = []
+        for user_data in external_users:
+            if not all(key in user_data for key in REQUIRED_FIELDS):
+                self.log.warning(f"Skipping user {user_data.get('username', 'unknown')}: Missing required fields")
+                self.stats['skipped'] += 1
+                continue
+            valid.append(user_data)
+
+        self._prefetch(valid)
+
+        for user_data in valid:
+            try:
+                self._resolve(user_data)
+            except Exception as user_error:
+                self.log.error(f"Error processing user {user_data.get('username', 'unknown')}: {str(user_error)}")
+                self.stats['skipped'] += 1
+
+        self._flush()
+        return self.stats
+
+    def _prefetch(self, users: List[dict]) -> None:
+        """Load every local user matching an incoming email or username"""
+        columns = [User.id, User.email] + [getattr(User, name) for name in SYNC_FIELDS]
+        rows_by_id = {}
+        lookups = (
+            (User.email, sorted({u['email'] for u in users})),
+            (User.username, sorted({u['username'] for u in users})),
+        )
+        for column, values in lookups:
+            for chunk in chunked(values, self.chunk_size):
+                for row in db.session.execute(select(*columns).where(column.in_(chunk))).mappings():
+                    rows_by_id.setdefault(row['id'], dict(row))
+
+        for row in rows_by_id.values():
+            self._by_email[row['email']] = row
+            self._by_username[row['username']] = row
+
+    def _resolve(self, user_data: dict) -> None:
+        incoming_username = user_data['username']
+        incoming_email = user_data['email']
+        user_by_email = self._by_email.get(incoming_email)
+        user_by_username = self._by_username.get(incoming_username)
+
+        if user_by_email is not None:
+            update_username = True
+            if user_by_username is not None and user_by_username is not user_by_email:
+                self.log.warning(
+                    f"Updating user {user_by_email['username']} (ID: {user_by_email['id']}, Email: {incoming_email}). "
+                    f"Incoming username '{incoming_username}' conflicts with existing user ID {user_by_username['id']}. "
+                    f"Username will NOT be updated."
+                )
+                update_username = False
+
+            values = {
+                'first_name': user_data.get('first_name'),
+                'last_name': user_data.get('last_name'),
+                'security_level': user_data.get('security_level', 0),
+                'password_hash': user_data['password_hash'],
+            }
+            if update_username:
+                values['username'] = incoming_username
+            self._apply(user_by_email, values)
+
+            if update_username:
+                self.stats['updated'] += 1
+                self.log.debug(f"Updated user: {incoming_username} (found by email: {incoming_email})")
+            else:
+                self.stats['skipped'] += 1
+                self.log.info(f"Partially updated user (due to username conflict): {user_by_email['username']} "
+                              f"(found by email: {incoming_email})")
+
+        elif user_by_username is not None:
+            self.log.warning(
+                f"Skipping user creation for email {incoming_email}: "
+                f"Username '{incoming_username}' already exists for user ID {user_by_username['id']} "
+                f"with email {user_by_username['email']}."
+            )
+            self.stats['skipped'] += 1
+
+        else:
+            row = {
+                'id': None,
+                'username': incoming_username,
+                'email': incoming_email,
+                'password_hash': user_data['password_hash'],
+                'first_name': user_data.get('first_name'),
+                'last_name': user_data.get('last_name'),
+                'security_level': user_data.get('security_level', 0),
+            }
+            self._creates.append(row)
+            self._by_email[incoming_email] = row
+            self._by_username[incoming_username] = row
+            self.stats['created'] += 1
+            self.log.debug(f"Created new user: {incoming_username}")
+
+    def _apply(self, row: dict, values: dict) -> None:
+        """Record changed values on a known or pending row"""
+        changes = {key: value for key, value in values.items() if row.get(key) != value}
+        if not changes:
+            return
+        if 'username' in changes:
+            if self._by_username.get(row['username']) is row:
+                del self._by_username[row['username']]
+            self._by_username[changes['username']] = row
+        row.update(changes)
+        if row['id'] is not None:
+            self._updates.setdefault(row['id'], {}).update(changes)
+
+    def _flush(self) -> None:
+        """Write pending updates and creates as chunked bulk statements"""
+        if self._updates:
+            payload = [{'id': user_id, **changes} for user_id, changes in self._updates.items()]
+            for chunk in chunked(payload, self.chunk_size):
+                db.session.execute(update(User), list(chunk))
+            for user_id in self._updates:
+                principal_cache.invalidate(user_id)
+
+        if self._creates:
+            payload = [{key: value for key, value in row.items() if key != 'id'} for row in self._creates]
+            for chunk in chunked(payload, self.chunk_size):
+                db.session.execute(insert(User), list(chunk))
+
+
+def reconcile_users(users: Iterable[dict], batch_size: int = DEFAULT_BATCH_SIZE,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE, log: logging.Logger = None) -> dict:
+    """
+    Reconcile a (possibly streamed) sequence of users in fixed-size batches.
+
+    Each batch is reconciled and flushed before the next is read, so memory
+    is bounded by batch_size. Later batches see earlier ones through the
+    database, which keeps the matching rules identical to a single batch.
+    The caller commits.
+    """
+    totals = {'created': 0, 'updated': 0, 'skipped': 0}
+    users = iter(users)
+    while True:
+        batch = list(islice(users, batch_size))
+        if not batch:
+            break
+        stats = UserReconciler(chunk_size=chunk_size, log=log).reconcile(batch)
+        for key, value in stats.items():
+            totals[key] += value
+    return totals
@@ -0,0 +1,82 @@
+"""
+Pre-fork warm-up for gunicorn's preload_app mode.
+
+warm_up() runs in the master once the app is loaded: it compiles every
+Jinja template, builds the URL matcher and builds every feed_cache snapshot
+(event feeds, school directory), then closes the master's database
+connections and freezes the garbage collector. Forked workers inherit all
+of it, so their first requests skip that work, and since the frozen objects
+are never traversed by the collector again their pages stay shared
+copy-on-write instead of being dirtied in every worker.
+
+reset_after_fork() runs in each worker (gunicorn post_fork) and drops
+connections and sessions that must not be shared with the master. It also
+folds a metrics snapshot left under the worker's pid by an exited process,
+since create_app() (and init_metrics) only ran in the master.
+"""
+
+import gc
+import logging
+import sys
+import time
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates(app) -> int:
+    """Load every template into the Jinja cache; returns how many"""
+    names = [name for name in app.jinja_env.list_templates() if name.endswith('.html')]
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def warm_up(app, freeze: bool = True) -> Dict[str, float]:
+    """Prime per-process state before fork; returns timings in milliseconds"""
+    from models import db
+    from services.feed_cache import snapshot_cache
+    import services.school_directory  # noqa: F401 - registers its snapshot
+
+    timings = {}
+    started = time.perf_counter()
+    count = compile_templates(app)
+    timings['templates'] = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    app.url_map.update()
+    timings['url_map'] = (time.perf_counter() - started) * 1000
+
+    with app.app_context():
+        try:
+            for name, elapsed in snapshot_cache.warm().items():
+                timings[f'snapshot:{name}'] = elapsed
+        finally:
+            db.session.remove()
+            # Workers must open their own connections
+            for engine in db.engines.values():
+                engine.dispose()
+
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+    logger.info('Warm-up compiled %d templates and built %d snapshots in %.1f ms',
+                count, len(snapshot_cache.names), sum(timings.values()))
+    return timings
+
+
+def reset_after_fork(app) -> None:
+    """Drop state inherited from the master that is unsafe to share"""
+    from models import db
+    from services.metrics import default_registry
+
+    default_registry.fold_dead(include_own=True)
+
+    with app.app_context():
+        for engine in db.engines.values():
+            # close=False: the connections belong to the master; just forget them
+            engine.dispose(close=False)
+    # Only if a sync imported it before fork; importing it here would defeat lazy loading
+    if 'services.http_client' in sys.modules:
+        sys.modules['services.http_client'].reset_http_session()
@@ -0,0 +1,38 @@
+// Live updates from /events/stream (Server-Sent Events).
+//
+// subscribeLiveUpdates(handlers) opens the stream and calls
+// handlers.event_updated / event_removed / sync_completed with the parsed
+// message. EventSource reconnects by itself and resends Last-Event-ID, so
+// messages sent while disconnected are replayed.
+function subscribeLiveUpdates(handlers) {
+    if (!window.EventSource) {
+        return null;
+    }
+    const source = new EventSource('/events/stream');
+    ['event_updated', 'event_removed', 'sync_completed'].forEach(kind => {
+        if (handlers[kind]) {
+            source.addEventListener(kind, message => handlers[kind](JSON.parse(message.data)));
+        }
+    });
+    return source;
+}
+
+// Patch a list of events with one change and return the new list.
+// belongs(event) says whether the event should be on this page at all.
+function applyEventChange(events, change, belongs) {
+    const id = change.event ? change.event.id : change.id;
+    const others = events.filter(event => event.id !== id);
+    if (!change.event || !belongs(change.event)) {
+        return others;
+    }
+    const index = events.findIndex(event => event.id === id);
+    if (index === -1) {
+        // Newly visible: keep the feed's order, by start time (UTC ISO strings sort as text),
+        // undated events last
+        const key = event => event.starts_at || '\uffff';
+        return others.concat([change.event]).sort((a, b) => key(a).localeCompare(key(b)) || a.id - b.id);
+    }
+    const patched = events.slice();
+    patched[index] = change.event;
+    return patched;
+}
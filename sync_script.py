@@ -3,43 +3,47 @@ import sys
 from dotenv import load_dotenv
 
 # Add the project root directory to the Python path
-# Adjust this path based on your project structure
 project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
 # Load environment variables from .env file
-# Make sure to create a .env file with your actual credentials
-
-# Also try to load from .env file as fallback
 load_dotenv(os.path.join(project_root, '.env'))
 
-# Environment variables are now set and ready
+# Kept for existing cron entries. It runs one Salesforce sync through the
+# scheduler, so the run takes the job lease (no overlap with a running
+# scheduler) and is recorded in the job history. Prefer the long-running
+# scheduler: `flask --app app scheduler run`.
 
 try:
-    # Import the Flask app instance and the sync function
-    # Adjust the import path based on your project structure
-    # Assuming your Flask app is created in 'app.py' or '__init__.py'
-    from app import app # Or from your_package import app
-    from routes.upcoming_events import sync_upcoming_events
+    from app import app
+    from services.scheduler import Scheduler, default_jobs
 
     print("Starting scheduled sync...")
 
-    # Create an application context to access db, config, etc.
-    with app.app_context():
-        result = sync_upcoming_events()
-
-        if result.get('success'):
-            print("Sync completed successfully.")
-            print(f"  New: {result.get('new_count', 0)}")
-            print(f"  Updated: {result.get('updated_count', 0)}")
-            print(f"  Deleted: {result.get('deleted_count', 0)}")
-            print(f"  Archived: {result.get('archived_count', 0)}")
-        else:
-            print(f"Sync failed: {result.get('error', 'Unknown error')}")
+    jobs = {job.name: job for job in default_jobs(app.config)}
+    if 'salesforce_sessions' not in jobs:
+        print("Sync failed: the Salesforce job is disabled or SF_USERNAME is not configured")
+        sys.exit(1)
+
+    run = Scheduler(app, [jobs['salesforce_sessions']]).run_job('salesforce_sessions')
+
+    if run is None:
+        print("Sync skipped: a Salesforce sync is already running.")
+    elif run['status'] == 'success':
+        result = run['result']
+        print("Sync completed successfully.")
+        print(f"  New: {result.get('new_count', 0)}")
+        print(f"  Updated: {result.get('updated_count', 0)}")
+        print(f"  Deleted: {result.get('deleted_count', 0)}")
+        print(f"  Archived: {result.get('archived_count', 0)}")
+    else:
+        print(f"Sync failed: {run['error'] or 'Unknown error'}")
+        sys.exit(1)
 
 except ImportError as e:
     print(f"Error importing application components: {e}")
-    print("Please ensure the script is run from the correct directory and")
-    print("that the import paths for 'app' and 'sync_upcoming_events' are correct.")
+    print("Please ensure the script is run from the correct directory.")
+    sys.exit(1)
 except Exception as e:
     print(f"An unexpected error occurred during sync: {e}")
+    sys.exit(1)
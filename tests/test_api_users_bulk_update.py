@@ -0,0 +1,80 @@
+import time
+import pytest
+from models import User, db
+
+
+@pytest.fixture
+def admin_token(app):
+    admin = User(username='bulkadmin', email='bulkadmin@example.com', password_hash='x', is_admin=True)
+    db.session.add_all([
+        admin,
+        User(username='existing', email='existing@example.com', password_hash='x', first_name='Old'),
+        User(username='other', email='other@example.com', password_hash='x'),
+    ])
+    db.session.commit()
+    return admin.generate_api_token()
+
+
+def _post(client, token, users, **options):
+    return client.post('/api/v1/users/update', headers={'X-API-Token': token},
+                       json={'users': users, 'mode': 'bulk', **options})
+
+
+def test_bulk_update_reports_per_row_results(client, admin_token):
+    response = _post(client, admin_token, [
+        {'username': 'existing', 'email': 'existing@example.com', 'first_name': 'New'},
+        {'username': 'other', 'email': 'other@example.com'},
+        {'username': 'fresh', 'email': 'fresh@example.com', 'password_hash': 'h'},
+        {'username': 'thief', 'email': 'other@example.com', 'password_hash': 'h'},
+        {'username': 'nopass', 'email': 'nopass@example.com'},
+        {'username': 'fresh', 'email': 'fresh2@example.com', 'password_hash': 'h'},
+        {'email': 'anonymous@example.com'},
+    ], chunk_size=2)
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert [r['status'] for r in body['results']] == [
+        'updated', 'unchanged', 'created', 'failed', 'failed', 'failed', 'failed']
+    assert (body['created'], body['updated'], body['unchanged'], body['failed']) == (1, 1, 1, 4)
+    db.session.expire_all()
+    assert User.query.filter_by(username='existing').one().first_name == 'New'
+    assert User.query.filter_by(username='fresh').one().email == 'fresh@example.com'
+
+
+def test_bulk_update_rejects_invalid_chunk_size(client, admin_token):
+    assert _post(client, admin_token, [], chunk_size=0).status_code == 400
+
+
+def test_bulk_update_handles_large_push(client, admin_token):
+    users = [{'username': f'bulk{i}', 'email': f'bulk{i}@example.com', 'password_hash': 'h'}
+             for i in range(20000)]
+
+    started = time.perf_counter()
+    body = _post(client, admin_token, users, chunk_size=5000).get_json()
+    assert body['created'] == 20000
+
+    for user in users[::2]:
+        user['first_name'] = 'Updated'
+    body = _post(client, admin_token, users, chunk_size=5000).get_json()
+    elapsed = time.perf_counter() - started
+
+    assert (body['updated'], body['unchanged']) == (10000, 10000)
+    assert elapsed < 30
+
+
+def test_bulk_update_applies_is_admin_like_the_per_row_path(client, admin_token):
+    response = _post(client, admin_token, [
+        {'username': 'existing', 'email': 'existing@example.com', 'is_admin': True},
+        {'username': 'newadmin', 'email': 'newadmin@example.com', 'password_hash': 'h', 'is_admin': True},
+        {'username': 'other', 'email': 'other@example.com', 'is_admin': True, 'security_level': 1},
+    ])
+    assert [r['status'] for r in response.get_json()['results']] == ['updated', 'created', 'updated']
+    db.session.expire_all()
+    assert User.query.filter_by(username='existing').one().is_admin
+    assert User.query.filter_by(username='newadmin').one().is_admin
+    # An explicit security_level wins, as in User()
+    assert User.query.filter_by(username='other').one().security_level == 1
+
+    _post(client, admin_token, [{'username': 'existing', 'email': 'existing@example.com', 'is_admin': False}])
+    db.session.expire_all()
+    assert not User.query.filter_by(username='existing').one().is_admin
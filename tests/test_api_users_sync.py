@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from models import User, db
+
+
+@pytest.fixture
+def admin_token(app):
+    admin = User(username='syncadmin', email='syncadmin@example.com', password_hash='x', is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    return admin.generate_api_token()
+
+
+@pytest.fixture
+def synced_users(app, admin_token):
+    base = datetime(2025, 1, 1)
+    users = []
+    for i in range(5):
+        users.append(User(username=f'member{i}', email=f'member{i}@example.com', password_hash='x',
+                          updated_at=base + timedelta(days=i)))
+    db.session.add_all(users)
+    db.session.commit()
+    return users
+
+
+def test_full_json_export_unchanged(client, admin_token, synced_users):
+    response = client.get('/api/v1/users/sync', headers={'X-API-Token': admin_token})
+    assert response.status_code == 200
+    assert len(response.get_json()['users']) == 6
+
+
+def test_ndjson_stream_filters_by_watermark(client, admin_token, synced_users):
+    response = client.get('/api/v1/users/sync?format=ndjson&updated_since=2025-01-03T00:00:00Z&limit=2',
+                          headers={'X-API-Token': admin_token})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    users, trailer = lines[:-1], lines[-1]['_sync']
+
+    # member2..member4 plus the admin created "now", in (updated_at, id) order
+    assert [u['username'] for u in users] == ['member2', 'member3', 'member4', 'syncadmin']
+    assert trailer['count'] == 4
+    assert trailer['watermark'] == users[-1]['updated_at']
+
+
+def test_paged_json_follows_keyset_cursor(client, admin_token, synced_users):
+    seen = []
+    url = '/api/v1/users/sync?limit=2'
+    while url:
+        body = client.get(url, headers={'X-API-Token': admin_token}).get_json()
+        seen.extend(u['username'] for u in body['users'])
+        url = f"/api/v1/users/sync?limit=2&after={body['next_cursor']}" if body['next_cursor'] else None
+    assert seen == ['member0', 'member1', 'member2', 'member3', 'member4', 'syncadmin']
+
+
+def test_invalid_watermark_rejected(client, admin_token):
+    response = client.get('/api/v1/users/sync?updated_since=yesterday', headers={'X-API-Token': admin_token})
+    assert response.status_code == 400
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from models import db
+from models.event_district_mapping import EventDistrictMapping
+from models.upcoming_event import UpcomingEvent
+from services import ical
+from services.event_times import parse_event_times
+
+
+def _add_event(salesforce_id, name, event_type, date_and_time, districts=()):
+    event = UpcomingEvent(salesforce_id=salesforce_id, name=name, available_slots=3, filled_volunteer_jobs=0,
+                          event_type=event_type, date_and_time=date_and_time, display_on_website=True,
+                          start_date=datetime.now(timezone.utc) + timedelta(days=10), status='active')
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([EventDistrictMapping(event_id=event.id, district=district) for district in districts])
+    db.session.commit()
+    return event
+
+
+def test_parse_event_times():
+    times = parse_event_times('12/15/2099 9:00 AM to 11:00 AM')
+    assert (times.starts_at.isoformat(), times.ends_at.isoformat(), times.all_day) == \
+        ('2099-12-15T15:00:00+00:00', '2099-12-15T17:00:00+00:00', False)
+    # Summer time in Kansas City, and one AM/PM for both times
+    assert parse_event_times('07/01/2099 11:00 to 1:00 PM').starts_at.hour == 16
+    # Virtual sheet times have no end
+    assert parse_event_times('9/3/2099 14:00').ends_at.hour == 20
+    all_day = parse_event_times('TBD', datetime(2099, 5, 1))
+    assert all_day.all_day and all_day.local_dates()[0].isoformat() == '2099-05-01'
+    assert parse_event_times('TBD') is None
+
+
+def test_district_and_type_calendars(app, client):
+    _add_event('CAL000000001', 'Career Day, Science; Lab', 'In Person', '12/15/2099 9:00 AM to 11:00 AM',
+               districts=['Hickman Mills'])
+    _add_event('CAL000000002', 'Classroom Speaker', 'DIA - Classroom Speaker', '12/16/2099 1:00 PM to 2:00 PM')
+
+    district = client.get('/events/calendar/districts/Hickman Mills.ics')
+    assert district.mimetype == 'text/calendar'
+    body = district.get_data(as_text=True)
+    assert body.count('BEGIN:VEVENT') == 1
+    assert 'SUMMARY:Career Day\\, Science\\; Lab\r\n' in body
+    assert 'DTSTART:20991215T150000Z\r\n' in body and 'DTEND:20991215T170000Z\r\n' in body
+    assert 'UID:CAL000000001@voluntold' in body
+
+    by_type = client.get('/events/calendar/types/dia - classroom speaker.ics').get_data(as_text=True)
+    assert by_type.count('BEGIN:VEVENT') == 1 and 'Classroom Speaker' in by_type
+    assert client.get('/events/calendar/events.ics').get_data(as_text=True).count('BEGIN:VEVENT') == 2
+    assert all(len(line.encode()) <= 75 for line in body.split('\r\n'))
+
+
+def test_calendar_is_rendered_once_and_revalidated(app, client):
+    _add_event('CAL000000003', 'Mentoring', 'In Person', '12/15/2099 9:00 AM to 11:00 AM')
+
+    with mock.patch.object(ical, 'render_calendar', wraps=ical.render_calendar) as render:
+        first = client.get('/events/calendar/events.ics')
+        etag = first.headers['ETag']
+        assert etag.startswith('W/')
+        again = client.get('/events/calendar/events.ics', headers={'If-None-Match': etag, 'Accept-Encoding': 'gzip'})
+        assert again.status_code == 304
+        assert render.call_count == 1
+
+        # A change invalidates the snapshot, and with it the calendar and its ETag
+        _add_event('CAL000000004', 'Mock Interviews', 'In Person', '12/17/2099 9:00 AM to 10:00 AM')
+        changed = client.get('/events/calendar/events.ics', headers={'If-None-Match': etag})
+        assert changed.status_code == 200 and changed.headers['ETag'] != etag
+        assert render.call_count == 2
+
+
+def test_all_day_event_uses_its_local_date(app, client):
+    event = _add_event('CAL000000005', 'Site Visit', 'In Person', 'Date TBD')
+    day = event.start_date.date()
+    body = client.get('/events/calendar/events.ics').get_data(as_text=True)
+    assert f'DTSTART;VALUE=DATE:{day:%Y%m%d}\r\n' in body
+    assert f'DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}\r\n' in body
@@ -0,0 +1,70 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+import brotli
+from models import db
+from models.upcoming_event import UpcomingEvent
+from services import compression
+from services.feed_cache import snapshot_cache
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+def _add_events(count):
+    db.session.add_all([
+        UpcomingEvent(salesforce_id=f'ZIP{i:09d}', name=f'Career Fair {i}', available_slots=4,
+                      filled_volunteer_jobs=1, event_type='In Person', display_on_website=True,
+                      date_and_time='10/01/2099 9:00 AM to 11:00 AM', status='active', source='salesforce',
+                      start_date=datetime.now(timezone.utc) + timedelta(days=i + 1))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def test_snapshot_feed_is_compressed_once(app, client):
+    _add_events(20)
+    with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+        plain = client.get('/events/volunteer_signup_api').data
+        # Both codings are built with the snapshot, so no request pays for compressing it
+        assert sorted(call.args[1] for call in compress.call_args_list) == ['br', 'gzip']
+        first = client.get('/events/volunteer_signup_api', headers=GZIP)
+        second = client.get('/events/volunteer_signup_api', headers=GZIP)
+    assert compress.call_count == 2
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in first.headers['Vary']
+    assert first.data == second.data
+    assert gzip.decompress(first.data) == plain
+    assert len(first.data) * 5 < len(plain)
+    assert snapshot_cache.get('volunteer_signup').encoded['gzip'] == first.data
+
+
+def test_brotli_preferred_when_accepted(app, client):
+    _add_events(20)
+    plain = client.get('/events/volunteer_signup_api').data
+    encoded = snapshot_cache.get('volunteer_signup').encoded
+
+    with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+        response = client.get('/events/volunteer_signup_api', headers={'Accept-Encoding': 'gzip, br'})
+    assert compress.call_count == 0
+    assert response.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(response.data) == plain
+    assert response.data == encoded['br'] and len(response.data) < len(encoded['gzip'])
+
+
+def test_small_and_unaccepted_responses_are_left_alone(app, client, monkeypatch):
+    _add_events(1)
+    # One event is under COMPRESS_MIN_SIZE
+    small = client.get('/events/volunteer_signup_api', headers=GZIP)
+    assert 'Content-Encoding' not in small.headers
+
+    monkeypatch.setitem(app.config, 'COMPRESS_MIN_SIZE', 10)
+    identity = client.get('/events/volunteer_signup_api', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in identity.headers
+    assert 'Accept-Encoding' in identity.headers['Vary']
+    # Rendered pages are compressed per request
+    page = client.get('/events/volunteer_signup', headers=GZIP)
+    assert page.headers['Content-Encoding'] == 'gzip'
+    assert b'Career Fair 0' in gzip.decompress(page.data)
+    # Other content types pass through
+    metrics = client.get('/metrics', headers=GZIP)
+    assert metrics.mimetype == 'text/plain' and 'Content-Encoding' not in metrics.headers
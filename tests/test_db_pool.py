@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+from services.db_pool import (POOL_CHECKED_OUT, POOL_TIMEOUTS_TOTAL, POOL_WAIT_SECONDS, TimedQueuePool,
+                              engine_options)
+
+
+def test_engine_options():
+    options = engine_options('postgresql://db/voluntold', pool_size=3, statement_timeout_ms=5000)
+    assert options['poolclass'] is TimedQueuePool and options['pool_size'] == 3 and options['pool_pre_ping']
+    assert options['connect_args'] == {'options': '-c statement_timeout=5000'}
+    assert 'connect_args' not in engine_options('sqlite:///file.db', statement_timeout_ms=5000)
+    assert engine_options('sqlite://') == {'pool_pre_ping': True}
+
+
+def test_saturated_pool_reports_wait_and_timeouts(app, client, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path}/pool.db',
+                           **engine_options('sqlite:///pool.db', pool_size=1, max_overflow=0, pool_timeout=0.1))
+    engine.pool.metrics_bind = 'stress'
+    before = POOL_TIMEOUTS_TOTAL.value(bind='stress')
+
+    with engine.connect() as held:
+        held.execute(text('SELECT 1'))
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    assert POOL_TIMEOUTS_TOTAL.value(bind='stress') == before + 1
+    assert POOL_WAIT_SECONDS.count(bind='stress') >= 2
+
+    engine.dispose()
+    assert engine.pool.metrics_bind == 'stress'
+
+    # The app's own engine is pooled and exported
+    with app.extensions['sqlalchemy'].engine.connect():
+        body = client.get('/metrics').get_data(as_text=True)
+    assert 'voluntold_db_pool_checked_out{bind="default"}' in body
+    assert POOL_CHECKED_OUT.value(bind='default') >= 1
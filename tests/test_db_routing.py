@@ -0,0 +1,97 @@
+import time
+import pytest
+from sqlalchemy import text
+from app import create_app
+from config import TestingConfig
+from models import User, db
+from models.upcoming_event import UpcomingEvent
+from services import db_routing
+from services.feed_cache import snapshot_cache
+from services.slow_query_log import init_slow_query_log
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    config = type('ReplicaConfig', (TestingConfig,), {
+        'SQLALCHEMY_BINDS': {'replica': f'sqlite:///{tmp_path}/replica.db'},
+    })
+    app = create_app(config)
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines['replica'])  # the "replica" never receives our rows
+        snapshot_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        snapshot_cache.clear()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def test_public_reads_use_replica_until_a_write(replica_app, monkeypatch):
+    user = User(username='admin', email='admin@example.com', password_hash='x')
+    db.session.add_all([user, UpcomingEvent(salesforce_id='REPLICA00001', name='Virtual Chat', source='virtual',
+                                            status='active', display_on_website=True)])
+    db.session.commit()
+    user_id = user.id
+    db.session.remove()
+    client = replica_app.test_client()
+
+    # Written to the primary only, so a replica read cannot see it
+    monkeypatch.setattr(db_routing, '_last_write', 0.0)
+    assert client.get('/api/virtual-events').get_json() == []
+
+    # ...unless this worker wrote just now
+    db_routing._mark_write()
+    assert len(client.get('/api/virtual-events').get_json()) == 1
+
+    # An admin's mutation keeps that browser on the primary, while others stay on the replica
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    response = client.post('/events/toggle-event-visibility', json={'event_id': 'REPLICA00001', 'visible': False})
+    assert response.status_code == 200
+    monkeypatch.setattr(db_routing, '_last_write', 0.0)
+    assert len(client.get('/api/virtual-events').get_json()) == 1
+    assert replica_app.test_client().get('/api/virtual-events').get_json() == []
+    assert db.session.get(UpcomingEvent, 1).display_on_website is False  # the write went to the primary
+
+
+def test_sticky_request_rebuilds_a_snapshot_read_from_the_replica(replica_app, monkeypatch):
+    db.session.add(UpcomingEvent(salesforce_id='REPLICA00002', name='Career Fair', source='salesforce',
+                                 status='active', display_on_website=True,
+                                 date_and_time='12/15/2099 9:00 AM to 11:00 AM'))
+    db.session.commit()
+    db.session.remove()
+    monkeypatch.setattr(db_routing, '_last_write', 0.0)
+
+    # Anonymous reads build the shared snapshots from the replica
+    anonymous = replica_app.test_client()
+    assert anonymous.get('/events/volunteer_signup_api').get_json() == []
+    assert 'BEGIN:VEVENT' not in anonymous.get('/events/calendar/events.ics').get_data(as_text=True)
+    assert snapshot_cache.get('volunteer_signup').from_replica
+
+    # The browser that wrote is sticky: it must not be served that snapshot
+    client = replica_app.test_client()
+    with client.session_transaction() as session:
+        session[db_routing.STICKY_SESSION_KEY] = time.time() + 10
+    assert [event['name'] for event in client.get('/events/volunteer_signup_api').get_json()] == ['Career Fair']
+    assert 'SUMMARY:Career Fair' in client.get('/events/calendar/events.ics').get_data(as_text=True)
+
+    # The rebuild came from the primary, so it is kept and now serves everyone
+    rebuilt = snapshot_cache.get('volunteer_signup')
+    assert not rebuilt.from_replica
+    assert len(anonymous.get('/events/volunteer_signup_api').get_json()) == 1
+    assert snapshot_cache.get('volunteer_signup') is rebuilt
+
+
+def test_slow_query_log_covers_the_replica(replica_app, monkeypatch):
+    monkeypatch.setitem(replica_app.config, 'SLOW_QUERY_THRESHOLD_MS', 0)
+    monkeypatch.setitem(replica_app.config, 'SLOW_QUERY_EXPLAIN', False)
+    slow_query_log = init_slow_query_log(replica_app)
+    try:
+        with db.engines['replica'].connect() as conn:
+            conn.execute(text('SELECT COUNT(*) FROM upcoming_events')).scalar()
+        entry = next(e for e in slow_query_log.latest() if 'FROM upcoming_events' in e['sql'])
+        assert entry['database'] == 'replica'
+    finally:
+        slow_query_log.uninstall()
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models import db
+from models.upcoming_event import UpcomingEvent
+from routes.dia import upcoming_dia_events
+from services.event_categories import classify
+from tests.test_fake_upstreams import _salesforce_record
+
+
+def test_classify():
+    assert classify('DIA - Classroom Speaker') == 'dia'
+    assert classify('Social Media Day') == 'in_person'  # '%DIA%' used to match this
+    assert classify('Industry Chat', 'virtual') == 'virtual'
+    assert classify('Career Fair', rules=[[r'career fair', 'career_fair']]) == 'career_fair'
+
+
+def test_dia_feed_uses_category_and_partial_index(app):
+    start_date = f'{datetime.utcnow() + timedelta(days=10):%Y-%m-%d}'
+    dia = dict(_salesforce_record(1), Start_Date__c=start_date, Session_Type__c='DIA - Career Fair')
+    other = dict(_salesforce_record(2), Start_Date__c=start_date)
+    full = dict(_salesforce_record(3), Start_Date__c=start_date, Session_Type__c='DIA - Classroom Speaker',
+                Available_Slots__c=0)
+    UpcomingEvent.upsert_from_salesforce([dia, other, full])
+
+    assert {event.salesforce_id: event.category for event in UpcomingEvent.query} == \
+        {dia['Id']: 'dia', other['Id']: 'in_person', full['Id']: 'dia'}
+    assert [event['Id'] for event in upcoming_dia_events()] == [dia['Id']]
+
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM upcoming_events "
+        "WHERE category = 'dia' AND starts_at > :now AND available_slots > 0"), {'now': datetime.utcnow()}).all()
+    assert 'ix_upcoming_events_open_category_starts_at' in ' '.join(row[-1] for row in plan)
+
+    saved, app.config['EVENT_CATEGORY_RULES'] = app.config['EVENT_CATEGORY_RULES'], [[r'career jumping', 'dia']]
+    try:
+        UpcomingEvent.backfill_derived(only_missing=False)
+    finally:
+        app.config['EVENT_CATEGORY_RULES'] = saved
+    assert UpcomingEvent.query.filter_by(salesforce_id=other['Id']).one().category == 'dia'
@@ -0,0 +1,122 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy.exc import OperationalError
+from models import User, db
+from models.event_change import EventChange
+from routes.upcoming_events import sync_upcoming_events
+from services.fake_upstreams import FakeUpstreams, FakeUpstreamServer
+from tests.test_fake_upstreams import _salesforce_record
+
+
+@pytest.fixture
+def token(app):
+    user = User(username='mirror', email='mirror@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.generate_api_token()
+
+
+@pytest.fixture
+def salesforce(app):
+    fake = FakeUpstreams(salesforce_records=[_salesforce_record(i) for i in range(3)])
+    with FakeUpstreamServer(fake) as server:
+        saved = {key: app.config.get(key) for key in server.config_overrides()}
+        app.config.update(server.config_overrides())
+        yield fake
+        app.config.update(saved)
+
+
+def _log():
+    return [(change.op, change.salesforce_id) for change in EventChange.query.order_by(EventChange.id)]
+
+
+def test_sync_logs_only_real_changes(app, salesforce):
+    assert sync_upcoming_events()['success']
+    assert _log() == [('insert', f'a0S{i:015d}') for i in range(3)]
+
+    # Re-syncing identical sessions logs nothing
+    assert sync_upcoming_events()['success']
+    assert len(_log()) == 3
+
+    salesforce.salesforce_records[0]['Available_Slots__c'] = 2.0
+    del salesforce.salesforce_records[2]
+    assert sync_upcoming_events()['success']
+    assert _log()[3:] == [('delete', 'a0S000000000000002'), ('update', 'a0S000000000000000')]
+
+
+def test_changes_endpoint_pages_from_cursor(app, client, salesforce, token):
+    headers = {'X-API-Token': token}
+    assert client.get('/api/v1/events/changes', headers=headers).get_json()['next_cursor'] == 0
+    sync_upcoming_events()
+
+    first = client.get('/api/v1/events/changes?since=0&limit=2', headers=headers).get_json()
+    assert [change['op'] for change in first['changes']] == ['insert', 'insert']
+    assert first['has_more'] is True
+    assert first['changes'][0]['event']['Name'] == 'Fake Session 0'
+
+    rest = client.get(f"/api/v1/events/changes?since={first['next_cursor']}&limit=2", headers=headers).get_json()
+    assert [change['salesforce_id'] for change in rest['changes']] == ['a0S000000000000002']
+    assert rest['has_more'] is False
+    assert client.get('/api/v1/events/changes?since=0').status_code == 401
+    assert client.get('/api/v1/events/changes?since=abc', headers=headers).status_code == 400
+
+
+def test_compaction_keeps_latest_per_event_and_moves_horizon(app, client, token):
+    old = datetime.now(timezone.utc) - timedelta(days=40)
+    db.session.add_all([
+        EventChange(event_id=1, salesforce_id='A', op='insert', payload='{}', changed_at=old),
+        EventChange(event_id=1, salesforce_id='A', op='update', payload='{}', changed_at=old),
+        EventChange(event_id=2, salesforce_id='B', op='insert', payload='{}', changed_at=old),
+        EventChange(event_id=2, salesforce_id='B', op='delete', changed_at=old),
+        EventChange(event_id=3, salesforce_id='C', op='insert', payload='{}'),
+    ])
+    db.session.commit()
+
+    assert EventChange.compact(retention=30 * 86400) == {'superseded': 2, 'deletes': 1, 'horizon': 4}
+    assert [(change.id, change.op) for change in EventChange.query.order_by(EventChange.id)] == [(2, 'update'), (5, 'insert')]
+
+    headers = {'X-API-Token': token}
+    stale = client.get('/api/v1/events/changes?since=3', headers=headers)
+    assert stale.status_code == 410
+    assert stale.get_json()['next_cursor'] == 5
+    assert [change['cursor'] for change in client.get('/api/v1/events/changes?since=4', headers=headers)
+            .get_json()['changes']] == [5]
+
+
+def test_log_writers_commit_in_cursor_order(app):
+    # A long sync has taken a cursor id and not committed yet
+    first = EventChange(event_id=1, salesforce_id='A', op='delete')
+    db.session.add(first)
+    db.session.flush()
+    ids = {}
+
+    def second_writer():
+        with app.app_context():
+            deadline = time.monotonic() + 10
+            while True:
+                try:
+                    change = EventChange(event_id=2, salesforce_id='B', op='delete')
+                    db.session.add(change)
+                    db.session.commit()
+                    ids['second'] = change.id
+                    break
+                except OperationalError:
+                    # Shared-cache SQLite reports the lock at once instead of waiting
+                    db.session.rollback()
+                    if time.monotonic() > deadline:
+                        raise
+                    time.sleep(0.05)
+            db.session.remove()
+
+    writer = threading.Thread(target=second_writer)
+    writer.start()
+    time.sleep(0.3)
+    # The second writer cannot commit a higher id while the lower one is still open...
+    assert writer.is_alive() and 'second' not in ids
+    db.session.commit()
+    writer.join()
+    # ...so once a reader sees an id, every lower id is already visible
+    assert ids['second'] > first.id
+    assert [change.event_id for change in EventChange.query.order_by(EventChange.id)] == [1, 2]
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta, timezone
+from models import db
+from models.event_change import EventChange
+from models.event_district_mapping import EventDistrictMapping
+from models.event_history import EventHistory
+from models.upcoming_event import UpcomingEvent
+from routes.upcoming_events import sync_upcoming_events
+from tests.test_event_changes import salesforce, token  # noqa: F401
+
+
+def test_sync_moves_past_archived_and_removed_events(app, salesforce, monkeypatch):  # noqa: F811
+    monkeypatch.setitem(app.config, 'EVENT_HISTORY_BATCH_SIZE', 1)
+    assert sync_upcoming_events()['success']
+    now = datetime.now(timezone.utc)
+    past = UpcomingEvent(name='Last Week', source='virtual', start_date=now - timedelta(days=7))
+    archived = UpcomingEvent(name='Full Long Ago', source='virtual', status='archived',
+                             start_date=now + timedelta(days=30), updated_at=now - timedelta(days=40))
+    recent = UpcomingEvent(name='Full Yesterday', source='virtual', status='archived',
+                           start_date=now + timedelta(days=30))
+    db.session.add_all([past, archived, recent])
+    db.session.flush()
+    db.session.add(EventDistrictMapping(event_id=past.id, district='North School District'))
+    db.session.commit()
+    past_id = past.id
+    del salesforce.salesforce_records[2]
+
+    result = sync_upcoming_events()
+    assert result['success'] and result['deleted_count'] == 3
+
+    history = {entry.name: entry for entry in EventHistory.query}
+    assert {name: entry.reason for name, entry in history.items()} == {
+        'Last Week': 'past', 'Full Long Ago': 'archived', 'Fake Session 2': 'removed'}
+    assert history['Last Week'].to_dict()['districts'] == ['North School District']
+    assert history['Last Week'].to_dict()['id'] == past_id
+    assert history['Fake Session 2'].salesforce_id == 'a0S000000000000002'
+
+    # Only live events stay in the hot table, and mirrors see the moves as deletes
+    assert sorted(event.name for event in UpcomingEvent.query) == [
+        'Fake Session 0', 'Fake Session 1', 'Full Yesterday']
+    assert EventDistrictMapping.query.count() == 0
+    assert EventChange.query.filter_by(op='delete').count() == 3
+
+
+def test_history_api_filters_and_pages(app, client, token):  # noqa: F811
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.session.add_all([
+        UpcomingEvent(name=f'Session {i}', salesforce_id=f'a0S{i:015d}', source='salesforce',
+                      event_type='DIA - Classroom Speaker' if i % 2 else 'Career Fair',
+                      start_date=start + timedelta(days=i))
+        for i in range(5)
+    ])
+    db.session.commit()
+    assert UpcomingEvent.move_to_history(UpcomingEvent.query, 'past', batch_size=2) == 5
+
+    headers = {'X-API-Token': token}
+    first = client.get('/api/v1/events/history?limit=2', headers=headers).get_json()
+    assert [event['name'] for event in first['events']] == ['Session 4', 'Session 3']
+    assert first['has_more'] is True
+    rest = client.get(f"/api/v1/events/history?before={first['next_cursor']}", headers=headers).get_json()
+    assert [event['name'] for event in rest['events']] == ['Session 2', 'Session 1', 'Session 0']
+    assert rest['next_cursor'] is None
+
+    dia = client.get('/api/v1/events/history?category=dia&from=2024-01-02&to=2024-01-03',
+                     headers=headers).get_json()
+    assert [(event['name'], event['reason']) for event in dia['events']] == [('Session 1', 'past')]
+    assert client.get('/api/v1/events/history').status_code == 401
+    assert client.get('/api/v1/events/history?reason=gone', headers=headers).status_code == 400
+    assert client.get('/api/v1/events/history?from=soon', headers=headers).status_code == 400
+
+
+def test_archived_salesforce_event_ages_out_as_archived(app, salesforce):  # noqa: F811
+    assert sync_upcoming_events()['success']
+    full = UpcomingEvent.query.filter_by(salesforce_id='a0S000000000000001').one()
+    full.available_slots = 0
+    db.session.commit()
+    # Full sessions drop out of the Salesforce query (Available_slots__c > 0)
+    del salesforce.salesforce_records[1]
+
+    for _ in range(2):
+        assert sync_upcoming_events()['success']
+        event = UpcomingEvent.query.filter_by(salesforce_id='a0S000000000000001').one()
+        assert event.status == 'archived'
+    assert EventHistory.query.count() == 0
+
+    event.updated_at = datetime.now(timezone.utc) - timedelta(days=40)
+    db.session.commit()
+    assert sync_upcoming_events()['deleted_count'] == 1
+    assert [(entry.salesforce_id, entry.reason) for entry in EventHistory.query] == [
+        ('a0S000000000000001', 'archived')]
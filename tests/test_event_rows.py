@@ -0,0 +1,26 @@
+from models import db
+from models.event_district_mapping import EventDistrictMapping
+from models.upcoming_event import UpcomingEvent
+from tests.test_fake_upstreams import _salesforce_record
+
+
+def test_list_dicts_match_orm_dicts_without_loading_objects(app, client):
+    UpcomingEvent.upsert_from_salesforce([_salesforce_record(i) for i in range(3)])
+    event = UpcomingEvent.query.order_by(UpcomingEvent.id).first()
+    event.note = 'Bring a badge'
+    db.session.add(EventDistrictMapping(event_id=event.id, district='Hickman Mills'))
+    db.session.commit()
+    query = UpcomingEvent.query.order_by(UpcomingEvent.id)
+    expected = UpcomingEvent.to_dict_list(query.all())
+    db.session.expunge_all()
+
+    assert UpcomingEvent.list_dicts(query) == expected
+    assert not any(isinstance(obj, UpcomingEvent) for obj in db.session.identity_map.values())
+    row = UpcomingEvent.rows(query, 'summary')[0]
+    assert not hasattr(row, '__dict__') and not hasattr(row, 'note')
+
+    summary = client.get('/api/districts/Hickman Mills/events?fields=summary').get_json()
+    assert len(summary) == 1 and summary[0]['districts'] == ['Hickman Mills']
+    assert 'note' not in summary[0] and 'registration_link' not in summary[0]
+    assert summary[0]['start_date'] == expected[0]['start_date']
+    assert client.get('/api/districts/Hickman Mills/events?fields=everything').status_code == 400
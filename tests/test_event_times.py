@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from models import db
+from models.upcoming_event import UpcomingEvent
+from routes.dia import upcoming_dia_events
+from services.event_times import EventTimes, parse_event_times
+from tests.test_fake_upstreams import _salesforce_record
+
+
+def test_upserts_store_parsed_times(app, client):
+    early = dict(_salesforce_record(1), Name='Early', **{'Date_and_Time_for_Cal__c': '12/15/2099 8:00 AM to 9:00 AM'})
+    late = dict(_salesforce_record(2), Name='Late', **{'Date_and_Time_for_Cal__c': '12/15/2099 1:00 PM to 3:30 PM'})
+    UpcomingEvent.upsert_from_salesforce([late, early])
+    UpcomingEvent.upsert_from_virtual_sheet([{'Date': '9/3/2099', 'Time': '10:00', 'Session Title': 'Virtual Chat',
+                                              'Session Type': 'Industry Chat',
+                                              'Session Link': 'https://example.org/v/1'}], 'sheet-1')
+
+    # Same start_date, so the feed orders by the stored start time
+    names = [event['name'] for event in client.get('/events/displayed_events_api').get_json()]
+    assert names.index('Early') < names.index('Late')
+
+    event = UpcomingEvent.query.filter_by(name='Late').one()
+    assert (event.starts_at.replace(tzinfo=None), event.ends_at.replace(tzinfo=None)) == \
+        (datetime(2099, 12, 15, 19, 0), datetime(2099, 12, 15, 21, 30))
+    late_json = next(e for e in client.get('/events/displayed_events_api').get_json() if e['name'] == 'Late')
+    assert (late_json['starts_at'], late_json['ends_at']) == ('2099-12-15T19:00:00Z', '2099-12-15T21:30:00Z')
+    virtual = UpcomingEvent.query.filter_by(source='virtual').one()
+    assert virtual.starts_at.replace(tzinfo=None) == datetime(2099, 9, 3, 15, 0)
+    in_range = UpcomingEvent.query.filter(UpcomingEvent.starts_at >= datetime(2099, 12, 15, 18, tzinfo=timezone.utc))
+    assert [event.name for event in in_range] == ['Late']
+
+
+def test_backfill_command(app):
+    db.session.add_all([
+        UpcomingEvent(name='Old', date_and_time='12/15/2099 9:00 AM to 11:00 AM', status='active'),
+        UpcomingEvent(name='No date', date_and_time='TBD', status='active'),
+    ])
+    db.session.commit()
+    # As stored before the columns existed
+    UpcomingEvent.query.update({'starts_at': None, 'ends_at': None})
+    db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['backfill-events', '--batch-size', '1'])
+    assert 'Updated 1 events.' in result.output
+    old = UpcomingEvent.query.filter_by(name='Old').one()
+    assert old.starts_at.replace(tzinfo=None) == datetime(2099, 12, 15, 15, 0)
+    no_date = UpcomingEvent.query.filter_by(name='No date').one()
+    assert (no_date.starts_at, no_date.category) == (None, 'in_person')
+
+    result = app.test_cli_runner().invoke(args=['backfill-events'])
+    assert 'Updated 0 events.' in result.output
+
+
+def test_all_day_events_span_the_local_day():
+    times = parse_event_times('TBD', datetime(2099, 5, 1, tzinfo=timezone.utc))
+    assert times.all_day
+    # Midnight in Kansas City (CDT, UTC-5), not midnight UTC
+    assert (times.starts_at, times.ends_at) == (datetime(2099, 5, 1, 5, tzinfo=timezone.utc),
+                                                datetime(2099, 5, 2, 5, tzinfo=timezone.utc))
+    assert EventTimes.from_columns(times.starts_at, times.ends_at) == times
+    assert times.local_dates() == (datetime(2099, 5, 1).date(), datetime(2099, 5, 2).date())
+    # The day summer time ends has 25 hours
+    fall_back = parse_event_times('11/1/2099')
+    assert fall_back.ends_at - fall_back.starts_at == timedelta(hours=25)
+    assert EventTimes.from_columns(fall_back.starts_at, fall_back.ends_at).all_day
+    timed = parse_event_times('12/15/2099 12:00 AM to 11:00 AM')
+    assert not EventTimes.from_columns(timed.starts_at, timed.ends_at).all_day
+
+
+def test_upcoming_filters_use_stored_times(app):
+    local_now = datetime.now(ZoneInfo('America/Chicago'))
+    later, earlier = local_now + timedelta(hours=2), local_now - timedelta(days=2)
+    db.session.add_all([
+        # start_date is the upstream date only: midnight UTC, already past for an event later today
+        UpcomingEvent(name='Later Today', event_type='DIA - Classroom Speaker', available_slots=2, status='active',
+                      date_and_time=f'{later:%m/%d/%Y %I:%M %p} to {later:%I:%M %p}',
+                      start_date=datetime(later.year, later.month, later.day, tzinfo=timezone.utc)),
+        UpcomingEvent(name='Two Days Ago', event_type='DIA - Classroom Speaker', available_slots=2, status='active',
+                      date_and_time=f'{earlier:%m/%d/%Y} 9:00 AM to 10:00 AM'),
+    ])
+    db.session.commit()
+    assert [event['name'] for event in upcoming_dia_events()] == ['Later Today']
+
+    past = UpcomingEvent.query.filter(UpcomingEvent.ends_at < datetime.now(timezone.utc) - timedelta(days=1))
+    assert [event.name for event in past] == ['Two Days Ago']
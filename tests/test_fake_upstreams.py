@@ -0,0 +1,90 @@
+import pytest
+from models import User, db
+from models.sync_state import SyncState
+from models.upcoming_event import UpcomingEvent
+from routes.sync import USER_SYNC_WATERMARK_KEY, sync_polaris_users
+from routes.upcoming_events import sync_upcoming_events
+from services.fake_upstreams import FakeUpstreamOptions, FakeUpstreams, FakeUpstreamServer
+from services.google_sheets_service import GoogleSheetsService
+from services.polaris_client import PolarisClient
+
+
+def _salesforce_record(index):
+    return {
+        'attributes': {'type': 'Session__c'},
+        'Id': f'a0S{index:015d}',
+        'Name': f'Fake Session {index}',
+        'Available_Slots__c': 5.0,
+        'Filled_Volunteer_Jobs__c': 1.0,
+        'Date_and_Time_for_Cal__c': '12/15/2099 9:00 AM to 11:00 AM',
+        'Session_Type__c': 'Career Jumping',
+        'Registration_Link__c': f'https://example.org/register/{index}',
+        'Display_on_Website__c': 'Yes',
+        'Start_Date__c': '2099-12-15',
+        'Session_Status__c': 'Confirmed',
+    }
+
+
+@pytest.fixture
+def upstreams(app):
+    fake = FakeUpstreams(
+        salesforce_records=[_salesforce_record(i) for i in range(5)],
+        sheets={'sheet-1': [{'Date': '9/3/2099', 'Time': '10:00', 'Session Title': 'Virtual Chat',
+                             'Session Type': 'Industry Chat', 'Session Link': 'https://example.org/v/1'}]},
+        polaris_users=[
+            {'username': f'user{i}', 'email': f'user{i}@example.org', 'password_hash': 'x',
+             'updated_at': f'2099-01-0{i + 1}T00:00:00'}
+            for i in range(3)
+        ],
+        options=FakeUpstreamOptions(salesforce_page_size=2)
+    )
+    with FakeUpstreamServer(fake) as server:
+        saved = {key: app.config.get(key) for key in server.config_overrides()}
+        app.config.update(server.config_overrides())
+        yield fake
+        app.config.update(saved)
+
+
+def test_salesforce_sync_follows_query_more(app, upstreams):
+    result = sync_upcoming_events()
+
+    assert result['success'], result
+    assert result['new_count'] == 5
+    assert UpcomingEvent.query.filter_by(source='salesforce').count() == 5
+    assert upstreams.requests['salesforce_query_more'] == 2
+
+
+def test_sheets_csv_round_trips_through_service(app, upstreams):
+    rows = GoogleSheetsService.from_config(app.config).read_sheet_data('sheet-1')
+
+    assert len(rows) == 1
+    assert rows[0]['Session Title'] == 'Virtual Chat'
+    assert GoogleSheetsService.from_config(app.config).validate_sheet_structure(rows)
+
+
+def test_polaris_stream_filters_by_watermark(app, upstreams):
+    client = PolarisClient.from_config(app.config)
+    users = list(client.iter_users(updated_since='2099-01-02T00:00:00'))
+
+    assert [user['username'] for user in users] == ['user1', 'user2']
+    assert client.last_watermark == '2099-01-03T00:00:00'
+
+
+def test_empty_user_delta_keeps_stored_watermark(app, upstreams):
+    SyncState.set_value(USER_SYNC_WATERMARK_KEY, '2099-02-01T00:00:00')
+    db.session.commit()
+
+    result, status = sync_polaris_users()
+    assert status == 200 and result['stats']['created'] == 0
+    # Not the overlap-adjusted updated_since, which would step back on every empty sync
+    assert SyncState.get_value(USER_SYNC_WATERMARK_KEY) == '2099-02-01T00:00:00'
+    assert result['watermark'] == '2099-02-01T00:00:00'
+
+
+def test_injected_errors_surface_to_the_caller(app, upstreams):
+    upstreams.options.error_rates = {'sheets': 1.0}
+    upstreams.options.error_status = 404
+
+    with pytest.raises(ConnectionError):
+        GoogleSheetsService.from_config(app.config).read_sheet_data('sheet-1')
+    assert upstreams.errors_injected == 2
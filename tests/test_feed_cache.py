@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+from models import db
+from models.event_district_mapping import EventDistrictMapping
+from models.school_mapping import SchoolMapping
+from models.upcoming_event import UpcomingEvent
+from services.feed_cache import snapshot_cache
+from services.warmup import warm_up
+
+
+def _add_event(salesforce_id, name, event_type='DIA - Classroom Speaker', districts=()):
+    event = UpcomingEvent(
+        salesforce_id=salesforce_id,
+        name=name,
+        available_slots=3,
+        filled_volunteer_jobs=0,
+        event_type=event_type,
+        display_on_website=True,
+        start_date=datetime.now(timezone.utc) + timedelta(days=7),
+        status='active',
+        source='salesforce'
+    )
+    db.session.add(event)
+    db.session.flush()
+    for district in districts:
+        db.session.add(EventDistrictMapping(event_id=event.id, district=district))
+    db.session.commit()
+    return event
+
+
+def test_feed_is_reused_until_a_commit_changes_it(app, client, query_recorder):
+    """The serialized feed is served without queries until its events change"""
+    _add_event('FEED00000001', 'First Event')
+    assert [event['name'] for event in client.get('/events/volunteer_signup_api').get_json()] == ['First Event']
+
+    with query_recorder() as recorder:
+        response = client.get('/events/volunteer_signup_api')
+    assert len(recorder.statements) == 0
+    assert response.mimetype == 'application/json'
+
+    _add_event('FEED00000002', 'Second Event')
+    names = [event['name'] for event in client.get('/events/volunteer_signup_api').get_json()]
+    assert names == ['First Event', 'Second Event']
+
+
+def test_bulk_update_invalidates_feed(app, client):
+    """Query.update() bypasses the flush but still invalidates on commit"""
+    _add_event('FEED00000001', 'Bulk Event')
+    assert len(client.get('/events/volunteer_signup_api').get_json()) == 1
+
+    UpcomingEvent.query.update({'status': 'archived'})
+    db.session.commit()
+    assert client.get('/events/volunteer_signup_api').get_json() == []
+
+
+def test_dia_district_feed_filters_snapshot(app, client):
+    _add_event('FEED00000001', 'North Talk', districts=['North'])
+    _add_event('FEED00000002', 'South Talk', districts=['South', 'North'])
+    _add_event('FEED00000003', 'Career Day', event_type='Career Jumping', districts=['North'])
+
+    assert len(client.get('/events/api/dia/events').get_json()) == 2
+    names = [event['name'] for event in client.get('/events/api/dia/districts/South/events').get_json()]
+    assert names == ['South Talk']
+
+
+def test_warm_up_primes_snapshots(app, client, query_recorder):
+    """After warm-up the feeds and school lookups need no queries"""
+    _add_event('FEED00000001', 'Warm Event', districts=['Kansas City'])
+    db.session.add_all([
+        SchoolMapping(name='Central High', district='Kansas City', parent_salesforce_id='P1'),
+        SchoolMapping(name='East Elementary', district='North Kansas City', parent_salesforce_id='P2'),
+    ])
+    db.session.commit()
+
+    timings = warm_up(app, freeze=False)
+    assert 'templates' in timings
+    assert {f'snapshot:{name}' for name in snapshot_cache.names} <= set(timings)
+
+    with query_recorder() as recorder:
+        assert len(client.get('/events/dia_events_api').get_json()) == 1
+        assert client.get('/api/districts/search?q=kansas').get_json() == ['Kansas City', 'North Kansas City']
+        schools = client.get('/api/school-mappings/district/Kansas City').get_json()
+    assert [school['name'] for school in schools] == ['Central High']
+    assert len(recorder.statements) == 0
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from models import User, db
+from models.job_run import JobRun
+from services.job_lock import JobLock, execute_job
+
+
+def _start_foreign_run(name):
+    """Hold the job's lock and record a running run, as another process would"""
+    lock = JobLock(name, owner='other-process')
+    assert lock.acquire()
+    run = JobRun(job_name=name, trigger='scheduled', status='running', started_at=datetime.now(timezone.utc))
+    db.session.add(run)
+    db.session.commit()
+    return lock, run.id
+
+
+def test_lock_is_exclusive_until_released(app):
+    first, second = JobLock('demo'), JobLock('demo')
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+    assert -2 ** 31 <= JobLock('any job name').key < 2 ** 31
+
+
+def test_second_caller_gets_in_flight_handle(app, client):
+    lock, run_id = _start_foreign_run('school_mappings')
+    try:
+        response = client.post('/api/school-mappings/sync')
+    finally:
+        lock.release()
+
+    assert response.status_code == 409
+    data = response.get_json()
+    assert data['success'] is False
+    assert data['job']['id'] == run_id
+    assert data['job']['status'] == 'running'
+    assert data['job']['status_url'] == f'/sync/jobs/{run_id}'
+
+    # Released, so the next caller runs the job itself
+    calls = []
+    execute_job('school_mappings', lambda: calls.append(1) or {'success': True})
+    assert calls == [1]
+
+
+def test_waiting_caller_receives_in_flight_result(app, client):
+    lock, run_id = _start_foreign_run('school_mappings')
+
+    def finish():
+        time.sleep(0.3)
+        with app.app_context():
+            run = db.session.get(JobRun, run_id)
+            run.status = 'success'
+            run.finished_at = datetime.now(timezone.utc)
+            run.result = json.dumps({'success': True, 'message': 'Synced elsewhere', 'changed_count': 2})
+            db.session.commit()
+            db.session.remove()
+            lock.release()
+
+    finisher = threading.Thread(target=finish)
+    finisher.start()
+    response = client.post('/api/school-mappings/sync?wait=1')
+    finisher.join()
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['message'] == 'Synced elsewhere'
+    assert data['shared_run'] is True
+    assert data['job']['id'] == run_id
+
+
+def test_job_status_endpoint(app, client):
+    _, _, status = execute_job('school_mappings', lambda: ({'success': False, 'error': 'CSV missing'}, 500))
+    assert status == 500
+
+    user = User(username='jobs', email='jobs@example.com', password_hash='x', first_name='J', last_name='Obs')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+
+    runs = client.get('/sync/jobs?job=school_mappings').get_json()
+    assert [(run['status'], run['trigger'], run['error']) for run in runs] == [('failed', 'manual', 'CSV missing')]
+    assert client.get(f"/sync/jobs/{runs[0]['id']}").get_json()['status'] == 'failed'
+    assert client.get('/sync/jobs/999').status_code == 404
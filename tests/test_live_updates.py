@@ -0,0 +1,120 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.exc import OperationalError
+from models import User, db
+from models.upcoming_event import UpcomingEvent
+from services.job_lock import execute_job
+from services.live_updates import Broadcaster, publish
+
+
+def _login(client):
+    user = User(username='live', email='live@example.com', password_hash='x', first_name='L', last_name='Ive')
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+
+
+def _add_event(salesforce_id='LIVE00000001'):
+    event = UpcomingEvent(salesforce_id=salesforce_id, name='Career Day', available_slots=2,
+                          filled_volunteer_jobs=0, event_type='In Person', display_on_website=True,
+                          start_date=datetime.now(timezone.utc) + timedelta(days=3),
+                          status='active', source='salesforce')
+    db.session.add(event)
+    db.session.commit()
+    return event
+
+
+def _messages(queue):
+    """Parsed (id, kind, data) of every queued SSE frame"""
+    frames = []
+    while not queue.empty():
+        fields = dict(line.split(': ', 1) for line in queue.get_nowait().strip().split('\n'))
+        frames.append((int(fields['id']), fields['event'], json.loads(fields['data'])))
+    return frames
+
+
+def test_committed_changes_reach_subscribers(app, client):
+    """Admin edits and finished syncs are fanned out once committed, in order"""
+    broadcaster = Broadcaster(app, background=False)
+    subscription = broadcaster.subscribe()
+    _login(client)
+    _add_event()
+
+    client.post('/events/toggle-event-visibility', json={'event_id': 'LIVE00000001', 'visible': False})
+    client.put('/events/api/events/LIVE00000001/note', json={'note': 'Bring a badge'})
+    execute_job('school_mappings', lambda: {'success': True, 'changed_count': 4}, changed=lambda r: r['changed_count'])
+    assert broadcaster.poll() == 3
+
+    (first_id, kind, data), (_, _, noted), (_, _, sync) = _messages(subscription.queue)
+    assert kind == 'event_updated'
+    assert data['event']['Id'] == 'LIVE00000001' and data['event']['display_on_website'] is False
+    assert noted['event']['note'] == 'Bring a badge'
+    assert sync['job'] == 'school_mappings' and sync['status'] == 'success' and sync['changed_count'] == 4
+
+    # A reconnecting client replays from its Last-Event-ID
+    replayed = broadcaster.subscribe(last_event_id=first_id)
+    assert [kind for _, kind, _ in _messages(replayed.queue)] == ['event_updated', 'sync_completed']
+    assert broadcaster.poll() == 0
+
+
+def test_rolled_back_change_is_not_published(app, client):
+    broadcaster = Broadcaster(app, background=False)
+    subscription = broadcaster.subscribe()
+    _login(client)
+    _add_event()
+
+    # The district route fails on a missing district and publishes nothing
+    assert client.post('/events/api/events/LIVE00000001/districts', json={}).status_code == 400
+    assert broadcaster.poll() == 0
+    assert subscription.queue.empty()
+
+
+def test_stream_endpoint_replays_and_heartbeats(app, client, monkeypatch):
+    app.extensions['live_updates'] = Broadcaster(app, background=False)
+    monkeypatch.setitem(app.config, 'LIVE_STREAM_MAX_SECONDS', 0.2)
+    _login(client)
+    _add_event()
+    client.post('/events/toggle-event-visibility', json={'event_id': 'LIVE00000001', 'visible': False})
+
+    response = client.get('/events/stream', headers={'Last-Event-ID': '0'})
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = response.get_data(as_text=True)
+    assert body.startswith('retry: 3000\n\n')
+    assert 'event: event_updated\n' in body
+    assert body.endswith(': keep-alive\n\n')
+    assert app.extensions['live_updates'].subscriber_count == 0
+
+
+def test_poller_does_not_skip_a_notification_that_commits_late(app):
+    broadcaster = Broadcaster(app, background=False)
+    subscription = broadcaster.subscribe()
+    # A long transaction takes the lower id first
+    publish('sync_completed', {'job': 'salesforce_sessions'})
+    db.session.flush()
+
+    def quick_writer():
+        with app.app_context():
+            while True:
+                try:
+                    publish('event_removed', {'id': 7})
+                    db.session.commit()
+                    break
+                except OperationalError:
+                    # Shared-cache SQLite reports the lock at once instead of waiting
+                    db.session.rollback()
+                    time.sleep(0.05)
+            db.session.remove()
+
+    writer = threading.Thread(target=quick_writer)
+    writer.start()
+    time.sleep(0.3)
+    assert writer.is_alive()  # cannot commit the higher id first
+    db.session.commit()
+    writer.join()
+
+    assert broadcaster.poll() == 2
+    assert [kind for _, kind, _ in _messages(subscription.queue)] == ['sync_completed', 'event_removed']
@@ -0,0 +1,100 @@
+import json
+import os
+from services import metrics
+from services.metrics import Counter, Gauge, Histogram, MetricsRegistry, render_text
+from services.warmup import reset_after_fork
+
+
+def test_metrics_endpoint_reports_requests_and_sql(client):
+    client.get('/api/school-mappings')
+    body = client.get('/metrics').get_data(as_text=True)
+
+    assert '# TYPE voluntold_http_request_duration_seconds histogram' in body
+    assert 'voluntold_http_requests_total{endpoint="school_mappings.get_mappings",method="GET",status="200"}' in body
+    assert 'voluntold_sql_queries_total{endpoint="school_mappings.get_mappings"}' in body
+    assert 'voluntold_http_requests_in_flight' in body
+
+
+def test_metrics_token_required_when_configured(app, client):
+    app.config['METRICS_TOKEN'] = 'secret'
+    try:
+        assert client.get('/metrics').status_code == 401
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+        assert client.get('/metrics', headers={'Authorization': 'Bearer secret'},
+                          environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 200
+    finally:
+        app.config['METRICS_TOKEN'] = None
+    # Without a token, only local scrapers are answered
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.9'}).status_code == 403
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = Histogram('test_seconds', 'Test', buckets=(0.1, 1), registry=registry)
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value, job='a')
+
+    text = render_text(registry.collect())
+    assert 'test_seconds_bucket{job="a",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{job="a",le="1"} 2' in text
+    assert 'test_seconds_bucket{job="a",le="+Inf"} 3' in text
+    assert 'test_seconds_count{job="a"} 3' in text
+
+
+def test_snapshots_aggregate_across_processes(tmp_path):
+    registry = MetricsRegistry()
+    registry.metrics_dir = str(tmp_path)
+    counter = Counter('test_total', 'Test', registry=registry)
+    gauge = Gauge('test_in_flight', 'Test', registry=registry)
+    counter.inc(2)
+    gauge.set(1)
+
+    other_metrics = {
+        'test_total': {'type': 'counter', 'help': 'Test', 'samples': [[[], 3]]},
+        'test_in_flight': {'type': 'gauge', 'help': 'Test', 'samples': [[[], 4]]},
+    }
+    # A live worker (the test runner's parent) and a worker that has exited
+    for pid in (os.getppid(), 2 ** 22 + 1):
+        (tmp_path / f'metrics_{pid}.json').write_text(json.dumps({'pid': pid, 'metrics': other_metrics}))
+
+    merged = registry.collect()
+    assert merged['test_total']['values'][()] == 8
+    assert merged['test_in_flight']['values'][()] == 5
+
+    # The exited worker's counters were folded into metrics_dead.json and its file deleted
+    assert sorted(path.name for path in tmp_path.glob('*.json')) == [f'metrics_{os.getppid()}.json',
+                                                                      'metrics_dead.json']
+    (tmp_path / f'metrics_{2 ** 22 + 2}.json').write_text(json.dumps({'pid': 2 ** 22 + 2, 'metrics': other_metrics}))
+    merged = registry.collect()
+    assert merged['test_total']['values'][()] == 11
+    assert merged['test_in_flight']['values'][()] == 5
+    assert not (tmp_path / f'metrics_{2 ** 22 + 2}.json').exists()
+
+    # A snapshot under our own pid before our first flush was left by an exited process
+    (tmp_path / f'metrics_{os.getpid()}.json').write_text(json.dumps({'pid': os.getpid(), 'metrics': other_metrics}))
+    registry.fold_dead(include_own=True)
+    assert registry.collect()['test_total']['values'][()] == 14
+
+
+def test_forked_worker_folds_a_snapshot_left_under_its_pid(app, tmp_path, monkeypatch):
+    registry = MetricsRegistry()
+    counter = Counter('test_total', 'Test', registry=registry)
+    registry.metrics_dir = str(tmp_path)
+    # The preloaded master flushed (or init_metrics folded) under its own pid before forking
+    registry._flushed_pid = os.getpid() + 1
+    # An exited worker that had this pid left its totals behind
+    leftover = {'test_total': {'type': 'counter', 'help': 'Test', 'samples': [[[], 3]]}}
+    (tmp_path / f'metrics_{os.getpid()}.json').write_text(json.dumps({'pid': os.getpid(), 'metrics': leftover}))
+
+    counter.inc(2)
+    registry.flush()
+    assert registry.collect()['test_total']['values'][()] == 5
+    assert json.loads((tmp_path / 'metrics_dead.json').read_text())['metrics']['test_total']['samples'] == [[[], 3]]
+
+    # gunicorn's post_fork hook folds it before the worker serves anything
+    (tmp_path / f'metrics_{os.getpid()}.json').write_text(json.dumps({'pid': os.getpid(), 'metrics': leftover}))
+    registry._flushed_pid = os.getpid() + 1
+    monkeypatch.setattr(metrics, 'default_registry', registry)
+    reset_after_fork(app)
+    assert not (tmp_path / f'metrics_{os.getpid()}.json').exists()
+    assert json.loads((tmp_path / 'metrics_dead.json').read_text())['metrics']['test_total']['samples'] == [[[], 6]]
@@ -0,0 +1,125 @@
+"""
+Query budgets for every GET route.
+
+Each route is requested against a small and a larger dataset. It must stay
+within its budget, and its statement count must not grow with the number of
+events (which is what an N+1 looks like). Failures print the statements
+grouped by shape.
+"""
+
+from datetime import datetime, timedelta, timezone
+import pytest
+from models import User, db
+from models.event_district_mapping import EventDistrictMapping
+from models.school_mapping import SchoolMapping
+from models.upcoming_event import UpcomingEvent
+from services.user_cache import principal_cache
+
+DEFAULT_BUDGET = 5
+# Endpoints that legitimately need more statements than the default
+ROUTE_BUDGETS = {}
+# Not measured: side effects, calls to external services, or routes that
+# depend on templates/relationships that do not exist in this tree
+SKIPPED_ENDPOINTS = {
+    'static', 'auth.logout', 'virtual_events.get_sheet_info',
+    'upcoming_events.upcoming_event_management', 'upcoming_events.manage_event_schools',
+}
+SAMPLE_ARGS = {
+    'district_name': 'District 1',
+    'district': 'District 1',
+    'event_id': 1,
+    'school_id': 1,
+    'user_id': 1,
+}
+
+
+def _seed_events(start, count):
+    now = datetime.now(timezone.utc)
+    for i in range(start, start + count):
+        event = UpcomingEvent(
+            salesforce_id=f'BUDGET{i:05d}',
+            name=f'Budget Event {i}',
+            available_slots=5,
+            filled_volunteer_jobs=i % 2,
+            date_and_time='12/15/2030 9:00 AM to 11:00 AM',
+            event_type='DIA - Classroom Speaker' if i % 2 else 'Career Jumping',
+            display_on_website=True,
+            start_date=now + timedelta(days=i + 1),
+            status='archived' if i % 5 == 4 else 'active',
+            source='virtual' if i % 7 == 6 else 'salesforce'
+        )
+        db.session.add(event)
+        db.session.flush()
+        for district in (f'District {i % 3}', 'District 1'):
+            if not EventDistrictMapping.query.filter_by(event_id=event.id, district=district).first():
+                db.session.add(EventDistrictMapping(event_id=event.id, district=district))
+        db.session.add(SchoolMapping(name=f'School {i}', district=f'District {i % 3}', parent_salesforce_id=f'P{i}'))
+    db.session.commit()
+
+
+def _get_routes(app):
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if 'GET' not in rule.methods or rule.endpoint in SKIPPED_ENDPOINTS:
+            continue
+        if any(arg not in SAMPLE_ARGS for arg in rule.arguments):
+            continue
+        routes.append((rule.endpoint, rule.rule, {arg: SAMPLE_ARGS[arg] for arg in rule.arguments}))
+    return routes
+
+
+@pytest.fixture
+def logged_in_client(app, client):
+    user = User(username='budget', email='budget@example.com', password_hash='x', is_admin=True)
+    db.session.add(user)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
+
+
+def _measure(app, client, query_recorder, endpoint, args):
+    with app.test_request_context():
+        from flask import url_for
+        url = url_for(endpoint, **args)
+    db.session.expunge_all()
+    principal_cache.clear()
+    with query_recorder() as recorder:
+        client.get(url)
+    return url, recorder
+
+
+def test_routes_stay_within_query_budget(app, logged_in_client, query_recorder):
+    _seed_events(0, 7)
+    small = {endpoint: _measure(app, logged_in_client, query_recorder, endpoint, args)
+             for endpoint, _, args in _get_routes(app)}
+    _seed_events(7, 20)
+    large = {endpoint: _measure(app, logged_in_client, query_recorder, endpoint, args)
+             for endpoint, _, args in _get_routes(app)}
+
+    failures = []
+    for endpoint, (url, recorder) in large.items():
+        budget = ROUTE_BUDGETS.get(endpoint, DEFAULT_BUDGET)
+        if recorder.count > budget:
+            failures.append(f'{url} ({endpoint}) issued {recorder.count} statements, budget {budget}\n'
+                            f'{recorder.report()}')
+        elif recorder.count > small[endpoint][1].count:
+            failures.append(f'{url} ({endpoint}) grew from {small[endpoint][1].count} to {recorder.count} '
+                            f'statements with more events (N+1?)\n{recorder.report()}')
+    assert not failures, '\n\n'.join(failures)
+
+
+def test_assert_max_queries_reports_repeated_shapes(app, assert_max_queries):
+    _seed_events(0, 3)
+    db.session.expunge_all()
+    with pytest.raises(AssertionError) as excinfo:
+        with assert_max_queries(2, label='per-event districts'):
+            for event in UpcomingEvent.query.all():
+                event.to_dict()
+    assert 'per-event districts issued 4 SQL statements (budget 2)' in str(excinfo.value)
+    assert '3 x SELECT event_district_mappings' in str(excinfo.value)
+
+    db.session.expunge_all()
+    with assert_max_queries(2):
+        UpcomingEvent.to_dict_list(UpcomingEvent.query.all())
@@ -0,0 +1,90 @@
+import logging
+import random
+from app import setup_logging
+from models import db
+from models.job_lease import JobLease
+from models.job_run import JobRun
+from services.scheduler import Job, Scheduler
+
+
+def _scheduler(app, jobs, **kwargs):
+    kwargs.setdefault('jitter', 0)
+    return Scheduler(app, jobs, owner='test-owner', rng=random.Random(1), **kwargs)
+
+
+def test_interval_adapts_to_changes_and_failures(app):
+    """Changing data shortens the interval, quiet runs restore it, failures back off"""
+    outcomes = iter([
+        {'success': True, 'changed': 5},
+        {'success': True, 'changed': 5},
+        {'success': True, 'changed': 5},
+        {'success': True, 'changed': 0},
+        {'success': False, 'error': 'upstream down'},
+        {'success': False, 'error': 'upstream down'},
+    ])
+    job = Job('demo', lambda: next(outcomes), interval=400, changed=lambda r: r['changed'])
+    scheduler = _scheduler(app, [job], max_backoff=1000)
+
+    intervals = [scheduler.run_job('demo')['next_interval'] for _ in range(6)]
+    # Halved twice to the floor (interval / 4), doubled back, then backoff capped at max_backoff
+    assert intervals == [200, 100, 100, 200, 400, 800]
+
+    runs = JobRun.query.filter_by(job_name='demo').order_by(JobRun.id).all()
+    assert [run.status for run in runs] == ['success'] * 4 + ['failed'] * 2
+    assert runs[-1].error == 'upstream down'
+    assert runs[0].to_dict()['result'] == {'success': True, 'changed': 5}
+
+
+def test_job_exception_is_recorded_as_failure(app):
+    def broken():
+        raise RuntimeError('boom')
+
+    run = _scheduler(app, [Job('broken', broken, interval=60, changed=lambda r: 0)]).run_job('broken')
+    assert run['status'] == 'failed'
+    assert run['error'] == 'boom'
+    assert JobLease.acquire('broken', 'someone-else', 60)  # released despite the exception
+
+
+def test_lease_prevents_overlapping_runs(app):
+    calls = []
+    job = Job('leased', lambda: calls.append(1) or {'success': True}, interval=60, changed=lambda r: 0)
+    assert JobLease.acquire('leased', 'other-process', ttl=60)
+
+    assert _scheduler(app, [job]).run_job('leased') is None
+    assert calls == []
+
+    # An expired lease can be taken over
+    assert JobLease.acquire('leased', 'other-process', ttl=-1)
+    assert _scheduler(app, [job]).run_job('leased')['status'] == 'success'
+    assert calls == [1]
+
+
+def test_history_is_pruned_and_restores_schedule(app):
+    now = [1_000_000.0]
+    job = Job('pruned', lambda: {'success': True}, interval=60, changed=lambda r: 0)
+    scheduler = _scheduler(app, [job], history_limit=3, clock=lambda: now[0])
+    for _ in range(5):
+        scheduler.run_job('pruned')
+    assert JobRun.query.filter_by(job_name='pruned').count() == 3
+
+    # A restarted scheduler schedules from the last run instead of running at once
+    restarted = _scheduler(app, [job])
+    assert restarted.run_pending() == []
+    assert 0 < restarted.seconds_until_next() <= 60
+
+
+def test_scheduler_log_file_comes_from_config(app, tmp_path):
+    scheduler_logger = logging.getLogger('scheduler')
+    # TestingConfig leaves logs/scheduler.log alone
+    assert scheduler_logger.handlers == []
+
+    path = tmp_path / 'logs' / 'scheduler.log'
+    setup_logging({'SCHEDULER_LOG_FILE': str(path)})
+    try:
+        scheduler_logger.info('salesforce_sessions finished')
+        assert 'SCHEDULER: salesforce_sessions finished' in path.read_text()
+    finally:
+        for handler in scheduler_logger.handlers[:]:
+            scheduler_logger.removeHandler(handler)
+            handler.close()
+        scheduler_logger.propagate = True
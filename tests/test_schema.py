@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, create_engine, inspect, text
+from models.schema import ensure_schema
+
+
+def test_init_db_command_creates_schema(runner):
+    result = runner.invoke(args=['init-db'])
+
+    assert result.exit_code == 0, result.output
+    assert 'Database schema is up to date.' in result.output
+
+
+def test_ensure_schema_adds_missing_columns_and_indexes():
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE widgets (id INTEGER PRIMARY KEY, name VARCHAR(50))'))
+        conn.execute(text("INSERT INTO widgets (name) VALUES ('old')"))
+
+    metadata = MetaData()
+    Table('widgets', metadata,
+          Column('id', Integer, primary_key=True),
+          Column('name', String(50)),
+          Column('category', String(20), nullable=False),
+          Index('ix_widgets_category', 'category'))
+    Table('gadgets', metadata, Column('id', Integer, primary_key=True))
+
+    changes = ensure_schema(engine, metadata)
+
+    assert 'gadgets' in changes['created_tables']
+    assert changes['added_columns'] == ['widgets.category']
+    assert changes['added_indexes'] == ['ix_widgets_category']
+    assert 'category' in {column['name'] for column in inspect(engine).get_columns('widgets')}
+    # Running again is a no-op
+    assert ensure_schema(engine, metadata) == {'created_tables': [], 'added_columns': [], 'added_indexes': []}
@@ -0,0 +1,81 @@
+import json
+import os
+import pytest
+from flask import g
+from sqlalchemy import text
+from models import User, db
+from services.slow_query_log import SlowQueryLog
+
+
+@pytest.fixture
+def slow_query_log(app):
+    slow_query_log = SlowQueryLog(threshold_ms=0, shape_interval=60)
+    slow_query_log.install(db.engine)
+    yield slow_query_log
+    slow_query_log.uninstall()
+
+
+def test_slow_statement_is_recorded_with_plan(app, slow_query_log):
+    db.session.execute(text('SELECT * FROM users WHERE email = :email'), {'email': 'a@example.com'}).all()
+    slow_query_log.wait_idle()
+
+    entry = next(e for e in slow_query_log.latest() if 'FROM users' in e['sql'])
+    assert entry['sql'] == 'SELECT * FROM users WHERE email = ?'
+    assert entry['route'] == 'background'
+    assert entry['caller'].startswith('tests/test_slow_query_log.py:')
+    assert 'users' in entry['plan']
+
+
+def test_repeated_shape_is_captured_once(app, slow_query_log):
+    for email in ('a@example.com', 'b@example.com', 'c@example.com'):
+        db.session.execute(text('SELECT * FROM users WHERE email = :email'), {'email': email}).all()
+    slow_query_log.wait_idle()
+
+    entries = [e for e in slow_query_log.latest() if 'FROM users WHERE email' in e['sql']]
+    assert len(entries) == 1
+    shape = next(s for s in slow_query_log.top_shapes() if s['fingerprint'] == entries[0]['fingerprint'])
+    assert shape['count'] == 3
+
+
+def test_with_statement_gets_a_plan_and_failed_explain_is_still_persisted(app, slow_query_log, tmp_path):
+    slow_query_log.storage_dir = str(tmp_path)
+    db.session.execute(text('WITH recent AS (SELECT * FROM users) SELECT * FROM recent WHERE id = :id'),
+                       {'id': 1}).all()
+    slow_query_log.wait_idle()
+    entry = next(e for e in slow_query_log.latest() if e['sql'].startswith('WITH'))
+    assert 'users' in entry['plan']
+
+    # A statement EXPLAIN cannot run (the table is gone by the time the worker gets to it)
+    slow_query_log.record(db.engine, 'SELECT * FROM missing_table WHERE id = ?', (1,), 0.5)
+    slow_query_log.wait_idle()
+    persisted = json.loads((tmp_path / f'slow_queries_{os.getpid()}.json').read_text())['entries']
+    failed = next(e for e in persisted if 'missing_table' in e['sql'])
+    assert failed['plan'] is None and 'missing_table' in failed['plan_error']
+
+
+def test_captures_are_limited_per_minute(app):
+    slow_query_log = SlowQueryLog(threshold_ms=0, explain=False, max_per_minute=2)
+    for table in ('users', 'upcoming_events', 'sync_state'):
+        slow_query_log.record(db.engine, f'SELECT * FROM {table}', None, 0.5)
+
+    assert len(slow_query_log.latest()) == 2
+    assert slow_query_log.dropped == 1
+
+
+def test_slow_query_page_requires_admin(app, client):
+    admin = User(username='admin', email='admin@example.com', password_hash='x', is_admin=True)
+    user = User(username='plain', email='plain@example.com', password_hash='x')
+    db.session.add_all([admin, user])
+    db.session.commit()
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+    assert client.get('/admin/slow-queries').status_code == 403
+    # Test-client requests share the fixture's app context, where Flask-Login caches the user
+    g.pop('_login_user', None)
+
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+    response = client.get('/admin/slow-queries')
+    assert response.status_code == 200
+    assert b'SLOW_QUERY_THRESHOLD_MS' in response.data
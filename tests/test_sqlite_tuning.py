@@ -0,0 +1,69 @@
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from app import create_app
+from config import TestingConfig, database_engine_options
+from models import db
+from services.sqlite_tuning import DEFAULT_PRAGMAS, SQLITE_MEMORY_URI, is_memory
+
+
+def _app_for(uri, tuning):
+    config = type('SQLiteConfig', (TestingConfig,), {
+        'SQLALCHEMY_DATABASE_URI': uri,
+        'SQLALCHEMY_ENGINE_OPTIONS': database_engine_options(uri),
+        'SQLITE_TUNING': tuning,
+    })
+    return create_app(config)
+
+
+def _pragmas(conn):
+    return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size', 'cache_size', 'temp_store')}
+
+
+def test_pragmas_applied_to_every_connection(tmp_path):
+    tuned = _app_for(f'sqlite:///{tmp_path}/tuned.db', tuning=True)
+    with tuned.app_context():
+        # Two connections held at once, so the second is a new one rather than the first reused
+        with db.engine.connect() as first, db.engine.connect() as second:
+            for conn in (first, second):
+                assert _pragmas(conn) == {
+                    'journal_mode': 'wal',
+                    'synchronous': 1,  # NORMAL
+                    'busy_timeout': DEFAULT_PRAGMAS['busy_timeout'],
+                    'mmap_size': DEFAULT_PRAGMAS['mmap_size'],
+                    'cache_size': DEFAULT_PRAGMAS['cache_size'],
+                    'temp_store': 2,  # MEMORY
+                }
+        db.engine.dispose()
+
+    plain = _app_for(f'sqlite:///{tmp_path}/plain.db', tuning=False)
+    with plain.app_context():
+        with db.engine.connect() as conn:
+            pragmas = _pragmas(conn)
+        assert (pragmas['journal_mode'], pragmas['mmap_size'], pragmas['temp_store']) == ('delete', 0, 0)
+        db.engine.dispose()
+
+
+def test_shared_cache_memory_database():
+    uri = SQLITE_MEMORY_URI.replace('voluntold', 'voluntold_shared_test')
+    assert is_memory(make_url(uri)) and is_memory(make_url('sqlite://'))
+    assert not is_memory(make_url('sqlite:///file.db'))
+
+    app = _app_for(uri, tuning=True)
+    try:
+        with app.app_context():
+            with db.engine.begin() as writer:
+                writer.execute(text('CREATE TABLE shared (value INTEGER)'))
+                writer.execute(text('INSERT INTO shared VALUES (1)'))
+            # Another pooled connection sees the same database...
+            with db.engine.connect() as first, db.engine.connect() as second:
+                assert second.execute(text('SELECT value FROM shared')).scalar() == 1
+                assert _pragmas(first)['busy_timeout'] == DEFAULT_PRAGMAS['busy_timeout']
+            # ...and the keepalive connection holds it open after the pool closes all of its own
+            db.engine.dispose()
+            with db.engine.connect() as conn:
+                assert conn.execute(text('SELECT value FROM shared')).scalar() == 1
+            db.engine.dispose()
+    finally:
+        for conn in app.extensions.pop('sqlite_keepalive', []):
+            conn.close()
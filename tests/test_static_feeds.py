@@ -0,0 +1,81 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+import brotli
+import pytest
+from models import db
+from models.event_district_mapping import EventDistrictMapping
+from models.upcoming_event import UpcomingEvent
+from services.static_feeds import feed_freshness, publish_feeds, publish_if_stale
+
+
+@pytest.fixture
+def feeds(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'STATIC_FEEDS', True)
+    monkeypatch.setitem(app.config, 'STATIC_FEEDS_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _add_dia_event(districts=('Kansas City Public Schools',)):
+    event = UpcomingEvent(salesforce_id='DIA000000001', name='DIA Speaker', available_slots=2,
+                          filled_volunteer_jobs=0, event_type='DIA - Classroom Speaker', display_on_website=True,
+                          start_date=datetime.now(timezone.utc) + timedelta(days=5), status='active')
+    db.session.add(event)
+    db.session.flush()
+    db.session.add_all([EventDistrictMapping(event_id=event.id, district=district) for district in districts])
+    UpcomingEvent.log_changes('insert', [event])
+    db.session.commit()
+    return event
+
+
+def test_publish_writes_variants_and_skips_unchanged(app, feeds):
+    event = _add_dia_event()
+    report = publish_feeds()
+    assert report['written'] == 4 and report['unchanged'] == 0
+
+    district_feed = feeds / 'dia' / 'districts' / 'kansas-city-public-schools.json'
+    assert json.loads(district_feed.read_text())['events'][0]['Name'] == 'DIA Speaker'
+    plain = (feeds / 'displayed_events.json').read_bytes()
+    assert gzip.decompress((feeds / 'displayed_events.json.gz').read_bytes()) == plain
+    assert brotli.decompress((feeds / 'displayed_events.json.br').read_bytes()) == plain
+    assert not list(feeds.rglob('*.tmp'))
+    manifest = json.loads((feeds / 'manifest.json').read_text())
+    assert manifest['cursor'] == report['cursor']
+    assert manifest['feeds']['dia_events.json']['count'] == 1
+    assert manifest['feeds']['dia_events.json']['br_bytes'] == (feeds / 'dia_events.json.br').stat().st_size
+
+    mtime = (feeds / 'dia_events.json').stat().st_mtime_ns
+    assert publish_feeds()['unchanged'] == 4
+    assert (feeds / 'dia_events.json').stat().st_mtime_ns == mtime
+
+    # An admin edit leaves the feeds behind until the next publish; the district feed goes away
+    mapping = EventDistrictMapping.query.filter_by(event_id=event.id).one()
+    db.session.delete(mapping)
+    UpcomingEvent.log_changes('update', [event])
+    db.session.commit()
+    assert feed_freshness()['changes_behind'] == 1
+
+    report = publish_if_stale()
+    assert report['removed'] == 1
+    assert not [path for path in district_feed.parent.iterdir() if path.name.startswith(district_feed.name)]
+    assert feed_freshness()['changes_behind'] == 0
+    assert publish_if_stale()['written'] == 0
+
+
+def test_feed_route_negotiates_precompressed_variant(app, client, feeds):
+    _add_dia_event()
+    publish_feeds()
+
+    compressed = client.get('/feeds/dia_events.json', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert compressed.mimetype == 'application/json'
+    assert 'Accept-Encoding' in compressed.headers['Vary']
+    plain = client.get('/feeds/dia_events.json', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert gzip.decompress(compressed.data) == plain.data
+    preferred = client.get('/feeds/dia_events.json', headers={'Accept-Encoding': 'gzip, br'})
+    assert preferred.headers['Content-Encoding'] == 'br'
+    assert brotli.decompress(preferred.data) == plain.data
+    assert client.get('/feeds/manifest.json').status_code == 200
+    assert client.get('/feeds/missing.json').status_code == 404
+    assert client.get('/feeds/.lock').status_code == 404
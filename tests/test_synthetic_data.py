@@ -0,0 +1,14 @@
+from datetime import timedelta
+from scripts.synthetic_data import DatasetSpec, salesforce_event_records
+from services.event_times import parse_event_times
+
+
+def test_salesforce_sessions_have_real_two_hour_times():
+    records = salesforce_event_records(DatasetSpec.for_scale('1k'), count=300)
+    for record in records:
+        times = parse_event_times(record['Date_and_Time_for_Cal__c'])
+        assert times is not None and not times.all_day, record['Date_and_Time_for_Cal__c']
+        assert times.ends_at - times.starts_at == timedelta(hours=2), record['Date_and_Time_for_Cal__c']
+    # Morning and afternoon starts, including ones that end after noon
+    assert {record['Date_and_Time_for_Cal__c'][11:] for record in records} >= {
+        '08:00 AM to 10:00 AM', '11:00 AM to 01:00 PM', '12:00 PM to 02:00 PM', '02:00 PM to 04:00 PM'}
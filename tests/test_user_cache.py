@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+from models import User, db
+from services.user_cache import CachedPrincipal, load_principal, principal_cache
+
+
+@pytest.fixture
+def user(app):
+    principal_cache.clear()
+    user = User(
+        username='cacheuser',
+        email='cache@example.com',
+        password_hash='fakehash123',
+        first_name='Cache',
+        last_name='User',
+        is_admin=True
+    )
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _count_user_queries(app, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM users' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_principal_is_cached(app, user):
+    """The second load of the same user is served from the cache"""
+    user_id = user.id
+    db.session.expunge_all()
+
+    assert _count_user_queries(app, lambda: load_principal(user_id)) == 1
+    principal = None
+
+    def load_again():
+        nonlocal principal
+        principal = load_principal(user_id)
+
+    assert _count_user_queries(app, load_again) == 0
+    assert isinstance(principal, CachedPrincipal)
+    assert principal.username == 'cacheuser'
+    assert principal.is_admin
+    assert principal.get_id() == str(user_id)
+
+
+def test_principal_hydrates_uncached_attributes(app, user):
+    """Attributes outside the cached fields load the full User once"""
+    load_principal(user.id)
+    principal = load_principal(user.id)
+    assert principal.password_hash == 'fakehash123'
+    assert principal.hydrate() is principal.hydrate()
+
+
+def test_principal_invalidated_on_update(app, user):
+    """Updating a user drops its cached principal"""
+    load_principal(user.id)
+    user.first_name = 'Changed'
+    db.session.commit()
+    assert load_principal(user.id).first_name == 'Changed'
+
+
+def test_cache_disabled_returns_user(app, user):
+    app.config['USER_CACHE_TTL'] = 0
+    try:
+        assert isinstance(load_principal(user.id), User)
+    finally:
+        app.config['USER_CACHE_TTL'] = 60
+
+
+def test_authenticated_requests_skip_user_query(app, client, user):
+    """Repeated dashboard AJAX calls only load the user once"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    db.session.expunge_all()
+
+    def requests():
+        for _ in range(3):
+            assert client.get('/api/events/archive').status_code == 200
+
+    assert _count_user_queries(app, requests) == 1
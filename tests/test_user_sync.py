@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy import event
+from models import User, db
+from services.user_sync import UserReconciler
+
+
+def _external(username, email, **extra):
+    data = {'username': username, 'email': email, 'password_hash': 'hash-' + username}
+    data.update(extra)
+    return data
+
+
+@pytest.fixture
+def existing_users(app):
+    users = [
+        User(username='alice', email='alice@example.com', password_hash='old', first_name='Alice'),
+        User(username='bob', email='bob@example.com', password_hash='old', first_name='Bob'),
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    return {user.username: user.id for user in users}
+
+
+def test_reconcile_applies_matching_rules(app, existing_users):
+    stats = UserReconciler(chunk_size=2).reconcile([
+        _external('alice2', 'alice@example.com', first_name='Alicia'),  # renamed by email
+        _external('bob', 'carol@example.com'),                           # username taken
+        _external('alice2', 'bob@example.com', first_name='Robert'),     # username now taken by alice
+        _external('dave', 'dave@example.com', security_level=1),          # new
+        {'username': 'nobody'},                                          # invalid
+    ])
+    db.session.commit()
+    db.session.expire_all()
+
+    assert stats == {'created': 1, 'updated': 1, 'skipped': 3}
+    alice = db.session.get(User, existing_users['alice'])
+    assert (alice.username, alice.first_name, alice.password_hash) == ('alice2', 'Alicia', 'hash-alice2')
+    bob = db.session.get(User, existing_users['bob'])
+    assert (bob.username, bob.first_name) == ('bob', 'Robert')
+    dave = User.query.filter_by(username='dave').one()
+    assert dave.security_level == 1 and dave.created_at is not None
+    assert User.query.filter_by(email='carol@example.com').first() is None
+
+
+def test_reconcile_duplicate_in_batch_updates_pending_create(app):
+    stats = UserReconciler().reconcile([
+        _external('erin', 'erin@example.com', first_name='Erin'),
+        _external('erin', 'erin@example.com', first_name='Erin B'),
+    ])
+    db.session.commit()
+
+    assert stats == {'created': 1, 'updated': 1, 'skipped': 0}
+    assert User.query.filter_by(email='erin@example.com').one().first_name == 'Erin B'
+
+
+def test_reconcile_query_count_is_independent_of_batch_size(app, existing_users):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    incoming = [_external(f'user{i}', f'user{i}@example.com') for i in range(200)]
+    incoming.append(_external('alice', 'alice@example.com', first_name='Changed'))
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        UserReconciler(chunk_size=100).reconcile(incoming)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    db.session.commit()
+
+    # 3 prefetch chunks per lookup column, 1 bulk update, 3 insert chunks
+    assert len(statements) <= 10
+    assert User.query.count() == 202